@@ -3,8 +3,9 @@ import threading
 
 from operator_mod.logger.global_logger import Logger
 
-from controller.algorithms.algorithm_manager_class.states.all_states import BubbleSizerState, BubbleSizerSingleState, PelletSizerSingleState, MixingTimerState
+from controller.algorithms.algorithm_manager_class.states.all_states import BubbleSizerState, BubbleSizerSingleState, PelletSizerSingleState, MixingTimerState, MixingTimerStreamState
 from controller.algorithms.algorithm_manager_class.abc_class.state_machine_template import Manager
+from controller.algorithms.algorithm_manager_class.worker_pool.analysis_pool import AnalysisWorkerPool
 
 class AlgorithmManager(Manager):
 
@@ -18,12 +19,14 @@ class AlgorithmManager(Manager):
         BUBBLE_SIZER_STATE_SINGLE = 3
         
         MIXING_TIMER_STATE = 5
+        MIXING_TIMER_STREAM_STATE = 6
     
     state_classes = {
         States.PELLET_SIZER_SINGLE_STATE: PelletSizerSingleState,
         States.BUBBLE_SIZER_STATE: BubbleSizerState,
         States.BUBBLE_SIZER_STATE_SINGLE: BubbleSizerSingleState,
-        States.MIXING_TIMER_STATE: MixingTimerState
+        States.MIXING_TIMER_STATE: MixingTimerState,
+        States.MIXING_TIMER_STREAM_STATE: MixingTimerStreamState
         # Add more states here
     }
 
@@ -44,8 +47,16 @@ class AlgorithmManager(Manager):
         # Trying ThreadPoolExecutor
         self.executor._max_workers = 5
         
+        # Long lived process pool for the image analyzers, started once per measurement by the states
+        self.worker_pool = AnalysisWorkerPool()
+        
         self.logger.info("Algorithm Manager initialized and ready for work.")
 
+    def shutdown(self):
+        
+        super().shutdown()
+        self.worker_pool.shutdown(wait=False)
+
     @classmethod
     def get_instance(cls):
         return cls._instance
\ No newline at end of file
@@ -1,16 +1,20 @@
 
+import collections
 import datetime
 import time
 import os
 import re
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
 
 from model.measurements.mixing_time_datastruct import DataMixingTime
+from model.utils.frames.frame_pipeline import FramePipeline
+from model.utils.frames.overlay import discard_overlay
+from model.utils.frames import roi as roi_utils
 
 from controller.algorithms.mixing_time.mixing_timer import MixingTimer
-from controller.algorithms.pellet_sizer.pellet_sizer import PelletSizer
-from controller.algorithms.bubble_sizer.bubble_sizer import BubbleSizeAnalyzer
 from controller.algorithms.algorithm_manager_class.states.state_baseclass import State
+from controller.algorithms.mixing_time.steps.convergence import ConvergenceDetector
+from controller.algorithms.algorithm_manager_class.worker_pool.analysis_pool import init_bubble_sizer_worker, bubble_size_task, pellet_size_task, single_bubble_size_task, init_mixing_timer_worker, mixing_time_task
 
 class MixingTimerState(State):
     
@@ -32,8 +36,15 @@ class MixingTimerState(State):
         if local_mixing_time is None:
             local_mixing_time = False
         
-        mixing_data = DataMixingTime()
-        mta = MixingTimer(emtpy_calibration_path, filled_calibration_path, local_mixing_time)
+        # The images are stored whole, the capture recorded which region of them to analyze in the image folder
+        roi = roi_utils.load(imagesfolder)
+        
+        # The frame number of the file name is the index, frames the image writer dropped stay empty (NaN) instead of shifting the series
+        indices = [self.extract_number(os.path.basename(file)) for file in images]
+        self.log_missing_frames(indices)
+        
+        mixing_data = DataMixingTime(max(indices, default=-1) + 1)
+        mta = MixingTimer(emtpy_calibration_path, filled_calibration_path, local_mixing_time, roi)
         
         futures = []
         results = []
@@ -49,7 +60,7 @@ class MixingTimerState(State):
                 result = future.result()
                 results.append(result)
              
-        for i, result in enumerate(results):
+        for i, result in zip(indices, results):
             
             if not local_mixing_time:
                 g_variance, g_entropy = result
@@ -61,20 +72,35 @@ class MixingTimerState(State):
                 mixing_data.add_global_results(i, g_entropy, g_variance)
                 mixing_data.add_tile(i, tile_data)
 
+                # The tile grid is (rows, columns) = (n_tiles_y, n_tiles_x)
                 x, y = tilenumbers
                 if x > x_old or y > y_old:
                     x_old, y_old = x, y
-                    mixing_data.add_local_metadata(tile_size, x, y)
+                    mixing_data.add_local_metadata(tile_size, y, x)
 
+        self.save_results(mixing_data)
         self.data.add_data(self.data.Keys.MIXING_TIME_RESULT_STRUCT, mixing_data, self.data.Namespaces.MIXING_TIME)
         
         reference = self.data.get_data(self.data.Keys.CURRENT_MIXINGTIME_WIDGET, self.data.Namespaces.MIXING_TIME)
         if reference is not None:
             reference.results_done.emit()
+    
+    def save_results(self, mixing_data: DataMixingTime) -> None:
+        """Persists the results into the Data folder of the mixing time measurement."""
+        
+        dirpath = self.data.get_data(self.data.Keys.CURRENT_MIXINGTIME_FOLDER_DATA, self.data.Namespaces.MIXING_TIME)
+        if not dirpath:
+            return
+        
+        try:
+            mixing_data.save(dirpath)
+        except Exception as e:
+            self.logger.error(f"Could not save the mixing time results: {e}.")
                
     def prepare_images(self, dirpath : str) -> list:
         
-        images = os.listdir(dirpath)
+        # The region of interest file of the capture is no image
+        images = [image for image in os.listdir(dirpath) if image != roi_utils.ROI_FILE]
         # Sorting the images numerically ascending
         
         sorted_files = sorted(images, key=self.extract_number)
@@ -82,12 +108,179 @@ class MixingTimerState(State):
         
         return sorted_files
 
+    def log_missing_frames(self, indices: list) -> None:
+        """Warns about gaps in the frame numbers, the image writer drops frames when the disk cannot keep up."""
+        
+        if not indices:
+            return
+        
+        missing = max(indices) + 1 - len(set(indices))
+        if missing > 0:
+            self.logger.warning(f"{missing} of {max(indices) + 1} mixing time frames are missing on disk, they are left out of the series.")
+    
     def extract_number(self, filename) -> int:
         match = re.search(r'(\d+)', filename)  # Extract number using regex
         return int(match.group(0)) if match else 0  # Convert to int for sorting
 
+class MixingTimerStreamState(MixingTimerState):
+    """The mixing time while capturing: every frame of the MTImagecaptureState comes through the mixing time frame channel, is analyzed in the 
+    worker pool and accumulates in the DataMixingTime. The mixing time is detected online on the global variance and the results are published the moment it converged."""
+    
+    # How many frames are handed to the worker pool at once, the rest waits in the frame channel
+    max_in_flight : int = 10
+    
+    def run_logic(self):
+        
+        self.pool = None
+        self.mixing_data = None
+        channel = self.data.get_data(self.data.Keys.CURRENT_MIXINGTIME_CHANNEL, self.data.Namespaces.MIXING_TIME)
+        
+        try:
+            emtpy_calibration_path = self.data.get_data(self.data.Keys.EMPTY_CALIBRATION_IMAGE_PATH, self.data.Namespaces.MIXING_TIME)
+            filled_calibration_path = self.data.get_data(self.data.Keys.FILLED_CALIBRATION_IMAGE_PATH, self.data.Namespaces.MIXING_TIME)
+            
+            if not channel or not emtpy_calibration_path or not filled_calibration_path or not os.path.exists(emtpy_calibration_path) or not os.path.exists(filled_calibration_path):
+                self.logger.error("Non-existing resource for the streaming Mixing Time Calculator.")
+                return
+            
+            local_mixing_time = self.data.get_data(self.data.Keys.LOCAL_MIXING_TIME_CALC, self.data.Namespaces.MIXING_TIME)
+            roi = self.data.get_data(self.data.Keys.CAMERA_FRAME_ROI, self.data.Namespaces.CAMERA)
+            
+            self.pipeline = FramePipeline()
+            if not self.pipeline.has_channel(channel):
+                self.pipeline.open_channel(channel)
+            
+            # Every worker builds the calibration mask once, the pool refuses if another state still analyzes with it
+            pool = self.instance.worker_pool
+            pool.start(init_mixing_timer_worker, (emtpy_calibration_path, filled_calibration_path, bool(local_mixing_time), roi))
+            pool.acquire()
+            self.pool = pool
+            
+            # Roughly ten frames per second of capture, the arrays grow if there are more
+            self.mixing_data = DataMixingTime(int((self.runtime_target - datetime.datetime.now()).total_seconds() * 10))
+            self.detector = ConvergenceDetector()
+            self.local_mixing_time = bool(local_mixing_time)
+            
+            # Frame index per future and the indices in capture order, the detector needs the series in order
+            self.pending = {}
+            self.order = collections.deque()
+            self.finished = {}
+            
+            while True:
+                
+                while len(self.pending) < self.max_in_flight:
+                    frame = self.pipeline.get(channel, timeout=0 if self.pending else 0.5)
+                    
+                    if frame is None:
+                        break
+                    
+                    index = self.extract_number(frame.name)
+                    
+                    try:
+                        self.pending[self.pool.submit(mixing_time_task, frame)] = index
+                        self.order.append(index)
+                    except Exception as e:
+                        self.logger.error(f"Error in executing Mixing Timer: {e}")
+                
+                self.collect(timeout=0.05)
+                
+                # After the capture ended (or the state got stopped) the frames left in the channel are still analyzed, the series stays complete
+                finished = self.terminated or datetime.datetime.now() >= self.runtime_target
+                
+                if finished and not self.pending and self.pipeline.depth(channel) == 0:
+                    break
+            
+            self.collect(timeout=None)
+            
+            if not self.detector.converged:
+                self.logger.warning("Mixing time did not converge within the measurement.")
+                
+        except Exception as e:
+            self.logger.warning(f"Error in resolving streaming Mixing Timer: {e}.")
+            
+        finally:
+            # The final results, with the frames after the convergence (or all of them without one), replace the published ones
+            if self.mixing_data is not None:
+                try:
+                    self.publish()
+                    self.save_results(self.mixing_data)
+                except Exception as e:
+                    self.logger.error(f"Could not publish the final mixing time results: {e}.")
+            
+            if channel:
+                # Only left after an error, the published series misses these frames
+                discarded = FramePipeline().depth(channel)
+                if discarded:
+                    self.logger.warning(f"{discarded} frames of the mixing time channel were not analyzed and are discarded.")
+                
+                FramePipeline().close_channel(channel)
+            
+            # The MixingTimeRunner waits for this before it shuts the pool down
+            if self.pool is not None:
+                self.pool.release()
+    
+    def collect(self, timeout: float | None) -> None:
+        """Stores finished frames and feeds the detector in capture order.
+
+        Args:
+            timeout (float | None): maximum seconds to wait for a result, None waits for all pending frames
+        """
+        if self.pending:
+            done, _ = wait(self.pending, timeout=timeout, return_when=FIRST_COMPLETED if timeout is not None else ALL_COMPLETED)
+            
+            for future in done:
+                index = self.pending.pop(future)
+                
+                try:
+                    self.finished[index] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error retrieving mixing time result: {e}")
+                    self.finished[index] = None
+        
+        while self.order and self.order[0] in self.finished:
+            index = self.order.popleft()
+            result = self.finished.pop(index)
+            
+            if result is None:
+                continue
+            
+            self.add_result(index, result)
+            
+            if self.detector.update(index, result[0]):
+                self.mixing_data.set_mixing_time(self.detector.start_index, self.detector.mixing_index)
+                self.logger.info(f"Mixing time reached at frame {self.detector.mixing_index} after {self.detector.mixing_frames} frames.")
+                self.publish()
+    
+    def add_result(self, index: int, result: tuple) -> None:
+        
+        if not self.local_mixing_time:
+            g_variance, g_entropy = result
+            self.mixing_data.add_global_results(index, g_entropy, g_variance)
+        
+        else:
+            g_variance, g_entropy, tile_size, tilenumbers, tile_data = result
+            
+            self.mixing_data.add_global_results(index, g_entropy, g_variance)
+            self.mixing_data.add_tile(index, tile_data)
+            
+            if self.mixing_data.tile_size is None:
+                x, y = tilenumbers
+                self.mixing_data.add_local_metadata(tile_size, y, x)
+    
+    def publish(self) -> None:
+        """Hands a snapshot of the results so far to the mixing time widget, the frames that still come in only go into the state's own DataMixingTime."""
+        
+        self.data.add_data(self.data.Keys.MIXING_TIME_RESULT_STRUCT, self.mixing_data.snapshot(), self.data.Namespaces.MIXING_TIME)
+        
+        reference = self.data.get_data(self.data.Keys.CURRENT_MIXINGTIME_WIDGET, self.data.Namespaces.MIXING_TIME)
+        if reference is not None:
+            reference.results_done.emit()
+
 class PelletSizerSingleState(State):
     
+    # How often the widget is checked for a cancel while no image finishes
+    CANCEL_POLL_INTERVAL = 0.2
+    
     def run_logic(self):
         
         # Grabbing the reference PelletsizerWidget
@@ -97,31 +290,51 @@ class PelletSizerSingleState(State):
         self.target_paths = self.data.get_data(self.data.Keys.PELLET_SIZER_IMAGES, self.data.Namespaces.DEFAULT)
         self.target_settings = self.data.get_data(self.data.Keys.PELLET_SIZER_IMAGE_SETTINGS, self.data.Namespaces.DEFAULT)
         
-        pelletsizer = PelletSizer()
-
-        reference._progressbar_update(0.2)
+        # The overlays are only rendered if the widget shows them
+        visualization = self.data.get_data(self.data.Keys.PELLET_SIZER_VISUALIZATION, self.data.Namespaces.DEFAULT) is not False
+        
+        # Tiled mode for large images, the strips overlap by the largest expected pellet
+        tiled = bool(self.data.get_data(self.data.Keys.PELLET_SIZER_TILED, self.data.Namespaces.DEFAULT))
+        max_pellet_size = self.data.get_data(self.data.Keys.PELLET_SIZER_MAX_PELLET_SIZE, self.data.Namespaces.DEFAULT)
+        
+        # In the order of the paths, None for failed images
+        results = [None] * len(self.target_paths)
+        cancelled = False
         
-        results = []
         with ProcessPoolExecutor() as executor:
             
-            try:
-                futures = []
-                for i, path in enumerate(self.target_paths):
-                    
-                    futures.append(executor.submit(pelletsizer.processing, path, True, self.target_settings[i]))
+            futures = {executor.submit(pellet_size_task, path, self.target_settings[i], visualization, tiled, max_pellet_size): i for i, path in enumerate(self.target_paths)}
+            pending = set(futures)
+            
+            # Every image is published as soon as it is done, no matter the submission order
+            while pending:
                 
-                reference._progressbar_update(0.5)
+                done, pending = wait(pending, timeout=self.CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
                 
-                for future in futures:
-                    result = future.result()
-
-                    if results is not None:
-                        results.append(result)
-
-                reference._progressbar_update(0.9)
-
-            except Exception as e:
-                self.logger.error(f"Error occured in pellet sizer: {e}.")
+                # The widget may already be torn down, nothing is emitted into it anymore
+                if reference.cancel_event.is_set() or self.terminated:
+                    self.logger.info(f"Pellet sizer cancelled with {len(pending)} images left.")
+                    cancelled = True
+                    for future in pending:
+                        future.cancel()
+                    break
+                
+                for future in done:
+                    i = futures[future]
+                    
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error occured in pellet sizer for {self.target_paths[i]}: {e}.")
+                        
+                    reference.pellet_result_ready.emit(i, results[i])
+        
+        if cancelled:
+            # The images that finished anyway were not handed over, their overlays are never read
+            for future in futures:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    discard_overlay(future.result().get("Image"))
+            return
 
         self.data.add_data(self.data.Keys.PELLET_SIZER_RESULT, results, self.data.Namespaces.DEFAULT)
 
@@ -141,11 +354,9 @@ class BubbleSizerSingleState(State):
         try:
             self.logger.info("Single Image Analysis.")
                         
-            self.sizer = BubbleSizeAnalyzer()
-
             with ProcessPoolExecutor() as excecutor:
                 
-                future = excecutor.submit(self.sizer.process_image, self.target_path, True)
+                future = excecutor.submit(single_bubble_size_task, self.target_path)
 
                 result = future.result() 
                 
@@ -163,14 +374,22 @@ class BubbleSizerSingleState(State):
 
 class BubbleSizerState(State):
     
+    # How many images are handed to the worker pool at once, the rest waits in the frame channel
+    max_in_flight : int = 10
+    # Seconds between throughput reports
+    report_interval : int = 10
+    
     def run_logic(self):
         
+        acquired = False
+        
         try:
-            # This control how much instances run parallel -> max is 10
-            self.instance_counter = 0
-            
-            runcondition = True
             resourcespace = self.data.get_data(self.data.Keys.CURRENT_RESOURCE_SPACE, namespace=self.data.Namespaces.MEASUREMENT)
+            self.pipeline = FramePipeline()
+            
+            # Normally the measurement runner opened the channel with the configured policy already
+            if not self.pipeline.has_channel(resourcespace):
+                self.pipeline.open_channel(resourcespace)
             
             self.instance.measurement_start_event.wait()
             
@@ -179,67 +398,83 @@ class BubbleSizerState(State):
             #     self.logger.error("No calibration image.")
             #     return
             
-            self.sizer = BubbleSizeAnalyzer()
-
-            while runcondition and not self.terminated:
-                runcondition = datetime.datetime.now() < self.runtime_target or not self.stacked_images != self.processed_images
+            # The pool lives for the whole measurement, this is a no-op if it already runs
+            self.pool = self.instance.worker_pool
+            # The denoise mode trades detection quality against keeping up with the capture, NLM if not set
+            denoise_mode = self.data.get_data(self.data.Keys.BUBBLE_SIZER_DENOISE_MODE, self.data.Namespaces.MEASUREMENT)
+            
+            self.pool.start(init_bubble_sizer_worker, (None, denoise_mode))
+            self.pool.acquire()
+            acquired = True
+            
+            self.pending = set()
+            last_report = time.time()
+            
+            while True:
                 
-                self.get_resources(resourcespace)
+                # A frame is only taken from the channel when a worker is free, so a full channel pushes back on the camera
+                while len(self.pending) < self.max_in_flight:
+                    frame = self.pipeline.get(resourcespace, timeout=0 if self.pending else 0.5)
+                    
+                    if frame is None:
+                        break
+                    
+                    try:
+                        self.pending.add(self.pool.submit(bubble_size_task, frame))
+                    except Exception as e:
+                        self.logger.error(f"Error in executing Bubble Sizer: {e}")
                 
-                # The algorithms profit from parallelization alot 
-                if self.img_stack:
-                    if self.instance_counter <= (10 - self.instance_counter):
-                        try:
-                            self.instance_counter += 1
-                            self.batch_size = min(len(self.img_stack), 5)
-                            batch = self.img_stack[:self.batch_size]
-
-                            self.bubble_size(batch)
-                            
-                            # Adding to the processing logic
-                            self.processed_images.update(batch)
-                            self.img_stack = self.img_stack[self.batch_size:]
-
-                        except Exception as e:
-                            self.logger.error(f"Error in executing Bubble Sizer: {e}")                            
-
-                self.logger.info("Running the image analyzer schedule.")
-                time.sleep(1)
+                self.bubble_size(timeout=0.05)
+                
+                if time.time() - last_report >= self.report_interval:
+                    self.report_throughput(resourcespace)
+                    last_report = time.time()
+                
+                # After the capture ended (or the state got stopped with the slot) the frames left in the channel and in the workers are still analyzed
+                finished = self.terminated or datetime.datetime.now() >= self.runtime_target
+                
+                if finished and not self.pending and self.pipeline.depth(resourcespace) == 0:
+                    break
+            
+            self.report_throughput(resourcespace)
             
             # Cleanup
+            self.pipeline.close_channel(resourcespace)
             self.res_man.delete_resource_space(resourcespace)
-            self.img_stack.clear()
-            self.stacked_images.clear()
-            self.processed_images.clear()
             
         except Exception as e:
             self.logger.warning(f"Error in resolving Bubble Sizer: {e}.")
+        
+        finally:
+            # The measurement runner waits for this before it shuts the pool down and closes the result databases
+            if acquired:
+                self.pool.release()
             
-    def bubble_size(self, paths: list) -> None:
+    def bubble_size(self, timeout: float) -> None:
+        """Collects finished analyses from the worker pool and writes them.
 
-        try:
-            self.logger.info("Trying to analyze images.")
-     
-            with ProcessPoolExecutor() as executor:
-                try:# Submit tasks and collect futures
-                    futures = {
-                        executor.submit(self.sizer.process_image, path): path for path in paths
-                    }
-
-                    for future in futures:
+        Args:
+            timeout (float): maximum seconds to wait for a result
+        """
+        if not self.pending:
+            return
+        
+        done, self.pending = wait(self.pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            try:
+                result = future.result()
+                
+                if result is not None:
+                    self.alg_data_writer.bubble_size_writer(result)
+                else:
+                    self.logger.warning("Null future return.")
                     
-                        result = future.result()
-                        
-                        if result is not None:
-                            self.alg_data_writer.bubble_size_writer(result)
-                        else:
-                            self.logger.warning("Null future return.")
-                            
-                except Exception as e:
-                    self.logger.error(f"Error retrieving result: {e}")
-         
-        except Exception as e:
-            self.logger.error(f"Bubble Sizer - Error in resolving parallelization: {e}.")
+            except Exception as e:
+                self.logger.error(f"Error retrieving result: {e}")
+    
+    def report_throughput(self, resourcespace: str) -> None:
         
-        finally:
-            self.instance_counter -= 1
\ No newline at end of file
+        throughput = self.pool.throughput
+        self.data.add_data(self.data.Keys.ANALYSIS_THROUGHPUT, throughput, self.data.Namespaces.MEASUREMENT)
+        self.logger.info(f"Bubble Sizer throughput: {throughput:.2f} images/s ({self.pool.processed} images), frame channel: {self.pipeline.get_stats(resourcespace)}.")
@@ -18,11 +18,6 @@ class State(ABC):
                 
         self.alg_data_writer = DataWriter()
 
-        # This stack contains all images that need to be processed
-        self.img_stack = []
-        self.stacked_images = set()
-        self.processed_images = set()
-            
         self.instance = instance
         self.runtime_target = datetime.datetime.now() + datetime.timedelta(seconds=runtime)
         self.terminated = False
@@ -40,24 +35,5 @@ class State(ABC):
     def run_logic(self):
         pass
 
-    def get_resources(self, resourcespace: str) -> None:
-        """Adds resources from a specified resource space to a img_stack (list).
-
-        Args:
-            resourcespace (str): name of the resourcespace
-        """
-        try:
-            # Using the new Reasource Manager here
-            paths = self.res_man.get_registered_resources(resourcespace, False, True)
-
-            if paths:
-                for path in paths:
-                    if path not in self.stacked_images:
-                        self.img_stack.append(path)
-                        self.stacked_images.add(path)
-
-        except Exception as e:
-            self.logger.warning(f"Error - Algorithm Manger could not check in resource manager: {e}")
-
     def terminate(self):
         self.terminated = True
\ No newline at end of file
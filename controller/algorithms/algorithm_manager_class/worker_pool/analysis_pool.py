@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from model.utils.frames.frame_ring import FrameHandle
+from model.utils.frames.overlay import write_overlay
+from model.utils.frames import roi as roi_utils
+from operator_mod.logger.global_logger import Logger
+
+### Worker process side ###
+# Every worker process holds exactly one analyzer which is built once by the pool initializer
+_worker_sizer = None
+_worker_mixing_timer = None
+
+def init_bubble_sizer_worker(calibpath: str = None, denoise_mode=None) -> None:
+    """Initializer for the worker processes. Imports the bubble sizer pipeline (cv2, scipy) once and keeps the analyzer alive.
+
+    Args:
+        calibpath (str, optional): calibration image used as background. Defaults to None.
+        denoise_mode (BubbleSizeAnalyzer.DenoiseMode, optional): denoising of the calibrated path. Defaults to None -> NLM.
+    """
+    global _worker_sizer
+    
+    from controller.algorithms.bubble_sizer.bubble_sizer import BubbleSizeAnalyzer
+    
+    _worker_sizer = BubbleSizeAnalyzer(calibpath, denoise_mode or BubbleSizeAnalyzer.DenoiseMode.NLM)
+
+def bubble_size_task(item: str | FrameHandle) -> dict:
+    """Top level worker entry point, only the path or the FrameHandle crosses the process boundary.
+
+    Args:
+        item (str | FrameHandle): image path or handle to a frame in shared memory
+    """
+    if not isinstance(item, FrameHandle):
+        # Persisted images are whole, the capture stored their region of interest next to them
+        return _worker_sizer.process_image(item, roi=roi_utils.load(os.path.dirname(item)))
+    
+    frame = item.load()
+    
+    if frame is not None:
+        result = _worker_sizer.process_frame(frame, item.name, roi=item.roi)
+        
+        # The slot could have been overwritten while we were reading it
+        if item.is_valid():
+            return result
+    
+    # The persisted file is the fallback when the frame left the ring
+    if item.path and os.path.exists(item.path):
+        return _worker_sizer.process_image(item.path, roi=item.roi)
+    
+    return None
+
+def init_mixing_timer_worker(empty_calibration: str, full_calibration: str, local_mixing_time: bool = False, roi: tuple = None) -> None:
+    """Initializer for the worker processes of the streaming mixing time. The calibration mask is built once per worker.
+
+    Args:
+        empty_calibration (str): empty reactor calibration image
+        full_calibration (str): filled reactor calibration image
+        local_mixing_time (bool, optional): also computes the tile statistics. Defaults to False.
+        roi (tuple, optional): region of interest (x1, x2, y1, y2). Defaults to None.
+    """
+    global _worker_mixing_timer
+    
+    from controller.algorithms.mixing_time.mixing_timer import MixingTimer
+    
+    _worker_mixing_timer = MixingTimer(empty_calibration, full_calibration, local_mixing_time, roi)
+
+def mixing_time_task(item: str | FrameHandle) -> tuple | None:
+    """Top level worker entry point of the streaming mixing time, see MixingTimer.process_frame for the result.
+
+    Args:
+        item (str | FrameHandle): image path or handle to a frame in shared memory
+    """
+    if not isinstance(item, FrameHandle):
+        return _worker_mixing_timer.process_image(item)
+    
+    frame = item.load()
+    
+    if frame is not None:
+        result = _worker_mixing_timer.process_frame(frame)
+        
+        # The slot could have been overwritten while we were reading it
+        if item.is_valid():
+            return result
+    
+    # The persisted file is the fallback when the frame left the ring
+    if item.path and os.path.exists(item.path):
+        return _worker_mixing_timer.process_image(item.path)
+    
+    return None
+
+def pellet_size_task(path: str, settings: list = None, visualization: bool = True, tiled: bool = False, max_pellet_size: int = None) -> dict:
+    """Top level worker entry point of the pellet sizer, only the path and the settings cross the process boundary.
+
+    Args:
+        path (str): image file
+        settings (list, optional): settings of the image, see Preprocessor. Defaults to None.
+        visualization (bool, optional): render and hand over the overlay. Defaults to True.
+        tiled (bool, optional): process the image in overlapping strips, see TiledProcessor. Defaults to False.
+        max_pellet_size (int, optional): largest expected pellet in pixels, the overlap of the strips. Defaults to TiledProcessor.OVERLAP.
+
+    Returns:
+        dict: "Data" : (N, 3) result rows, "Image" : overlay file path (see overlay.read_overlay) if visualization
+    """
+    from controller.algorithms.pellet_sizer.pellet_sizer import PelletSizer
+    
+    result = PelletSizer().processing(path, visualization, settings, tiled=tiled, max_pellet_size=max_pellet_size)
+    
+    if visualization:
+        result["Image"] = write_overlay(result["Image"])
+    
+    return result
+
+def single_bubble_size_task(path: str, calibpath: str = None) -> tuple | None:
+    """Top level worker entry point of the single image bubble sizer, only the paths cross the process boundary.
+
+    Returns:
+        tuple | None: (result dict with columnar "Data", overlay file path) or None if the analysis failed
+    """
+    from controller.algorithms.bubble_sizer.bubble_sizer import BubbleSizeAnalyzer
+    
+    result = BubbleSizeAnalyzer(calibpath).process_image(path, True)
+    
+    if result is None:
+        return None
+    
+    data, image = result
+    return data, write_overlay(image)
+
+def _warm_up() -> int:
+    return os.getpid()
+
+### Parent process side ###
+class AnalysisWorkerPool:
+    """A long lived process pool owned by the AlgorithmManager. 
+    
+    The pool is started once per measurement, the initializer pre-imports the analysis pipeline in every worker and the pool then takes work continuously until it gets shut down.
+
+    Integration:
+        pool.start(init_bubble_sizer_worker, (calibpath, denoise_mode))
+        pool.acquire() ... pool.release()         -> around a states use, the pool owner waits for it with wait_released
+        future = pool.submit(bubble_size_task, path)
+        pool.throughput -> images per second
+        pool.shutdown()
+    """
+
+    def __init__(self, max_workers: int = None):
+
+        self.logger = Logger("Algorithm Manager").logger
+        
+        # We leave one core for the gui, the camera and the database
+        self.max_workers = max_workers if max_workers else max(1, (os.cpu_count() or 2) - 1)
+        
+        self._executor = None
+        self._initializer = None
+        self._initargs = ()
+        self._lock = threading.Lock()
+        
+        # States that still submit work, shutdown has to wait for them
+        self._users = 0
+        self._released = threading.Condition(self._lock)
+        
+        # Throughput metrics
+        self._processed = 0
+        self._started_at = None
+
+    @property
+    def running(self) -> bool:
+        with self._lock:
+            return self._executor is not None
+
+    def start(self, initializer=None, initargs: tuple = ()) -> None:
+        """Starts the worker processes if they are not running yet. Calling this again with the same initializer is a no-op.
+
+        Args:
+            initializer (callable, optional): top level function that prepares each worker. Defaults to None.
+            initargs (tuple, optional): arguments for the initializer. Defaults to ().
+
+        Raises:
+            RuntimeError: If a different pipeline is asked for while a state still uses the running one.
+        """
+        with self._lock:
+            if self._executor is not None:
+                if self._initializer is initializer and self._initargs == initargs:
+                    return
+                
+                # Restarting would kill the work of the states that acquired the pool
+                if self._users > 0:
+                    raise RuntimeError(f"Analysis worker pool is in use by {self._users} state(s) with another pipeline.")
+                
+                # A different pipeline needs fresh workers
+                self._executor.shutdown(wait=True)
+
+            self._initializer = initializer
+            self._initargs = initargs
+            
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=initializer, initargs=initargs)
+            
+            self._processed = 0
+            self._started_at = None
+            
+            # Spawning the workers now keeps process startup out of the first images latency
+            warm_up = [self._executor.submit(_warm_up) for _ in range(self.max_workers)]
+            for future in warm_up:
+                future.result()
+
+        self.logger.info(f"Analysis worker pool started with {self.max_workers} workers.")
+
+    def submit(self, fn, *args) -> Future:
+        """Submits a top level function to the pool.
+
+        Raises:
+            RuntimeError: If the pool was not started.
+        """
+        with self._lock:
+            if self._executor is None:
+                raise RuntimeError("Analysis worker pool is not running.")
+            
+            if self._started_at is None:
+                self._started_at = time.time()
+            
+            future = self._executor.submit(fn, *args)
+            
+        future.add_done_callback(self._count_processed)
+        
+        return future
+
+    def _count_processed(self, future: Future) -> None:
+        # Only work that actually finished counts into the throughput
+        if future.cancelled() or future.exception() is not None:
+            return
+        
+        with self._lock:
+            self._processed += 1
+
+    def acquire(self) -> None:
+        """Marks the pool as in use by a state, until the matching release."""
+        with self._lock:
+            self._users += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            
+            if self._users == 0:
+                self._released.notify_all()
+
+    def wait_released(self, timeout: float = None) -> bool:
+        """Blocks until no state uses the pool anymore.
+
+        Args:
+            timeout (float, optional): maximum seconds to wait. Defaults to None, waits forever.
+
+        Returns:
+            bool: False if the timeout expired while a state still used the pool
+        """
+        with self._lock:
+            return self._released.wait_for(lambda: self._users == 0, timeout)
+
+    @property
+    def processed(self) -> int:
+        with self._lock:
+            return self._processed
+
+    @property
+    def throughput(self) -> float:
+        """The number of processed images per second since the first submit."""
+        with self._lock:
+            if self._started_at is None:
+                return 0.0
+            
+            elapsed = time.time() - self._started_at
+            return self._processed / elapsed if elapsed > 0 else 0.0
+
+    def shutdown(self, wait: bool = True) -> None:
+        
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            self._initializer = None
+            self._initargs = ()
+            
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+            self.logger.info("Analysis worker pool shut down.")
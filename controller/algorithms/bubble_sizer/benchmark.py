@@ -0,0 +1,190 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+from scipy.spatial import cKDTree
+
+from controller.algorithms.bubble_sizer.bubble_sizer import BubbleSizeAnalyzer
+from controller.algorithms.bubble_sizer.steps.preprocessor import calibration_background
+from controller.algorithms.bubble_sizer.steps.processor import ImageProcessor
+from model.utils.frames.image_writer import read_image
+
+def synthetic_swarm(count: int, radius: int = 12, seed: int = 0) -> tuple:
+    """Draws count non touching bubbles on a jittered grid.
+
+    Returns:
+        (img, center_points, outer_contours): binary image, (N, 2) bubble centers and their outer contours
+    """
+    rng = np.random.default_rng(seed)
+
+    spacing = 3 * radius
+    cols = int(np.ceil(np.sqrt(count)))
+    rows = int(np.ceil(count / cols))
+
+    img = np.zeros((rows * spacing, cols * spacing), dtype=np.uint8)
+
+    grid = np.indices((rows, cols)).reshape(2, -1).T[:count]
+    jitter = rng.integers(-radius // 3, radius // 3 + 1, size=(count, 2))
+    centers = grid[:, ::-1] * spacing + spacing // 2 + jitter
+
+    for cx, cy in centers:
+        cv2.circle(img, (int(cx), int(cy)), radius, 255, -1)
+
+    contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+
+    return img, centers, list(contours)
+
+def legacy_adaptive_radius(center_points: np.ndarray, outer_contours: list, radius: int = 25) -> np.ndarray:
+    """The former per center pointPolygonTest scan over all contours, kept as the reference."""
+    radii = np.empty(len(center_points))
+    for i, (cx, cy) in enumerate(center_points):
+        shortest_distance = float('inf')
+        for contour in outer_contours:
+            distance = abs(cv2.pointPolygonTest(contour, (int(cx), int(cy)), True))
+            if distance < shortest_distance:
+                shortest_distance = distance
+        radii[i] = shortest_distance if shortest_distance > 0 else radius
+    return radii
+
+def synthetic_overlapping_bubbles(shape: tuple = (1000, 1000), count: int = 80, seed: int = 0) -> np.ndarray:
+    """Draws count overlapping elliptic bubble outlines like the binarized camera frames, clusters of them give the inner contours of circle_fitter_m2."""
+    rng = np.random.default_rng(seed)
+    h, w = shape
+
+    img = np.zeros(shape, dtype=np.uint8)
+    for _ in range(count):
+        center = (int(rng.integers(40, w - 40)), int(rng.integers(40, h - 40)))
+        axes = (int(rng.integers(15, 45)), int(rng.integers(15, 45)))
+        cv2.ellipse(img, center, axes, float(rng.uniform(0, 180)), 0, 360, 255, 4)
+
+    return img
+
+def check_adaptive_radius(images: int = 20) -> float:
+    """Regression check of the adaptive radius of circle_fitter_m2 against the former pointPolygonTest scan.
+    The centers and contours come from the processors own contour and moment steps on overlapping bubble images.
+
+    Returns:
+        float: largest absolute radius difference in pixels, 0 if the fitter keeps the former results
+    """
+    largest = 0.0
+
+    for seed in range(images):
+        processor = ImageProcessor(synthetic_overlapping_bubbles(seed=seed), None)
+
+        inner, outer, _ = processor.find_contours()
+        center_points, add_outer = processor.moment_calculation(inner)
+
+        contours = list(outer) + list(add_outer)
+        if not center_points or not contours:
+            continue
+
+        center_points = np.array(center_points)
+        contour_points = np.vstack([np.array(contour).reshape(-1, 2) for contour in contours])
+
+        radii = processor.contour_distance(np.trunc(center_points), contours, contour_points, cKDTree(contour_points))
+        largest = max(largest, float(np.abs(radii - legacy_adaptive_radius(center_points, contours, 0)).max()))
+
+    return largest
+
+def bench_circle_fitter(counts: tuple = (100, 1000, 5000), legacy_max: int = 1000, repeats: int = 3) -> list:
+    """Times circle_fitter_m2 and, up to legacy_max bubbles, the former radius scan on its own.
+
+    Returns:
+        list: [(count, ellipses found, fitter seconds, legacy radius seconds or None), ...]
+    """
+    results = []
+
+    for count in counts:
+        img, centers, contours = synthetic_swarm(count)
+        processor = ImageProcessor(img, None)
+
+        fitter_time = np.inf
+        for _ in range(repeats):
+            start = time.perf_counter()
+            ellipses = processor.circle_fitter_m2(centers, contours, [])
+            fitter_time = min(fitter_time, time.perf_counter() - start)
+
+        legacy_time = None
+        if count <= legacy_max:
+            start = time.perf_counter()
+            legacy_adaptive_radius(centers, contours)
+            legacy_time = time.perf_counter() - start
+
+        results.append((count, len(ellipses), fitter_time, legacy_time))
+
+    return results
+
+def sauter_diameter(data: dict) -> float:
+    """Sauter mean diameter d32 = sum(d^3) / sum(d^2) of one analyzed image."""
+    d = data["EquivalentDiameter"]
+    return float((d ** 3).sum() / (d ** 2).sum()) if len(d) else np.nan
+
+def bench_denoise(image_paths: list, calibpath: str, modes: tuple = tuple(BubbleSizeAnalyzer.DenoiseMode), reference=BubbleSizeAnalyzer.DenoiseMode.NLM) -> list:
+    """Runs the calibrated pipeline with every denoise mode over a reference image set and compares the detections with the reference mode.
+    The images are loaded beforehand and the calibration background is prepared once per mode, so only the per frame work is timed.
+
+    Args:
+        image_paths (list): reference images
+        calibpath (str): calibration image
+        modes (tuple, optional): modes to compare. Defaults to all.
+        reference (DenoiseMode, optional): mode the others are compared against. Defaults to NLM.
+
+    Returns:
+        list: [(mode, seconds per image, mean bubble count, mean abs count difference, mean relative sauter diameter error), ...]
+    """
+    frames = [(os.path.basename(path), read_image(path, cv2.IMREAD_ANYCOLOR | cv2.IMREAD_ANYDEPTH)) for path in image_paths]
+
+    # Reference first, the others are compared against it
+    modes = [reference] + [mode for mode in modes if mode != reference]
+    outcome = {}
+
+    for mode in modes:
+        calibration_background(calibpath, mode)
+        analyzer = BubbleSizeAnalyzer(calibpath, mode)
+
+        times, counts, sauter = [], [], []
+        for name, frame in frames:
+            start = time.perf_counter()
+            result = analyzer.process_frame(frame, name)
+            times.append(time.perf_counter() - start)
+
+            data = result["Data"] if result is not None else None
+            counts.append(len(data["EquivalentDiameter"]) if data is not None else 0)
+            sauter.append(sauter_diameter(data) if data is not None else np.nan)
+
+        outcome[mode] = (np.array(times), np.array(counts), np.array(sauter))
+
+    _, ref_counts, ref_sauter = outcome[reference]
+    results = []
+    for mode in modes:
+        times, counts, sauter = outcome[mode]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sauter_error = np.nanmean(np.abs(sauter - ref_sauter) / ref_sauter) if np.isfinite(ref_sauter).any() else np.nan
+        results.append((mode, times.mean(), counts.mean(), np.abs(counts - ref_counts).mean(), sauter_error))
+
+    return results
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Bubble sizer benchmarks. Without arguments the circle fitter scaling is measured.")
+    parser.add_argument("--calib", help="calibration image, runs the denoise mode comparison on the given images")
+    parser.add_argument("images", nargs="*", help="reference image set for the denoise mode comparison")
+    parser.add_argument("--check", action="store_true", help="compares the adaptive radius of circle_fitter_m2 with the former scan")
+    args = parser.parse_args()
+
+    if args.check:
+        difference = check_adaptive_radius()
+        print(f"largest adaptive radius difference to the former scan: {difference:.2e} px")
+        if difference > 1e-6:
+            raise SystemExit(1)
+    elif args.calib:
+        print(f"{'mode':>10} {'s/image':>8} {'bubbles':>8} {'count diff':>11} {'d32 error':>10}")
+        for mode, seconds, count, count_diff, sauter_error in bench_denoise(args.images, args.calib):
+            print(f"{mode.name:>10} {seconds:>8.3f} {count:>8.1f} {count_diff:>11.1f} {sauter_error:>10.2%}")
+    else:
+        print(f"{'bubbles':>8} {'ellipses':>9} {'circle_fitter_m2 [s]':>21} {'legacy radius scan [s]':>23}")
+        for count, found, fitter_time, legacy_time in bench_circle_fitter():
+            legacy = f"{legacy_time:.4f}" if legacy_time is not None else "skipped"
+            print(f"{count:>8} {found:>9} {fitter_time:>21.4f} {legacy:>23}")
@@ -1,39 +1,59 @@
 
 import os
+import numpy as np
 
-from controller.algorithms.bubble_sizer.steps.preprocessor import Preprocessor
+from controller.algorithms.bubble_sizer.steps.preprocessor import Preprocessor, DenoiseMode
 from controller.algorithms.bubble_sizer.steps.processor import ImageProcessor
 from controller.algorithms.bubble_sizer.steps.postprocessor import PostProcessor
+from model.utils.frames import roi as roi_utils
 
 class BubbleSizeAnalyzer:
 
-    def __init__(self, calibpath = None) -> None:
+    # Denoising of the calibrated path: NLM, BILATERAL, GAUSSIAN, MEDIAN, DOWNSCALE
+    DenoiseMode = DenoiseMode
+
+    def __init__(self, calibpath = None, denoise_mode: DenoiseMode = DenoiseMode.NLM) -> None:
 
         self.calibpath = calibpath
+        self.denoise_mode = denoise_mode
+
+    def process_image(self, path, visibility: bool = False, roi: tuple = None) -> dict:
+
+        return self.process_frame(path, os.path.basename(path), visibility, roi)
 
-    def process_image(self, path, visibility: bool = False) -> dict:
+    def process_frame(self, image: str | np.ndarray, name: str, visibility: bool = False, roi: tuple = None) -> dict:
+        """Runs the bubble sizer pipeline on an image path or a frame in memory.
 
+        Args:
+            image (str | np.ndarray): path or frame
+            name (str): image name reported with the results
+            visibility (bool, optional): also returns the annotated image (of the region of interest). Defaults to False.
+            roi (tuple, optional): (x1, x2, y1, y2) only this region gets analyzed, the centers are still reported in full frame coordinates. Defaults to None.
+        """
         try:
             
             # Preprocess the image
-            preprocessor = Preprocessor(path, self.calibpath)
+            preprocessor = Preprocessor(image, self.calibpath, self.denoise_mode, roi)
             self.preprocessed_image = preprocessor.preprocess()
 
             if visibility:
                 # process with visibility
-                imageprocessor = ImageProcessor(self.preprocessed_image, path, True)
+                imageprocessor = ImageProcessor(self.preprocessed_image, preprocessor.source, True)
                 result, metadata, image = imageprocessor.img_process()
             else:
                 # Process the image
-                imageprocessor = ImageProcessor(self.preprocessed_image, path)
+                imageprocessor = ImageProcessor(self.preprocessed_image, image)
                 result, metadata = imageprocessor.img_process()
 
             # Extract results and values
             # this turns the ellipsoidal results (if there) into circle results and generates additional information
             postprocessor = PostProcessor(result)
             data = postprocessor.process()
-
-            name = os.path.basename(path)
+            
+            # Back to full frame coordinates
+            col, row = roi_utils.offset(roi)
+            data["CenterX"] += col
+            data["CenterY"] += row
 
             if visibility:
                 return {
@@ -49,4 +69,4 @@ class BubbleSizeAnalyzer:
                 }
 
         except Exception as e:
-            print(e)
\ No newline at end of file
+            print(e)
@@ -1,87 +1,113 @@
 
 import numpy as np
 
+# The standardized result columns, same order as the BubbleSizeResults table
+COLUMNS = ["CenterX", "CenterY", "EquivalentDiameter", "Area", "SurfaceArea", "Volume", "SpecificSurfaceVolume", "SauterDiameter", "Circularity"]
+
+# Column types of the result tables. The centers were always created as INT (from the integer circle centers), the float columns would make them REAL
+COLUMN_TYPES = {"CenterX": "INT", "CenterY": "INT"}
+
+# trusted_result["circles"] rows: [center, area, mradius, circularity]
+CIRCLE_DTYPE = np.dtype([("cx", np.float64), ("cy", np.float64), ("area", np.float64), ("radius", np.float64), ("circularity", np.float64)])
+
+# trusted_result["ellipses"] rows: cv2.fitEllipse output ((cx, cy), (major, minor), angle)
+ELLIPSE_DTYPE = np.dtype([("cx", np.float64), ("cy", np.float64), ("major", np.float64), ("minor", np.float64), ("angle", np.float64)])
+
+def to_circle_array(circles) -> np.ndarray:
+    """Packs [center, area, mradius, circularity] rows into a CIRCLE_DTYPE array."""
+    if isinstance(circles, np.ndarray):
+        return circles
+    return np.array([(c[0][0], c[0][1], c[1], c[2], c[3]) for c in circles], dtype=CIRCLE_DTYPE)
+
+def to_ellipse_array(ellipses) -> np.ndarray:
+    """Packs ((cx, cy), (major, minor), angle) rows into an ELLIPSE_DTYPE array."""
+    if isinstance(ellipses, np.ndarray):
+        return ellipses
+    return np.array([(e[0][0], e[0][1], e[1][0], e[1][1], e[2]) for e in ellipses], dtype=ELLIPSE_DTYPE)
+
+def empty_result() -> dict:
+    return {key: np.empty(0, dtype=np.float64) for key in COLUMNS}
+
+def result_rows(data: dict) -> list:
+    """The columnar result as a list of rows [cx, cy, diameter, ...] for tables and exports."""
+    return list(zip(*(data[key].tolist() for key in COLUMNS)))
+
 class PostProcessor:
 
     def __init__(self, result: dict) -> None:
-        
+
         # The given data
-        
-        self.circles = result["circles"]
+
+        self.circles = to_circle_array(result["circles"])
         # The circles area already precalculated as form of trusted result
         # trusted_result["circles"].append([center, area, mradius, circularity])
-        
-        self.ellipses = result["ellipses"]
+
+        self.ellipses = to_ellipse_array(result["ellipses"])
         # the ellipses area already trusted but need some more calculation to only retrieve circle results
         # trusted_result["ellipses"].append(ellipse)
-        
-        
+
+
         # The return data dict
-        # we want standardized results of form : result = [cx, cy, diameter, area, surface_area, volume, sur_vol, x_sauter, circularity]
-        self.data = []
+        # we want standardized columns: result = {"CenterX": array, "CenterY": array, ...} as in COLUMNS, circles first then ellipses
+        self.data = empty_result()
+
+    def process(self) -> dict:
+
+        circles = self.calculations_circles()
 
-    def process(self):
+        ellipses = self.calculations_ellipses()
 
-        self.calculations_circles()
-        
-        self.calculations_ellipses()
+        self.data = {key: np.concatenate((circles[key], ellipses[key])) for key in COLUMNS}
+
+        # Degenerate bubbles without a size have no sauter diameter
+        valid = self.data["EquivalentDiameter"] > 0
+        if not valid.all():
+            self.data = {key: column[valid] for key, column in self.data.items()}
 
         return self.data
 
-    def calculations_circles(self):
-        
-        for circle in self.circles:
-            try:
-                center, area, mradius, circularity = circle
-                cx, cy = center
+    def _sphere_columns(self, radius: np.ndarray) -> tuple:
+        """Equivalent sphere properties for an array of radii."""
 
-                # Calculations
-                diameter = 2 * mradius
-                surface_area = 4 * np.pi * (mradius ** 2)
-                volume = (4 / 3) * np.pi * (mradius ** 3)
+        surface_area = 4 * np.pi * (radius ** 2)
+        volume = (4 / 3) * np.pi * (radius ** 3)
 
-                # Safeguard against division by zero
-                sur_vol = surface_area / (volume + 1e-8)
+        # Safeguard against division by zero
+        sur_vol = surface_area / (volume + 1e-8)
 
-                # Sauter diameter
-                x_sauter = 6 / sur_vol
+        # Sauter diameter
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_sauter = 6 / sur_vol
 
-                # Append results
-                result = [cx, cy, diameter, area, surface_area, volume, sur_vol, x_sauter, circularity]
-                self.data.append(result)
-            except Exception as e:
-                print(f"Error processing circle {circle}: {e}")
+        return surface_area, volume, sur_vol, x_sauter
 
-    def calculations_ellipses(self):
+    def calculations_circles(self) -> dict:
 
-        # Äquivalenzdurchmesser -> Der Durchmesser den ein Kreis mit gleicher Fläche hätte
+        c = self.circles
+        radius = c["radius"]
+
+        # Calculations
+        diameter = 2 * radius
+        surface_area, volume, sur_vol, x_sauter = self._sphere_columns(radius)
 
-        for ellipse in self.ellipses:
-            try:
-                center, (major, minor), _ = ellipse
-                cx, cy = center
+        return dict(zip(COLUMNS, (c["cx"], c["cy"], diameter, c["area"], surface_area, volume, sur_vol, x_sauter, c["circularity"])))
 
-                # Projected area and equivalent diameter
-                A_proj = np.pi * (major / 2) * (minor / 2)
-                radius = np.sqrt(A_proj / np.pi)
-                D_eq = radius * 2
+    def calculations_ellipses(self) -> dict:
+
+        # Äquivalenzdurchmesser -> Der Durchmesser den ein Kreis mit gleicher Fläche hätte
 
-                # Sphericity
-                sphericity = 0 if major == 0 else minor / major
+        e = self.ellipses
+        major, minor = e["major"], e["minor"]
 
-                # Equivalent sphere properties
-                volume = (4 / 3) * np.pi * (radius ** 3)
-                surface_area = 4 * np.pi * (radius ** 2)
+        # Projected area and equivalent diameter
+        A_proj = np.pi * (major / 2) * (minor / 2)
+        radius = np.sqrt(A_proj / np.pi)
+        D_eq = radius * 2
 
-                # Safeguard against division by zero
-                sur_vol = surface_area / (volume + 1e-8)
+        # Sphericity
+        sphericity = np.divide(minor, major, out=np.zeros_like(minor), where=major != 0)
 
-                # Sauter diameter
-                x_sauter = 6 / sur_vol
+        # Equivalent sphere properties
+        surface_area, volume, sur_vol, x_sauter = self._sphere_columns(radius)
 
-                # Append results
-                result = [cx, cy, D_eq, A_proj, surface_area, volume, sur_vol, x_sauter, sphericity]
-                self.data.append(result)
-                
-            except Exception as e:
-                print(f"Error processing ellipse {ellipse}: {e}")
\ No newline at end of file
+        return dict(zip(COLUMNS, (e["cx"], e["cy"], D_eq, A_proj, surface_area, volume, sur_vol, x_sauter, sphericity)))
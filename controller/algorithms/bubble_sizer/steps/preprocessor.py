@@ -1,30 +1,127 @@
 import cv2
 import os
+import numpy as np
+from enum import Enum
+
+from model.utils.frames.image_writer import read_image
+from model.utils.frames import roi as roi_utils
+
+class DenoiseMode(Enum):
+    """Denoising strategies of the calibrated path, from best quality (NLM) to fastest."""
+    NLM = 0
+    BILATERAL = 1
+    GAUSSIAN = 2
+    MEDIAN = 3
+    DOWNSCALE = 4
+
+def denoise(img: np.ndarray, mode: DenoiseMode = DenoiseMode.NLM) -> np.ndarray:
+    """Denoises a grayscale image with the given strategy.
+
+    Args:
+        img (np.ndarray): grayscale image
+        mode (DenoiseMode, optional): strategy. Defaults to DenoiseMode.NLM.
+
+    Returns:
+        np.ndarray: denoised image of the same size
+    """
+    if mode == DenoiseMode.NLM:
+        return cv2.fastNlMeansDenoising(img, None, 10, 7, 21)
+
+    elif mode == DenoiseMode.BILATERAL:
+        return cv2.bilateralFilter(img, 9, 50, 7)
+
+    elif mode == DenoiseMode.GAUSSIAN:
+        return cv2.GaussianBlur(img, (5, 5), 0)
+
+    elif mode == DenoiseMode.MEDIAN:
+        return cv2.medianBlur(img, 5)
+
+    elif mode == DenoiseMode.DOWNSCALE:
+        # NLM on a quarter of the pixels, the search window shrinks with the image
+        h, w = img.shape[:2]
+        small = cv2.resize(img, (w // 2, h // 2), interpolation=cv2.INTER_AREA)
+        small = cv2.fastNlMeansDenoising(small, None, 10, 7, 11)
+        return cv2.resize(small, (w, h), interpolation=cv2.INTER_LINEAR)
+
+    raise ValueError(f"Unknown denoise mode {mode}.")
+
+# The grayscale, denoised calibration background per path and mode, once per (worker) process: (path, mode) -> ((mtime, size), background)
+_calibration_cache = {}
+
+def calibration_background(path: str, mode: DenoiseMode = DenoiseMode.NLM) -> np.ndarray | None:
+    """Returns the preprocessed calibration background of the path. It is only computed again when the file changes.
+
+    Args:
+        path (str): calibration image path
+        mode (DenoiseMode, optional): denoising strategy. Defaults to DenoiseMode.NLM.
+
+    Returns:
+        np.ndarray | None: read only grayscale, denoised background or None if the file is missing or unreadable
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        _calibration_cache.pop((path, mode), None)
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _calibration_cache.get((path, mode))
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    calibimg = cv2.imread(path, cv2.IMREAD_ANYCOLOR | cv2.IMREAD_ANYDEPTH)
+    if calibimg is None:
+        return None
+
+    background = cv2.cvtColor(calibimg, cv2.COLOR_RGB2GRAY)
+    background = denoise(background, mode)
+
+    # Shared by every frame of the slot, nobody may write into it
+    background.setflags(write=False)
+    _calibration_cache[(path, mode)] = (key, background)
+
+    return background
 
 class Preprocessor:
     """Preprocesses a given image for the Bubble Sizer Pipeline. Returns a img (MatLike) for further processing."""
 
-    def __init__(self, path, calibpath = None) -> None:
-        
-        self.imgpath = path
+    DenoiseMode = DenoiseMode
 
+    def __init__(self, image: str | np.ndarray, calibpath = None, denoise_mode: DenoiseMode = DenoiseMode.NLM, roi: tuple = None) -> None:
+        
         self.calibpath = calibpath
+        self.denoise_mode = denoise_mode
+        self.roi = roi
 
-        if os.path.exists(self.imgpath):
-            self.img = cv2.imread(self.imgpath, cv2.IMREAD_ANYCOLOR | cv2.IMREAD_ANYDEPTH)
+        # Frames from the camera come in memory, single images from disk
+        if isinstance(image, np.ndarray):
+            self.imgpath = None
+            self.img = image
+        
+        elif os.path.exists(image):
+            self.imgpath = image
+            self.img = read_image(self.imgpath, cv2.IMREAD_ANYCOLOR | cv2.IMREAD_ANYDEPTH)
         
         else:
             return
         
-        if self.calibpath is not None:
-            if os.path.exists(self.calibpath):
-                self.calibimg = cv2.imread(self.calibpath, cv2.IMREAD_ANYCOLOR | cv2.IMREAD_ANYDEPTH)
+        # Only the region of interest is processed, the source stays untouched for the visualization
+        self.img = roi_utils.crop(self.img, roi)
+        self.source = self.img
+        
+        # Already grayscale and denoised, see calibration_background
+        self.calibimg = calibration_background(self.calibpath, self.denoise_mode) if self.calibpath is not None else None
+        if self.calibimg is not None:
+            self.calibimg = roi_utils.crop(self.calibimg, roi)
 
     def preprocess(self) -> cv2.Mat:
 
         # If we have a calibration image we take it as background substract else we do it normally
         if self.calibpath is not None:
 
+            if self.calibimg is None:
+                raise FileNotFoundError(f"Calibration image {self.calibpath} is missing or unreadable.")
+
             # Step 1: Convert to grayscale
             self.calib_converter()
             
@@ -58,14 +155,12 @@ class Preprocessor:
 
     ### This is for having a calibration image
     def calib_converter(self) -> None:
-        """Determines colorspace and converts accordingly."""
+        """Determines colorspace and converts accordingly. The calibration background comes converted from the cache."""
         self.img = cv2.cvtColor(self.img, cv2.COLOR_RGB2GRAY)
-        self.calibimg = cv2.cvtColor(self.calibimg, cv2.COLOR_RGB2GRAY)
 
     def calib_enhance(self) -> None:
-        """Does basic image enhancement."""
-        self.img = cv2.fastNlMeansDenoising(self.img, None, 10, 7, 21)        
-        self.calibimg = cv2.fastNlMeansDenoising(self.calibimg, None, 10, 7, 21)
+        """Does basic image enhancement. The calibration background comes denoised from the cache."""
+        self.img = denoise(self.img, self.denoise_mode)
 
     def calib_calibrate(self) -> None:
 
@@ -6,16 +6,26 @@ import numpy as np
 
 from scipy.spatial import cKDTree
 
+from model.utils.frames.image_writer import read_image
+from controller.algorithms.bubble_sizer.steps.postprocessor import to_circle_array, to_ellipse_array
+
 class ImageProcessor:
     
-    def __init__(self, img: cv2.Mat, path, visualizer: bool = False) -> None:
+    def __init__(self, img: cv2.Mat, source: str | np.ndarray, visualizer: bool = False) -> None:
         
         self.img = img
 
+        # Reused mask buffer for the ellipse overlap scoring
+        self._mask_scratch = np.empty((0, 0), dtype=np.uint8)
+
         self.visability = visualizer
         
         if visualizer is True:
-            self.visimg = cv2.imread(path, cv2.IMREAD_ANYCOLOR+cv2.IMREAD_ANYDEPTH)
+            # The source is either the image path or the original frame
+            if isinstance(source, np.ndarray):
+                self.visimg = source.copy()
+            else:
+                self.visimg = read_image(source, cv2.IMREAD_ANYCOLOR+cv2.IMREAD_ANYDEPTH)
 
     def img_process(self) -> list:
         
@@ -48,39 +58,38 @@ class ImageProcessor:
 
         # Retrieve contours and hierarchy from the image
         tree_contours, hierarchy = cv2.findContours(self.img, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)
-        
-        # Flatten the hierarchy array for easier indexing
+
+        if hierarchy is None:
+            return [], [], []
+
+        # Flatten the hierarchy array for easier indexing -> columns next, previous, first child, parent
         hierarchy = hierarchy[0]
+        next_sibling, first_child, parent = hierarchy[:, 0], hierarchy[:, 2], hierarchy[:, 3]
+        index = np.arange(len(hierarchy))
 
-        # Initialize lists to store inner and outer contours
-        inner_contours = []
-        outer_contours = []
-        
-        isolated_bubble_contours = []
-
-        processed_indices = set()
-
-        for i, contour in enumerate(tree_contours):
-            if i in processed_indices:
-                continue  # Skip already processed contours
-
-            # Check if this is an outer contour (no parent)
-            if hierarchy[i][3] == -1:
-                # Check if it has exactly one child
-                child_idx = hierarchy[i][2]
-                if child_idx != -1 and hierarchy[child_idx][0] == -1:
-                    # Isolated bubble: Append only the outer contour
-                    if len(contour) > 15:
-                        isolated_bubble_contours.append(contour)
-                        processed_indices.add(child_idx)  # Mark child as processed
-                else:
-                    # Append to outer contours (overlapping bubbles or others)
-                    if len(contour) > 15:
-                        outer_contours.append(contour)
-            else:
-                # Append to inner contours (if size > threshold)
-                if len(contour) > 15:
-                    inner_contours.append(contour)
+        # Only contours with more than 15 points are kept
+        long_enough = np.fromiter((len(contour) for contour in tree_contours), dtype=np.intp, count=len(tree_contours)) > 15
+
+        # Outer contours have no parent, isolated bubbles are outer contours with exactly one child
+        outer = parent == -1
+        has_child = first_child != -1
+        single_child = has_child & (next_sibling[np.where(has_child, first_child, 0)] == -1)
+
+        isolated_mask = outer & single_child & long_enough
+        outer_mask = outer & ~single_child & long_enough
+
+        # The child of an isolated bubble is not an inner contour; like the former in order walk this only
+        # applies to children that come after their parent
+        children = first_child[isolated_mask]
+        processed = np.zeros(len(hierarchy), dtype=bool)
+        processed[children[children > index[isolated_mask]]] = True
+
+        inner_mask = ~outer & ~processed & long_enough
+
+        # Materialize only the survivors
+        inner_contours = [tree_contours[i] for i in np.flatnonzero(inner_mask)]
+        outer_contours = [tree_contours[i] for i in np.flatnonzero(outer_mask)]
+        isolated_bubble_contours = [tree_contours[i] for i in np.flatnonzero(isolated_mask)]
 
         return inner_contours, outer_contours, isolated_bubble_contours
 
@@ -203,32 +212,25 @@ class ImageProcessor:
             raise ValueError("center_points must be of shape (N, 2) where N is the number of center points.")
 
         # Tree
-        for cont in inouter:
-            outer_contours.append(cont)
+        outer_contours = list(outer_contours) + list(inouter)
+        if not outer_contours:
+            return results
         
         # A tree for all contuor points
         all_contour_points = np.vstack([np.array(ocont).reshape(-1, 2) for ocont in outer_contours])
         tree = cKDTree(all_contour_points)
         
+        # The shortest distance from each (truncated) center point to any contour edge as the adaptive radius, batched over all centers
+        shortest_distance = self.contour_distance(np.trunc(center_points), outer_contours, all_contour_points, tree)
+        adaptive_radius = np.where(shortest_distance > 0, shortest_distance, radius)
+        
+        # Generate points around all centerpoints and find their nearest neighbors at once -> (N, accuracy, 2)
+        circle_points = center_points[:, None, :] + adaptive_radius[:, None, None] * unit_circle[None, :, :]
+        _, indices = tree.query(circle_points.reshape(-1, 2))
+        rcontours = all_contour_points[indices].reshape(len(center_points), accuracy, 2)
+        
         # Here we actually reconstruct the ellipses
-        for centerpoint in center_points:
-            # Calculate the shortest distance from the center point to the contour
-            cx, cy = centerpoint
-            shortest_distance = float('inf')
-            for contour in outer_contours:
-                distance = abs(cv2.pointPolygonTest(contour, (int(cx), int(cy)), True))
-                if distance < shortest_distance:
-                    shortest_distance = distance
-    
-            # The shortest distance as the radius
-            adaptive_radius = shortest_distance if shortest_distance > 0 else radius
-            
-            # Generate points around the centerpoint
-            circle_points = centerpoint + adaptive_radius * unit_circle
-
-            # Find nearest neighbors efficiently
-            _, indices = tree.query(circle_points)
-            rcontour = all_contour_points[indices]
+        for rcontour in rcontours:
 
             if len(rcontour) > 5:  # Ensure enough points for fitting
                 ellipse = cv2.fitEllipse(rcontour)
@@ -256,6 +258,54 @@ class ImageProcessor:
 
         return results
 
+    @staticmethod
+    def contour_distance(points: np.ndarray, contours: list, contour_points: np.ndarray, tree: cKDTree) -> np.ndarray:
+        """Distance of every point to the nearest edge of any closed contour, the same as abs(cv2.pointPolygonTest(contour, point, True)) minimized over the contours.
+
+        The nearest contour point from the tree is only an upper bound, the nearest edge has an end point within half the longest edge of it.
+        So only the edges at the contour points within that range are measured exactly.
+
+        Args:
+            points (np.ndarray): (N, 2) query points
+            contours (list): the contours, stacked in this order in contour_points
+            contour_points (np.ndarray): (P, 2) all contour points
+            tree (cKDTree): tree over contour_points
+
+        Returns:
+            np.ndarray: (N,) distances
+        """
+        # Next point along the closed contour for every stacked contour point
+        lengths = np.fromiter((len(contour) for contour in contours), dtype=np.intp, count=len(contours))
+        starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        following = np.arange(len(contour_points)) - starts + 1
+        following = starts + following % np.repeat(lengths, lengths)
+        preceding = np.empty_like(following)
+        preceding[following] = np.arange(len(contour_points))
+
+        contour_points = contour_points.astype(np.float64)
+        longest_edge = np.sqrt(((contour_points[following] - contour_points) ** 2).sum(axis=1).max())
+
+        upper_bound, _ = tree.query(points)
+        candidates = tree.query_ball_point(points, upper_bound + longest_edge / 2 + 1e-9)
+
+        counts = np.fromiter((len(c) for c in candidates), dtype=np.intp, count=len(candidates))
+        owner = np.repeat(np.arange(len(points)), counts)
+        vertex = np.concatenate(candidates).astype(np.intp)
+        query = points[owner].astype(np.float64)
+
+        def edge_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            ab = b - a
+            length = (ab ** 2).sum(axis=1)
+            t = np.clip(((query - a) * ab).sum(axis=1) / np.where(length > 0, length, 1), 0, 1)
+            return np.hypot(*(query - a - t[:, None] * ab).T)
+
+        # Both edges at every candidate point
+        distance = np.minimum(edge_distance(contour_points[vertex], contour_points[following[vertex]]),
+                              edge_distance(contour_points[preceding[vertex]], contour_points[vertex]))
+
+        # The nearest contour point is always a candidate, so every point has at least one
+        return np.minimum.reduceat(distance, np.cumsum(counts) - counts)
+
     def evaluater(self, iresult: list, rresult: list = None) -> list:
         """We check each detected bubble again for errors, evaluate how 'good' the results are and then create metadata trustscore.
 
@@ -303,15 +353,8 @@ class ImageProcessor:
                 # Circularity
                 circularity = (4 * np.pi * area) / (perimeter ** 2)
 
-                # Create an empty mask for the ellipse
-                mask = np.zeros((h, w), dtype=np.uint8)
-
-                # Draw the ellipse onto the mask
-                cv2.ellipse(mask, (tuple(map(int, center)), (int(major), int(minor)), angle), 255, thickness=-1)
-
                 # Compute overlap with the white area of the input binary image
-                overlap = cv2.bitwise_and(self.img, mask)
-                overlap_area = np.sum(overlap == 255)
+                overlap_area = self._overlap_area(center, major, minor, angle, h, w)
 
                 overlapscore = area/overlap_area if overlap_area > 0 else np.inf
                 metad = [perimeter, overlapscore]
@@ -320,9 +363,44 @@ class ImageProcessor:
                     trusted_result["ellipses"].append(result)
                     metadata["ellipses"].append(metad)
             
+        # Structured arrays for the vectorized post processing
+        trusted_result["circles"] = to_circle_array(trusted_result["circles"])
+        trusted_result["ellipses"] = to_ellipse_array(trusted_result["ellipses"])
         
         return trusted_result, metadata
 
+    def _overlap_area(self, center: tuple, major: float, minor: float, angle: float, h: int, w: int) -> int:
+        """Counts the white pixels of the binary image inside the filled ellipse. Only the bounding box of the ellipse is drawn
+        and compared, the mask lives in a scratch buffer reused across ellipses.
+
+        Returns:
+            int: overlapping pixels, the same count as a full frame mask would give
+        """
+        cx, cy = map(int, center)
+        size = (int(major), int(minor))
+
+        # The circumscribed circle of the rotated box plus a margin for the rasterization bounds the ellipse
+        reach = int(np.ceil(0.5 * np.hypot(*size))) + 2
+        x0, x1 = max(cx - reach, 0), min(cx + reach + 1, w)
+        y0, y1 = max(cy - reach, 0), min(cy + reach + 1, h)
+        if x0 >= x1 or y0 >= y1:
+            return 0
+
+        # Grow the scratch buffer only when a larger box shows up
+        scratch = self._mask_scratch
+        if scratch.shape[0] < y1 - y0 or scratch.shape[1] < x1 - x0:
+            scratch = np.empty((max(y1 - y0, scratch.shape[0]), max(x1 - x0, scratch.shape[1])), dtype=np.uint8)
+            self._mask_scratch = scratch
+
+        mask = scratch[:y1 - y0, :x1 - x0]
+        mask.fill(0)
+
+        # Integer shift of the center, the ellipse rasterizes to the same pixels as in the full frame; clipping at the
+        # frame border stays the same because the box is clipped to the frame
+        cv2.ellipse(mask, ((cx - x0, cy - y0), size, angle), 255, thickness=-1)
+
+        return int(np.count_nonzero(self.img[y0:y1, x0:x1][mask != 0] == 255))
+
 class Visualizer:
           
     def visualize_image(self, img):
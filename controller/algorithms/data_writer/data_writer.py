@@ -1,5 +1,6 @@
 
 from model.utils.SQL.sql_manager import SQLManager
+from controller.algorithms.bubble_sizer.steps.postprocessor import COLUMNS, COLUMN_TYPES
 
 from operator_mod.in_mem_storage.in_memory_data import InMemoryData
 from operator_mod.logger.global_logger import Logger
@@ -24,7 +25,7 @@ class DataWriter:
                 "Data": data,
                 'Metadata': metadata
             }
-                where data is list = [ [cx, cy, diameter, area, surface_area, volume, sur_vol, x_sauter, circularity], ... ]
+                where data is the columnar post processor result = {"CenterX": array, "CenterY": array, ... } see postprocessor.COLUMNS
             
         Return:
             None
@@ -32,24 +33,13 @@ class DataWriter:
         try:            
             result_db = self.data.get_data(self.data.Keys.CURRENT_SLOT_RESULT_DB, namespace=self.data.Namespaces.MEASUREMENT)
 
-            keys = ["CenterX", "CenterY", "EquivalentDiameter", "Area", "SurfaceArea", "Volume", "SpecificSurfaceVolume", "SauterDiameter", "Circularity"]
-            data_dict = {}
+            data = results["Data"]
+            columns = [data[key].tolist() for key in COLUMNS]
 
-            data_dict["Image"] = results["Image"]
-        
-            for ellipse in results["Data"]:
-                
-                if not ellipse:
-                    for i, key in enumerate(keys):
-                        data_dict[key] = "Faulty Data"
-                else:
-                    for i, key in enumerate(keys):
-                        data_dict[key] = ellipse[i]
-
-                table, insert = self.sql.generate_sql_statements("BubbleSizeResults", data_dict)
+            # One row per bubble, all written in one transaction
+            rows = list(zip([results["Image"]] * len(columns[0]), *columns))
 
-                self.sql.read_or_write(result_db, table, "write")
-                self.sql.read_or_write(result_db, insert, "write")
+            self.sql.bulk_write(result_db, "BubbleSizeResults", ["Image", *COLUMNS], rows, COLUMN_TYPES)
                 
         except Exception as e:
             self.logger.warning(f"Error - Could not write bubble sizer results: {e}.")
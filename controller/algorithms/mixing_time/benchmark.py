@@ -0,0 +1,92 @@
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from scipy.stats import entropy
+
+from controller.algorithms.mixing_time.mixing_timer import MixingTimer
+from model.utils.frames.image_writer import read_image
+
+def synthetic_series(directory: str, count: int = 5, shape: tuple = (2160, 3840), seed: int = 0) -> tuple:
+    """Writes calibration images with a round reactor and count noisy frames into directory.
+
+    Returns:
+        (empty, full, frames): calibration paths and frame paths
+    """
+    rng = np.random.default_rng(seed)
+    h, w = shape
+
+    empty = np.full((h, w, 3), 40, dtype=np.uint8)
+    full = empty.copy()
+    cv2.circle(full, (w // 2, h // 2), int(min(h, w) * 0.4), (200, 180, 160), -1)
+
+    empty_path = os.path.join(directory, "EmptyCalibration.bmp")
+    full_path = os.path.join(directory, "FilledCalibration.bmp")
+    cv2.imwrite(empty_path, empty)
+    cv2.imwrite(full_path, full)
+
+    frames = []
+    for i in range(count):
+        path = os.path.join(directory, f"MT_Image_{i}.bmp")
+        cv2.imwrite(path, rng.integers(0, 256, (h, w, 3), dtype=np.uint8))
+        frames.append(path)
+
+    return empty_path, full_path, frames
+
+def legacy_process_image(path: str, mask: np.ndarray) -> tuple:
+    """The former global path, kept as the reference: color decode, BGR to RGB, blur of the whole frame and a gathered copy of the masked pixels."""
+    img = read_image(path, cv2.IMREAD_COLOR)
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img = cv2.GaussianBlur(img, (5, 5), 0)
+
+    masked_img = img[mask > 0]
+
+    hist, _ = np.histogram(masked_img, bins=256, range=(0, 256), density=True)
+    return np.var(masked_img), entropy(hist + 1e-9)
+
+def bench_frame(empty: str, full: str, frames: list, repeats: int = 3) -> tuple:
+    """Times the former and the current per frame path of the global mixing time on the same frames.
+
+    Returns:
+        (legacy ms per frame, current ms per frame, largest relative difference of the results)
+    """
+    timer = MixingTimer(empty, full)
+
+    def best(fn) -> tuple:
+        seconds, results = np.inf, None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = [fn(path) for path in frames]
+            seconds = min(seconds, time.perf_counter() - start)
+        return seconds * 1000 / len(frames), np.array(results, dtype=np.float64)
+
+    legacy_ms, legacy = best(lambda path: legacy_process_image(path, timer.mask))
+    current_ms, current = best(timer.process_image)
+
+    difference = np.max(np.abs(current - legacy) / np.maximum(np.abs(legacy), 1e-12))
+
+    return legacy_ms, current_ms, difference
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Mixing time per frame benchmark. Without arguments a synthetic 4K series is used.")
+    parser.add_argument("--empty", help="empty calibration image")
+    parser.add_argument("--full", help="filled calibration image")
+    parser.add_argument("images", nargs="*", help="frames of a mixing time measurement")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        if args.empty and args.full and args.images:
+            empty, full, frames = args.empty, args.full, args.images
+        else:
+            empty, full, frames = synthetic_series(directory)
+
+        legacy_ms, current_ms, difference = bench_frame(empty, full, frames, args.repeats)
+
+    print(f"{'frames':>7} {'before [ms/frame]':>18} {'after [ms/frame]':>17} {'speedup':>8} {'max rel. diff':>14}")
+    print(f"{len(frames):>7} {legacy_ms:>18.1f} {current_ms:>17.1f} {legacy_ms / current_ms:>7.1f}x {difference:>14.2e}")
@@ -4,42 +4,58 @@ import os
 
 from controller.algorithms.mixing_time.steps.preprocessor import Preprocessor
 from controller.algorithms.mixing_time.steps.processor import Processor
+from model.utils.frames.image_writer import read_image
+from model.utils.frames import roi as roi_utils
 
 class MixingTimer:
     
-    def __init__(self, empty_calibration: str, full_calibration: str, local_mixing_time : bool = False):
+    def __init__(self, empty_calibration: str, full_calibration: str, local_mixing_time : bool = False, roi: tuple = None):
 
         self.local_mixing_time = local_mixing_time
         
-        if os.path.exists(empty_calibration) and os.path.exists(full_calibration):
-            self.empty_calibration = cv2.imread(empty_calibration) 
-            self.full_calibration = cv2.imread(full_calibration)
-            
-        else:
-            return
+        # The mask, the tiles and the statistics all live in the region of interest (x1, x2, y1, y2), None is the full frame
+        self.roi = roi
+        
+        if not (empty_calibration and full_calibration and os.path.exists(empty_calibration) and os.path.exists(full_calibration)):
+            raise ValueError(f"Mixing time calibration images missing: {empty_calibration}, {full_calibration}.")
+        
+        self.empty_calibration = roi_utils.crop(cv2.imread(empty_calibration), roi)
+        self.full_calibration = roi_utils.crop(cv2.imread(full_calibration), roi)
 
         ### First the preprocessing of the calibrations
         self.prepro = Preprocessor(self.empty_calibration, self.full_calibration)
         mask = self.prepro.preprocess_calibration()
         
         self.mask = mask
+        
+        # Everything that only depends on the mask is computed once: its bounding box, the compact mask and the tile grid
+        self.processor = Processor(self.mask)
+        self.tiling = self.prepro.tile_grid(self.mask) if self.local_mixing_time else None
 
     def process_image(self, image: str):
 
-        np_image = cv2.imread(image)
-        np_image = cv2.cvtColor(np_image, cv2.COLOR_BGR2RGB)
+        # Grayscale files stay single channel, the pooled statistics are the same as for their color conversion
+        return self.process_frame(read_image(image, cv2.IMREAD_ANYCOLOR))
+
+    def process_frame(self, frame):
+        """Global (and local) variance and entropy of a whole BGR or grayscale frame, from disk or straight from the camera.
+
+        Returns:
+            tuple: (g_variance, g_entropy) or (g_variance, g_entropy, tile_size, tilenumbers, tile_data) for the local mixing time
+        """
+        np_image = roi_utils.crop(frame, self.roi)
         
-        np_image = self.prepro.preprocess_image(np_image)
+        # Only the bounding box of the mask gets blurred. The statistics pool the channels, so their order (BGR or RGB) does not matter
+        region = self.prepro.preprocess_region(np_image, self.processor.bbox)
         
-        processor = Processor(self.mask)
+        processor = self.processor
 
-        tiles = None
         if self.local_mixing_time:
-            # we dynimcally tile the image
-            tiles, tile_size, tilenumbers = self.prepro.dynamic_tiling(np_image, self.mask)            
-            tile_data = processor.process_local(tiles, tilenumbers)
+            # the tiles cover the bounding box of the mask
+            _, tile_size, tilenumbers = self.tiling
+            tile_data = processor.process_local(region, tile_size, tilenumbers)
 
-        g_variance, g_entropy = processor.process(np_image)
+        g_variance, g_entropy = processor.process(region, cropped=True)
         
         ### postprocessing TBD
         # We want to retrieve visualizations directly? Or just data?
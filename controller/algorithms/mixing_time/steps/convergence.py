@@ -0,0 +1,88 @@
+
+import numpy as np
+
+class ConvergenceDetector:
+    """Online detection of the mixing time on a global series (variance or entropy) while the frames come in.
+
+    The first baseline_frames values define the state before the injection. The mixing started once the series leaves the baseline by more than
+    min_excursion (relative to the baseline). It converged once the last two windows of values stay within tolerance of the mean of the last window, measured against the
+    largest deviation from that mean since the start. The mixing time is then the first frame after the series left that band for the last time (t95 for tolerance 0.05).
+
+    Integration:
+        detector = ConvergenceDetector()
+        if detector.update(index, value): -> True once, on convergence
+            detector.start_index, detector.mixing_index
+    """
+
+    def __init__(self, baseline_frames: int = 20, window: int = 20, tolerance: float = 0.05, min_excursion: float = 0.1):
+
+        self.baseline_frames = baseline_frames
+        self.window = window
+        self.tolerance = tolerance
+        self.min_excursion = min_excursion
+
+        self.indices = []
+        self.values = []
+
+        self.baseline = None
+        # Position in the series where the mixing started
+        self._start = None
+
+        self.converged = False
+        self.start_index = None
+        self.mixing_index = None
+
+    def update(self, index: int, value: float) -> bool:
+        """Adds the next value of the series, the values have to come in frame order.
+
+        Args:
+            index (int): frame index
+            value (float): global variance or entropy of the frame
+
+        Returns:
+            bool: True only for the value that completes the convergence
+        """
+        self.indices.append(index)
+        self.values.append(value)
+
+        if self.converged or len(self.values) < self.baseline_frames:
+            return False
+
+        if self.baseline is None:
+            self.baseline = float(np.mean(self.values[:self.baseline_frames]))
+
+        if self._start is None:
+            if abs(value - self.baseline) <= self.min_excursion * abs(self.baseline):
+                return False
+
+            self._start = len(self.values) - 1
+            self.start_index = index
+
+        # Two windows, a still decaying series drifts out of the band of its latest mean
+        if len(self.values) - self._start < 2 * self.window:
+            return False
+
+        series = np.asarray(self.values[self._start:])
+        final = series[-self.window:].mean()
+
+        deviation = np.abs(series - final)
+        band = self.tolerance * deviation.max()
+
+        if (deviation[-2 * self.window:] > band).any():
+            return False
+
+        # Reverse scan for the last value outside of the band
+        outside = np.flatnonzero(deviation > band)
+        first_inside = outside[-1] + 1 if len(outside) else 0
+
+        self.mixing_index = self.indices[self._start + first_inside]
+        self.converged = True
+
+        return True
+
+    @property
+    def mixing_frames(self) -> int | None:
+        """Frames from the start of the mixing to the mixing time, None before the convergence."""
+        if not self.converged:
+            return None
+        return self.mixing_index - self.start_index
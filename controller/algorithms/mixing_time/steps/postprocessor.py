@@ -2,6 +2,9 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from model.measurements.mixing_time_datastruct import DataMixingTime, LocalMixingTimes
+from controller.functions.plotter.hatmap_mixingtime import plot_mixing_time_map, animate_deviation
+
 class Postprocessor:
     
     def __init__(self, visualization: bool = False):
@@ -9,19 +12,37 @@ class Postprocessor:
         self.vis = visualization
     
     # the tile informations are embedded into the dataclass
-    def postprocess(self, global_variance: list, global_entropy: list, local_mixtime_dataclass):
+    def postprocess(self, data: DataMixingTime) -> LocalMixingTimes | None:
         
-        # Step 1: the global mixing times. Each step in the list is one frame!
-        self.global_mixing_time_calc(global_variance, global_entropy)
+        # Step 1: the global mixing times. Each step in the arrays is one frame!
+        if self.vis:
+            self.plot_global_mixing_time(data)
         
         # Step 2: the local mixing time. for each frame, plot the current as heatmap in comparison to the final values.
+        local = data.local_mixing_times()
+        
+        if self.vis and local is not None:
+            self.plot_local_mixing_time(local)
+        
+        return local
+    
+    def plot_local_mixing_time(self, local: LocalMixingTimes):
+        """The heatmap of the local mixing times and the animated deviation of the tiles from their final state."""
+        
+        fig, ax = plt.subplots()
+        fig.colorbar(plot_mixing_time_map(local, ax), ax=ax)
+        
+        # The animation only runs as long as it is referenced
+        _, ani = animate_deviation(local)
+        
+        plt.show()
     
     def plot_global_mixing_time(self, data):
     
         """Plot normalized entropy, variance, and their average over image indices."""
-        image_indices = sorted(data.global_mixing_data.keys())
-        entropies = np.array([data.global_mixing_data[idx]["entropy"] for idx in image_indices])
-        variances = np.array([data.global_mixing_data[idx]["variance"] for idx in image_indices])
+        image_indices = data.frame_indices
+        entropies = data.entropy[image_indices]
+        variances = data.variance[image_indices]
 
         # Normalize to [0, 1]
         entropy_normalized = (entropies - entropies.min()) / (entropies.max() - entropies.min() + 1e-9)  # Add small epsilon to avoid division by zero
@@ -5,10 +5,16 @@ from cv2.typing import MatLike
 
 class Preprocessor:
     
+    # Blur of the frames, its radius is the padding around the bounding box
+    BLUR_KERNEL = (5, 5)
+    
     def __init__(self, empty_calibration: MatLike, full_calibration: MatLike):
         
         self.empty_calibration = cv2.cvtColor(empty_calibration, cv2.COLOR_BGR2RGB) 
         self.full_calibration = cv2.cvtColor(full_calibration, cv2.COLOR_BGR2RGB) 
+        
+        # Blurred bounding box, reused for every frame of the worker
+        self._scratch = None
     
     def preprocess_calibration(self) -> MatLike:
         """Retrieves a mask of changed pixels over two calibration images. Does basic image enhancing.
@@ -34,7 +40,7 @@ class Preprocessor:
     
     def dynamic_tiling(self, image: np.ndarray, mask: np.ndarray, tile_size: int = 32):
         """
-        Dynamically determines tile size and splits the masked region of the image into tiles.
+        Dynamically determines tile size and crops the image to the bounding box of the masked region, which the tiles cover.
         
         Parameters:
             image (np.ndarray): The input image (H, W, C).
@@ -42,25 +48,34 @@ class Preprocessor:
             tile_size (int): Desired tile size (default 32), adjusted dynamically if needed.
 
         Returns:
-            tiles (list): List of tiles (each tile as a CuPy array).
+            region (np.ndarray): The cropped image (view), tiled row major starting at the top left, the last row and column of tiles can be smaller.
+            tile_size (int): Final tile size used.
+            n_tiles (tuple): Number of tiles in (x, y) directions.
+        """
+        bbox, tile_size, n_tiles = self.tile_grid(mask, tile_size)
+        
+        return image[bbox], tile_size, n_tiles
+    
+    def tile_grid(self, mask: np.ndarray, tile_size: int = 32):
+        """
+        The tiling of dynamic_tiling, it only depends on the mask and is the same for every frame.
+        
+        Returns:
+            bbox (tuple): (rows, columns) slices of the bounding box of the masked region
             tile_size (int): Final tile size used.
             n_tiles (tuple): Number of tiles in (x, y) directions.
         """
         # Handle empty mask case
         if not np.any(mask):
-            return [], tile_size, (0, 0)
+            return (slice(0, 0), slice(0, 0)), tile_size, (0, 0)
 
         # Find bounding box of masked region
-        coords = np.argwhere(mask)
-        y_min, x_min = coords.min(axis=0)
-        y_max, x_max = coords.max(axis=0) + 1
-        
-        # Crop image and mask
-        cropped_img = image[y_min:y_max, x_min:x_max]
-        cropped_mask = mask[y_min:y_max, x_min:x_max]
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        bbox = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
 
         # Determine dimensions
-        H, W = cropped_mask.shape
+        H, W = rows[-1] + 1 - rows[0], cols[-1] + 1 - cols[0]
 
         # Adjust tile size based on both H and W, targeting at least 4 tiles
         area = H * W
@@ -70,28 +85,8 @@ class Preprocessor:
         # Calculate number of tiles
         n_tiles_y = max(1, (H + tile_size - 1) // tile_size)  # Ceiling division
         n_tiles_x = max(1, (W + tile_size - 1) // tile_size)
-
-        # Compute tile heights and widths
-        tile_h = [tile_size] * n_tiles_y
-        tile_w = [tile_size] * n_tiles_x
-        
-        if H % tile_size != 0:
-            tile_h[-1] = H - (tile_size * (n_tiles_y - 1))
-        if W % tile_size != 0:
-            tile_w[-1] = W - (tile_size * (n_tiles_x - 1))
-
-        # Split image into tiles
-        tiles = []
-        y_start = 0
-        for h in tile_h:
-            x_start = 0
-            for w in tile_w:
-                tile = cropped_img[y_start:y_start + h, x_start:x_start + w]
-                tiles.append(tile)  # Convert to CuPy array
-                x_start += w
-            y_start += h
         
-        return tiles, tile_size, (n_tiles_x, n_tiles_y)
+        return bbox, tile_size, (int(n_tiles_x), int(n_tiles_y))
 
     def preprocess_image(self, image: str) -> MatLike:
         """Preprocesses an image by applying the mask and converting it to HSV.
@@ -104,4 +99,33 @@ class Preprocessor:
         """
         image = cv2.GaussianBlur(image, (5,5), 0)
     
-        return image
\ No newline at end of file
+        return image
+    
+    def preprocess_region(self, image: np.ndarray, bbox: tuple) -> np.ndarray:
+        """Blurs only the bounding box of the mask, the same pixels as preprocess_image on the whole image would give there.
+
+        The box is padded by the kernel radius so the blur sees the real neighbours, the result lands in a scratch buffer that is reused as long as the frames keep their shape.
+
+        Args:
+            image (np.ndarray): whole image (of the region of interest)
+            bbox (tuple): (rows, columns) slices of the bounding box
+
+        Returns:
+            np.ndarray: the blurred bounding box, only valid until the next call
+        """
+        rows, cols = bbox
+        if rows.stop <= rows.start or cols.stop <= cols.start:
+            return image[bbox]
+        
+        pad_y, pad_x = self.BLUR_KERNEL[1] // 2, self.BLUR_KERNEL[0] // 2
+        r0, r1 = max(rows.start - pad_y, 0), min(rows.stop + pad_y, image.shape[0])
+        c0, c1 = max(cols.start - pad_x, 0), min(cols.stop + pad_x, image.shape[1])
+        
+        padded = image[r0:r1, c0:c1]
+        
+        if self._scratch is None or self._scratch.shape != padded.shape or self._scratch.dtype != padded.dtype:
+            self._scratch = np.empty_like(padded)
+        
+        cv2.GaussianBlur(padded, self.BLUR_KERNEL, 0, dst=self._scratch)
+        
+        return self._scratch[rows.start - r0:rows.stop - r0, cols.start - c0:cols.stop - c0]
@@ -4,65 +4,145 @@ import cv2
 from scipy.stats import entropy
 import numpy as np
 
+# Gray values of 8 bit images
+_LEVELS = np.arange(256, dtype=np.float64)
+
+def tile_labels(height: int, width: int, tile_size: int, n_tiles_x: int) -> np.ndarray:
+    """Row major tile index of every pixel of a (height, width) region."""
+    rows = (np.arange(height, dtype=np.int32) // tile_size) * n_tiles_x
+    cols = np.arange(width, dtype=np.int32) // tile_size
+    return rows[:, None] + cols[None, :]
+
+def histogram_statistics(counts: np.ndarray) -> np.ndarray:
+    """Variance and entropy from 256 bin gray value histograms.
+
+    Args:
+        counts (np.ndarray): (..., 256) pixel counts
+
+    Returns:
+        np.ndarray: (..., 2) [variance, entropy], same values as np.var and entropy(np.histogram(density=True) + 1e-9) on the pixels
+    """
+    counts = counts.astype(np.float64)
+    n = counts.sum(axis=-1, keepdims=True)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = counts / n
+        mean = p @ _LEVELS
+        variance = p @ (_LEVELS ** 2) - mean ** 2
+
+    # Adding small value to avoid log(0)
+    l_entropy = entropy(p + 1e-9, axis=-1)
+    
+    return np.stack((np.maximum(variance, 0), l_entropy), axis=-1)
+
 class Processor:
     
     def __init__(self, mask: MatLike, local: bool = False):
-        
+        """The mask is indexed once here, every frame then only touches the bounding box of the masked pixels.
+
+        Args:
+            mask (MatLike): binary calibration mask or None for the whole image
+            local (bool, optional): Flag for the local mixing time calculations. Defaults to False.
+        """
         self.mask = mask
         self.local = local # Flag for the local mixing time calculations
         
-    def process(self, image: MatLike) -> tuple[list, list]:
+        # Bounding box (rows, columns) of the masked pixels and the mask inside of it, None for the whole image
+        self.bbox = None
+        self.compact_mask = None
+        
+        if mask is not None:
+            rows = np.flatnonzero(mask.any(axis=1))
+            cols = np.flatnonzero(mask.any(axis=0))
+            
+            if len(rows):
+                self.bbox = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+            else:
+                self.bbox = (slice(0, 0), slice(0, 0))
+            
+            self.compact_mask = np.ascontiguousarray(mask[self.bbox] > 0, dtype=np.uint8)
+        
+        # Tile labels of the last region shape, the grid is the same for every frame
+        self._labels_key = None
+        self._labels = None
+        
+    def process(self, image: MatLike, cropped: bool = False) -> tuple[list, list]:
         
         ### Global mixing time
         # We calculate variance and entropy
 
-        g_variance, g_entropy = self.calculate_variance_entropy(image)
+        g_variance, g_entropy = self.calculate_variance_entropy(image, cropped)
 
         return g_variance, g_entropy
     
-    def process_local(self, tiles : list[MatLike], tilenumbers : tuple) -> dict:
+    def process_local(self, region: MatLike, tile_size: int, tilenumbers: tuple) -> np.ndarray:
+        """Variance and entropy of every tile in one pass over the region.
+
+        Every pixel gets the label of its tile, a bincount of label * 256 + value then yields all tile histograms at once. 
+        The variance follows from the histogram moments, so ragged edge tiles need no special handling.
+
+        Args:
+            region (MatLike): cropped image (H, W, C) from Preprocessor.dynamic_tiling
+            tile_size (int): edge length of the tiles
+            tilenumbers (tuple): (n_tiles_x, n_tiles_y)
+
+        Returns:
+            np.ndarray: (n_tiles_y, n_tiles_x, 2) float64, [variance, entropy] per tile
+        """
+        n_tiles_x, n_tiles_y = tilenumbers
+        n_tiles = n_tiles_x * n_tiles_y
         
-        tile_data = {}
+        if n_tiles == 0:
+            return np.empty((0, 0, 2))
         
-        tile_number_x, _ = tilenumbers
+        H, W = region.shape[:2]
+        labels = self.tile_labels(H, W, tile_size, n_tiles_x)
         
-        i = 0
-        j = 0
+        # Histograms (n_tiles, 256), the channels are pooled like np.histogram on the whole tile
+        channels = region.reshape(H, W, -1)
+        counts = np.zeros(n_tiles * 256, dtype=np.int64)
+        for c in range(channels.shape[2]):
+            counts += np.bincount((labels + channels[..., c]).ravel(), minlength=n_tiles * 256)
+        counts = counts.reshape(n_tiles, 256)
         
-        for tile in tiles:
-            
-            l_variance = np.var(tile)
-            
-            # Compute entropy
-            hist, _ = np.histogram(tile, bins=256, range=(0, 256), density=True)
-            l_entropy = entropy(hist + 1e-9)  # Avoid log(0)
-
-            tile_data[(i, j)] = [l_variance, l_entropy]
-            
-            i += 1
-            
-            if i == tile_number_x:
-                j += 1
-                i = 1
-
-        return tile_data
+        return histogram_statistics(counts).reshape(n_tiles_y, n_tiles_x, 2)
     
-    def calculate_variance_entropy(self, img: MatLike):
+    def tile_labels(self, height: int, width: int, tile_size: int, n_tiles_x: int) -> np.ndarray:
+        """Tile labels times 256 of a region, cached for the grid."""
+        key = (height, width, tile_size, n_tiles_x)
+        
+        if key != self._labels_key:
+            self._labels = tile_labels(height, width, tile_size, n_tiles_x) * 256
+            self._labels_key = key
+        
+        return self._labels
+    
+    def calculate_variance_entropy(self, img: MatLike, cropped: bool = False):
         """
-        Calculate variance of pixel values over time.
+        Calculate variance and entropy of the masked pixel values of one frame. 
+        
+        The channel histograms are counted in a single pass over the bounding box of the mask, nothing is gathered, and both statistics follow from them.
+        
+        Args:
+            img (MatLike): whole frame or, if cropped, already its bounding box
+            cropped (bool, optional): img is the bounding box of the mask. Defaults to False.
         
         Returns:
-            List of variance over time, List of entropy over time
+            variance, entropy
         """
-
-        if self.mask is not None:
-            masked_img = img[self.mask > 0]
-        else:
-            masked_img = img
-
-        g_variance = np.var(masked_img)
+        if self.bbox is not None:
+            if not cropped:
+                img = img[self.bbox]
+            
+            if self.compact_mask.size == 0:
+                return np.nan, np.nan
+        
+        # Pooled over the channels like np.histogram on the masked pixels
+        channels = img.shape[2] if img.ndim == 3 else 1
+        counts = np.zeros(256, dtype=np.float64)
+        for c in range(channels):
+            counts += cv2.calcHist([img], [c], self.compact_mask, [256], [0, 256]).ravel()
         
-        hist, _ = np.histogram(masked_img, bins=256, range=(0, 256), density=True)
-        g_entropy = entropy(hist + 1e-9)  # Adding small value to avoid log(0)
+        g_variance, g_entropy = histogram_statistics(counts)
             
         return g_variance, g_entropy
@@ -0,0 +1,87 @@
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from controller.algorithms.algorithm_manager_class.worker_pool.analysis_pool import pellet_size_task
+from controller.algorithms.pellet_sizer.steps.tiling import TiledProcessor
+
+def synthetic_pellets(shape: tuple = (6000, 3000), count: int = 300, large: tuple = (), seed: int = 0) -> np.ndarray:
+    """Draws count dark pellets on a bright background like the pellet camera images.
+
+    Args:
+        shape (tuple, optional): (height, width) of the image. Defaults to (6000, 3000).
+        count (int, optional): number of small pellets with 20 - 40 px radius. Defaults to 300.
+        large (tuple, optional): ((center y, radius), ...) pellets placed on the vertical center line. Defaults to ().
+        seed (int, optional): seed of the pellet positions. Defaults to 0.
+
+    Returns:
+        np.ndarray: 8 bit color image
+    """
+    rng = np.random.default_rng(seed)
+    h, w = shape
+
+    img = np.full((h, w, 3), 200, dtype=np.uint8)
+    for _ in range(count):
+        center = (int(rng.integers(100, w - 100)), int(rng.integers(100, h - 100)))
+        cv2.circle(img, center, int(rng.integers(20, 40)), (60, 60, 60), -1)
+
+    for cy, r in large:
+        cv2.circle(img, (w // 2, cy), r, (60, 60, 60), -1)
+
+    return img
+
+def check_tiled_task(max_pellet_sizes: tuple = (100, TiledProcessor.OVERLAP, 700)) -> list:
+    """Runs pellet_size_task in worker processes like the PelletSizerSingleState, once whole and once tiled per max_pellet_size,
+    on an image with pellets of up to 660 px. Tiled mode has to find the same pellets as long as max_pellet_size exceeds the largest one.
+
+    Returns:
+        list: [(max_pellet_size or None for the whole image, pellets found, seconds, rows equal to the whole image), ...]
+    """
+    img = synthetic_pellets(large=((1500, 330), (3000, 200), (4400, 120)))
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "pellets.png")
+        cv2.imwrite(path, img)
+
+        results = []
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            # The first task only warms the worker up
+            executor.submit(pellet_size_task, path, None, False).result()
+
+            reference = None
+            for max_pellet_size in (None,) + tuple(max_pellet_sizes):
+                start = time.perf_counter()
+                data = executor.submit(pellet_size_task, path, None, False, max_pellet_size is not None, max_pellet_size).result()["Data"]
+                seconds = time.perf_counter() - start
+
+                rows = np.array(sorted(map(tuple, data)))
+                if reference is None:
+                    reference = rows
+
+                results.append((max_pellet_size, len(rows), seconds, rows.shape == reference.shape and np.allclose(rows, reference)))
+
+    return results
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Pellet sizer benchmarks.")
+    parser.add_argument("--check", action="store_true", help="fails if the tiled task misses pellets smaller than max_pellet_size")
+    args = parser.parse_args()
+
+    # The strips follow the cpu count, a single core machine processes the image as one strip
+    if (os.cpu_count() or 1) == 1:
+        print("one cpu, the tiled runs process a single strip")
+
+    print(f"{'max pellet size':>16} {'pellets':>8} {'seconds':>8} {'equal':>6}")
+    results = check_tiled_task()
+    for max_pellet_size, found, seconds, equal in results:
+        print(f"{max_pellet_size or 'whole':>16} {found:>8} {seconds:>8.3f} {str(equal):>6}")
+
+    # Only the strips overlapping more than the largest pellet (660 px) have to match the whole image
+    if args.check and not all(equal for max_pellet_size, _, _, equal in results if max_pellet_size is None or max_pellet_size > 660):
+        raise SystemExit(1)
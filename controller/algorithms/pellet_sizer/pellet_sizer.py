@@ -1,28 +1,35 @@
 
 import os
 
+import numpy as np
+
+from operator_mod.logger.global_logger import Logger
 from controller.algorithms.pellet_sizer.steps.postprocessing import PostProcessing
 from controller.algorithms.pellet_sizer.steps.preprocessing import Preprocessor
 from controller.algorithms.pellet_sizer.steps.processing import Processor
+from controller.algorithms.pellet_sizer.steps.tiling import TiledProcessor
 
 class PelletSizer:
     
     def __init__(self) -> None:
-        pass
+        
+        self.logger = Logger("Pellet Sizer").logger
     
-    def processing(self, path : str, visualization: bool = False, settings : list = None) -> dict:
+    def processing(self, path : str, visualization: bool = False, settings : list = None, tiled: bool = False, max_pellet_size: int = None) -> dict:
         """Processes a given pellet image to analzye for pellet sizes.
 
         Args:
             path (str): file path
             visualization (bool, optional): if an image should be returned. Defaults to False.
             settings (list, optional): a list of settings for individualization. Defaults to False.
+            tiled (bool, optional): process overlapping strips of 8 bit images in parallel. Pellets taller than the overlap of the strips can get lost at the cuts. Defaults to False.
+            max_pellet_size (int, optional): largest expected pellet in pixels, the strips overlap by that much. Defaults to TiledProcessor.OVERLAP.
 
         Raises:
             ValueError: If the path object does not exists.
 
         Returns:
-            dict: "image" : Image if visualization, "Data" : data
+            dict: "Image" : overlay if visualization, "Data" : (N, 3) rows as in postprocessing.COLUMNS
         """
         
         self.path = path
@@ -32,19 +39,34 @@ class PelletSizer:
         
         # Preprocessing
         prepro = Preprocessor(self.path, settings)
-        img = prepro.process()
+        img = prepro.load()
         
-        # Processing
-        pro = Processor(img)
-        contours = pro.process()
+        if tiled and img.dtype != np.uint8:
+            self.logger.warning(f"Tiled mode needs an 8 bit image, {os.path.basename(path)} is processed whole.")
+            tiled = False
+        
+        if tiled:
+            # Preprocessing and processing per strip on all cores
+            tiler = TiledProcessor(img, prepro, overlap=max_pellet_size or TiledProcessor.OVERLAP, keep_binary=visualization)
+            contours, img = tiler.process()
+            
+            if tiler.lost:
+                self.logger.warning(f"{tiler.lost} objects in {os.path.basename(path)} are taller than the strip overlap of {tiler.overlap} px and were discarded at the cuts, raise max_pellet_size.")
+        
+        else:
+            img = prepro.process_tile_with_settings(img)
+            
+            # Processing
+            pro = Processor(img)
+            contours = pro.process()
         
-        # Postprocessing
+        # Postprocessing, the overlay is only rendered when asked for
         post = PostProcessing(contours, img)
-        results, image = post.postprocess()
+        results = post.measure()
         
         if visualization:
             return {
-                "Image": image,
+                "Image": post.render(),
                 "Data": results
             }
             
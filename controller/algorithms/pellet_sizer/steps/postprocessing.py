@@ -4,54 +4,71 @@ import cv2.typing
 
 import numpy as np
 
+# The result columns of every pellet, same order as the result tables
+COLUMNS = ["Area", "Diameter", "Perimeter"]
+
 class PostProcessing:
 
-    def __init__(self, contours, img):
-        
-        self.img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+    def __init__(self, contours, img = None):
+        """
+        Args:
+            contours (list): filtered pellet contours
+            img (MatLike, optional): binary image, only needed for the overlay. Defaults to None.
+        """
+        self.img = img
         self.contours = contours
-        
-        self.result = []
-        
+
+        self.result = None
+
     def postprocess(self):
-        
-        for i, contour in enumerate(self.contours):
-            
-            result = self.pellet_processor(contour, i+1)
-            self.result.append(result)
-        
-        return self.result, self.img        
-    
-    def pellet_processor(self, contour, number: int) -> list:
-        """Marks all pellets with a number and calculates the results."""
+        """Measures the pellets and renders the overlay. Returns (results, image)."""
+
+        return self.measure(), self.render()
+
+    def measure(self) -> np.ndarray:
+        """Calculates the results of all pellets without touching the image.
+
+        Returns:
+            np.ndarray: (N, 3) float64 rows [area, diameter, perimeter] as in COLUMNS
+        """
+        area = np.fromiter((cv2.contourArea(contour) for contour in self.contours), dtype=np.float64, count=len(self.contours))
+
+        # Equivalent circle of the same area
+        diameter = np.sqrt(area * 4 / np.pi)
+        perimeter = diameter * np.pi
+
+        self.result = np.column_stack((area, diameter, perimeter))
+
+        return self.result
+
+    def render(self) -> cv2.typing.MatLike:
+        """Marks all pellets with their number and contour on a color copy of the binary image."""
+
+        overlay = cv2.cvtColor(self.img, cv2.COLOR_GRAY2RGB)
+
+        font_size, font_thickness = self.font(overlay)
 
         # Puts a number to the pellets
-        x, y, _, _ = cv2.boundingRect(contour)
-        xi, yi = self.img.shape[0:2]
-        
+        for number, contour in enumerate(self.contours, start=1):
+            x, y, _, _ = cv2.boundingRect(contour)
+            cv2.putText(overlay, str(number), (x, y), cv2.FONT_HERSHEY_PLAIN, font_size, (0,0,255), font_thickness, cv2.LINE_AA)
+
+        # Drawing the contours in one pass
+        cv2.drawContours(overlay, self.contours, -1, (0,255,0), 2, cv2.LINE_AA)
+
+        return overlay
+
+    def font(self, img) -> tuple:
+        """Font size and thickness of the numbers, scaled with the image."""
+
+        xi, yi = img.shape[0:2]
+
         larger_dimension = xi if xi > yi else yi
-        
+
         if larger_dimension < 2500:
-            font_size = 2
-            font_thickness = 2
-            
+            return 2, 2
+
         elif larger_dimension < 5000:
-            font_size = 4
-            font_thickness = 10
-        else:
-            font_size = 15
-            font_thickness = 20
-        
-        self.img = cv2.putText(self.img, str(number), (x, y), cv2.FONT_HERSHEY_PLAIN, font_size, (0,0,255), font_thickness, cv2.LINE_AA)
-        
-        # Draawing the contour
-        self.img = cv2.drawContours(self.img, [contour], 0, (0,255,0), 2, cv2.LINE_AA)
-        
-        # Calculating properties
-        area = cv2.contourArea(contour) 
-        diameter = ( (area*4) / np.pi ) ** 0.5
-        perimeter = diameter * np.pi
+            return 4, 10
 
-        results = [area, diameter, perimeter]
-        
-        return results
\ No newline at end of file
+        return 15, 20
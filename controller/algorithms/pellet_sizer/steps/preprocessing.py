@@ -17,35 +17,62 @@ class Preprocessor():
     def process(self):
         
         # We load the image
-        img = cv2.imread(self.path, cv2.IMREAD_ANYCOLOR | cv2.IMREAD_ANYDEPTH)
+        img = self.load()
         
         img = self.process_tile_with_settings(img)
         
         return img
     
-    def process_tile_with_settings(self, img) -> MatLike:
+    def load(self):
+        """Loads the image as it is stored, color and bit depth are kept."""
+        return cv2.imread(self.path, cv2.IMREAD_ANYCOLOR | cv2.IMREAD_ANYDEPTH)
+    
+    def process_tile_with_settings(self, img, threshold: float = None) -> MatLike:
+        
+        img = self.smooth(img)
+        
+        return self.binarize(img, threshold)
+    
+    def smooth(self, img) -> MatLike:
+        """Grayscale conversion and the blur of the settings."""
         
         img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         
         # The defeault settings list is just empty
-        if self.settings != []:
+        if self.settings:
             
             if self.settings[1] == "Gaussian":
                 img = cv2.GaussianBlur(img, (5,5), 0)
                 
             elif self.settings[1] == "Median":
-                img = cv2.medianBlur(img, (5,5), 0)
+                img = cv2.medianBlur(img, 5)
                 
             elif self.settings[1] == "Stacked":
-                img = cv2.stackBlur(img, (5,5), 0)
-            
-            if self.settings[0] >= 0 :
-                _, img = cv2.threshold(img, self.settings[0], 255, cv2.THRESH_BINARY_INV)
-            elif self.settings[0] < 0:
-                _, img = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY_INV+cv2.THRESH_OTSU)
+                img = cv2.stackBlur(img, (5,5))
         
         else:
             img = cv2.GaussianBlur(img, (5,5), 0)
+        
+        return img
+    
+    def uses_otsu(self) -> bool:
+        """If the threshold is found per image with otsu instead of a fixed value."""
+        return not self.settings or self.settings[0] < 0
+    
+    def binarize(self, img, threshold: float = None) -> MatLike:
+        """Inverted binarization of the smoothed image.
+
+        Args:
+            img (MatLike): smoothed grayscale image
+            threshold (float, optional): a precalculated otsu threshold, e.g. of the whole image when only a part is binarized. Defaults to None.
+        """
+        if not self.uses_otsu():
+            _, img = cv2.threshold(img, self.settings[0], 255, cv2.THRESH_BINARY_INV)
+            
+        elif threshold is not None:
+            _, img = cv2.threshold(img, threshold, 255, cv2.THRESH_BINARY_INV)
+            
+        else:
             _, img = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY_INV+cv2.THRESH_OTSU)
         
-        return img
\ No newline at end of file
+        return img
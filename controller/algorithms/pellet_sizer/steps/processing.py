@@ -4,9 +4,14 @@ from cv2.typing import *
 
 class Processor:
     
-    def __init__(self, img: MatLike):
-        
+    def __init__(self, img: MatLike, offset: tuple = (0, 0)):
+        """
+        Args:
+            img (MatLike): binary image
+            offset (tuple, optional): (column, row) added to every contour point, e.g. the position of a strip in the whole image. Defaults to (0, 0).
+        """
         self.img = img
+        self.offset = offset
         
     def process(self):
         
@@ -22,7 +27,10 @@ class Processor:
     def contours(self, img: MatLike) -> list:
         
         # Find contours and hierarchy
-        conts, hierarchy = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        conts, hierarchy = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE, offset=self.offset)
+        
+        if hierarchy is None:
+            return []
 
         # Filter contours with no children -> pellets without internal defects or bubbles are excluded
         no_child_contours = [conts[i] for i in range(len(conts)) if hierarchy[0][i][2] == -1]
@@ -0,0 +1,154 @@
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from controller.algorithms.pellet_sizer.steps.preprocessing import Preprocessor
+from controller.algorithms.pellet_sizer.steps.processing import Processor
+
+def otsu_threshold(hist: np.ndarray) -> int:
+    """Otsu threshold of a 256 bin histogram, the same value cv2.THRESH_OTSU finds on the image itself."""
+    total = hist.sum()
+    if total == 0:
+        return 0
+
+    p = hist.astype(np.float64) / total
+    levels = np.arange(len(p))
+
+    q1 = np.cumsum(p)
+    q2 = 1 - q1
+    m1 = np.cumsum(levels * p)
+    mu = m1[-1]
+
+    eps = np.finfo(np.float32).eps
+    valid = (np.minimum(q1, q2) >= eps) & (np.maximum(q1, q2) <= 1 - eps)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu1 = m1 / q1
+        mu2 = (mu - q1 * mu1) / q2
+        sigma = q1 * q2 * (mu1 - mu2) ** 2
+
+    sigma = np.where(valid, sigma, 0)
+    return int(np.argmax(sigma)) if sigma.max() > 0 else 0
+
+class TiledProcessor:
+    """Preprocessing and contour detection of a large image in overlapping horizontal strips, the strips run in parallel threads (cv2 releases the GIL).
+
+    Every strip owns a core of rows and reaches overlap rows into its neighbours. A pellet is kept by the strip whose core holds its centroid
+    and only if it does not touch a cut edge of that strip, so pellets crossing a core boundary are found once and whole as long as they are smaller than the overlap.
+    Larger pellets can be cut in every strip, they are counted in lost.
+    """
+
+    # Rows around a strip that are smoothed too, so the blur sees the same neighbourhood as on the whole image
+    BLUR_PAD = 8
+
+    # Default rows a strip reaches into its neighbours
+    OVERLAP = 256
+
+    def __init__(self, img: np.ndarray, preprocessor: Preprocessor, overlap: int = OVERLAP, workers: int = None, keep_binary: bool = True):
+        """
+        Args:
+            img (np.ndarray): loaded 8 bit color image
+            preprocessor (Preprocessor): carries the settings for smoothing and binarization
+            overlap (int, optional): rows a strip reaches into its neighbours, has to exceed the largest pellet. Defaults to 256.
+            workers (int, optional): number of strips processed at once. Defaults to the cpu count.
+            keep_binary (bool, optional): assemble the binarized image, only needed for the overlay. Defaults to True.
+        """
+        self.img = img
+        self.prepro = preprocessor
+        self.overlap = overlap
+        self.workers = workers or os.cpu_count() or 1
+
+        height = img.shape[0]
+
+        # Cores partition the image, not thinner than the overlap
+        count = max(1, min(self.workers, height // max(overlap, 1)))
+        self.bounds = np.linspace(0, height, count + 1).astype(int)
+
+        self.binary = np.empty(img.shape[:2], dtype=np.uint8) if keep_binary else None
+
+        # Pellets that no strip saw whole, set by process
+        self.lost = 0
+
+    def process(self) -> tuple:
+        """Returns (contours, binary): the filtered pellet contours in image coordinates and the binarized image or None."""
+
+        strips = range(len(self.bounds) - 1)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+
+            smoothed = list(pool.map(self._smooth, strips))
+
+            # One otsu threshold for the whole image from the histograms of the cores
+            threshold = None
+            if self.prepro.uses_otsu():
+                threshold = otsu_threshold(sum(hist for _, hist in smoothed))
+
+            found = list(pool.map(lambda k: self._detect(k, smoothed[k][0], threshold), strips))
+            contours = [contour for strip, _ in found for contour in strip]
+
+        self.lost = sum(lost for _, lost in found)
+
+        return contours, self.binary
+
+    def _span(self, k: int) -> tuple:
+        """Rows [start, stop) of strip k including the overlap."""
+        return max(0, self.bounds[k] - self.overlap), min(self.img.shape[0], self.bounds[k + 1] + self.overlap)
+
+    def _smooth(self, k: int) -> tuple:
+        """Smoothed strip k and the gray value histogram of its core."""
+        start, stop = self._span(k)
+        pad_start, pad_stop = max(0, start - self.BLUR_PAD), min(self.img.shape[0], stop + self.BLUR_PAD)
+
+        gray = self.prepro.smooth(self.img[pad_start:pad_stop])[start - pad_start:stop - pad_start]
+
+        hist = None
+        if self.prepro.uses_otsu():
+            core = gray[self.bounds[k] - start:self.bounds[k + 1] - start]
+            hist = np.bincount(core.ravel(), minlength=256)
+
+        return gray, hist
+
+    def _detect(self, k: int, gray: np.ndarray, threshold: int | None) -> tuple:
+        """Binarizes strip k, finds its pellets and keeps the ones it owns.
+
+        Returns:
+            (owned contours, number of lost pellets counted by this strip)
+        """
+        start, stop = self._span(k)
+        core_start, core_stop = self.bounds[k], self.bounds[k + 1]
+
+        binary = self.prepro.binarize(gray, threshold)
+        if self.binary is not None:
+            self.binary[core_start:core_stop] = binary[core_start - start:core_stop - start]
+
+        # The shape filter only makes sense for whole pellets, so it runs after the cut ones are sorted out
+        processor = Processor(binary, offset=(0, int(start)))
+        contours = processor.contours(binary)
+
+        owned = []
+        lost = 0
+        for contour in contours:
+
+            _, y, _, h = cv2.boundingRect(contour)
+
+            top_cut = start > 0 and y <= start
+            bottom_cut = stop < self.img.shape[0] and y + h >= stop
+
+            # Cut by the strip border, the neighbour sees it whole unless it is larger than the overlap
+            if top_cut or bottom_cut:
+                # Whole bottom here but reaching the cut of the strip above: cut in every strip. Only this strip can see that, so it is counted once.
+                # Its shape is unknown, so this counts every object and not only the ones that would pass the pellet filter
+                if top_cut and not bottom_cut and y + h >= core_start + self.overlap:
+                    lost += 1
+                continue
+
+            moments = cv2.moments(contour)
+            centroid = moments["m01"] / moments["m00"] if moments["m00"] else y + h / 2
+
+            if core_start <= centroid < core_stop:
+                owned.append(contour)
+
+        return processor.filter(owned), lost
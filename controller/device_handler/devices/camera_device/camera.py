@@ -7,6 +7,7 @@ import gxipy as gx
 
 from enum import Enum
 
+from controller.device_handler.devices.camera_device.frame_buffer import FrameBuffer, Frame
 from controller.device_handler.devices.camera_device.states.all_states import HealthCheckState, ImageCaptureState, LiveViewState, SetSettingsState, MTEmptyCalibrationState, MTFilledCalibrationState, MTImagecaptureState
 from operator_mod.in_mem_storage.in_memory_data import InMemoryData
 from model.data.configuration_manager import ConfigurationManager
@@ -18,9 +19,10 @@ class Camera(Device):
         
     _instance = None
     _lock = threading.Lock()
-    _image_lock = threading.Lock()
     
     FRAMES_PER_SECOND : int = 10
+    # Triple buffering of the acquired frames
+    BUFFER_SLOTS : int = 3
     
     # Exposing the enums to the outside
     class States(Enum):
@@ -82,8 +84,8 @@ class Camera(Device):
         self.await_capture_start_event = threading.Event()
         self.mt_await_capture_start_event = threading.Event()
         
-        self.latest_image = None
-        self.new_frame_image = None
+        # Preallocated, frame numbered ring of the newest frames
+        self.frame_buffer = FrameBuffer(self.BUFFER_SLOTS)
         
         self._connect()
         self.setupCamera()
@@ -173,11 +175,13 @@ class Camera(Device):
                 image = self.cam.data_stream[0].get_image()
                 
                 if image is not None:
+                    hw_frame_id = image.get_frame_id()
+                    timestamp = image.get_timestamp()
+                    
                     image = image.convert('RGB')
-                    new_frame = image.get_numpy_array()
-                
-                    with self._image_lock:
-                        self.latest_image = new_frame
+                    
+                    # Copied into a reused buffer slot, no new array is kept per frame
+                    self.frame_buffer.write(image.get_numpy_array(), hw_frame_id, timestamp)
 
             except:
                 self.logger.warning('Error in image acquisiton thread, image skipped.')
@@ -186,8 +190,40 @@ class Camera(Device):
 
     @property
     def get_latest_image(self):
-        with self._image_lock:
-            return self.latest_image
+        """A copy of the newest frame, None if there is none yet."""
+        frame = self.frame_buffer.latest()
+        return frame.image if frame is not None else None
+    
+    def wait_for_next_frame(self, after_id: int, timeout: float = None) -> Frame | None:
+        """Blocks until a frame newer than after_id arrived. Consumers keep the last frame_id to never get a frame twice.
+
+        Args:
+            after_id (int): frame_id of the last received frame, -1 for any frame
+            timeout (float, optional): maximum seconds to wait. Defaults to None.
+
+        Returns:
+            Frame | None: (frame_id, hw_frame_id, timestamp, image), None on timeout
+        """
+        return self.frame_buffer.wait_for_next_frame(after_id, timeout)
+    
+    def get_frames(self, n: int) -> list[Frame]:
+        """The newest n frames (at most BUFFER_SLOTS), oldest first."""
+        return self.frame_buffer.get_frames(n)
+    
+    def get_roi(self, area: AreaOfInterest = None) -> tuple | None:
+        """The full frame coordinates of an area of interest. Frames are captured and stored whole, the analyzers only work on this region.
+
+        Args:
+            area (AreaOfInterest, optional): the area, None takes the currently set one. Defaults to None.
+
+        Returns:
+            tuple | None: (x1, x2, y1, y2) with x rows and y columns, None for the full frame
+        """
+        if area is None:
+            area = self.data.get_data(self.data.Keys.AREA_OF_INTERST, self.data.Namespaces.CAMERA)
+        
+        coordinates = self.area_of_interests.get(area)
+        return tuple(coordinates) if coordinates else None
     
     @property
     def get_camera(self):
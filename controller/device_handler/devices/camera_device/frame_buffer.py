@@ -0,0 +1,159 @@
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+class Frame(NamedTuple):
+    """A frame handed out by the FrameBuffer.
+
+    Attributes:
+        frame_id (int): running number assigned by the buffer, strictly increasing
+        hw_frame_id (int): frame id reported by the camera
+        timestamp (int): hardware timestamp reported by the camera
+        image (np.ndarray): the frame, a copy owned by the caller
+    """
+    frame_id: int
+    hw_frame_id: int
+    timestamp: int
+    image: np.ndarray
+
+class FrameBuffer:
+    """A fixed size ring of preallocated frame buffers written by the image acquisition thread. Thread safe.
+
+    Every frame gets a running frame id, so consumers can tell duplicated and missed frames apart. The buffers are allocated once and reused for all following frames.
+
+    Integration:
+        buffer.write(array, hw_frame_id, timestamp)         -> acquisition thread
+        frame = buffer.latest()                             -> newest frame or None
+        frame = buffer.wait_for_next_frame(frame.frame_id)  -> blocks until a newer frame arrived
+        frames = buffer.get_frames(n)                       -> the last n frames, oldest first
+    """
+
+    def __init__(self, slots: int = 3):
+
+        self.slots = slots
+
+        self._buffers = None
+        self._ids = [-1] * slots
+        self._hw_ids = [0] * slots
+        self._timestamps = [0] * slots
+
+        self._next_id = 0
+        self._latest_slot = None
+
+        self._condition = threading.Condition()
+
+    def write(self, image: np.ndarray, hw_frame_id: int = 0, timestamp: int = 0) -> int:
+        """Copies a new frame into the next slot.
+
+        Returns:
+            int: the assigned frame id
+        """
+        with self._condition:
+            if self._buffers is None or self._buffers[0].shape != image.shape or self._buffers[0].dtype != image.dtype:
+                self._buffers = [np.empty_like(image) for _ in range(self.slots)]
+                self._ids = [-1] * self.slots
+
+            frame_id = self._next_id
+            self._next_id += 1
+            slot = frame_id % self.slots
+
+            # The slot is invalid while it is written
+            self._ids[slot] = -1
+            buffer = self._buffers[slot]
+
+        np.copyto(buffer, image)
+
+        with self._condition:
+            # The buffers could have been reallocated meanwhile
+            if buffer is self._buffers[slot]:
+                self._ids[slot] = frame_id
+                self._hw_ids[slot] = hw_frame_id
+                self._timestamps[slot] = timestamp
+                self._latest_slot = slot
+
+            self._condition.notify_all()
+
+        return frame_id
+
+    @property
+    def latest_id(self) -> int:
+        with self._condition:
+            return -1 if self._latest_slot is None else self._ids[self._latest_slot]
+
+    def latest(self) -> Frame | None:
+        """Returns a copy of the newest frame or None if there is none yet."""
+
+        with self._condition:
+            slot = self._latest_slot
+
+        if slot is None:
+            return None
+
+        return self._read(slot)
+
+    def wait_for_next_frame(self, after_id: int, timeout: float = None) -> Frame | None:
+        """Blocks until a frame newer than after_id is available and returns the newest one.
+
+        Args:
+            after_id (int): frame id of the last frame the caller got, -1 for any frame
+            timeout (float, optional): maximum seconds to wait. Defaults to None.
+
+        Returns:
+            Frame | None: None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._condition:
+                while self._latest_slot is None or self._ids[self._latest_slot] <= after_id:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+
+                    if remaining is not None and remaining <= 0:
+                        return None
+
+                    self._condition.wait(remaining)
+
+                slot = self._latest_slot
+
+            frame = self._read(slot)
+
+            # Only None if the slot got overwritten while copying, the next frame is newer anyways
+            if frame is not None:
+                return frame
+
+    def get_frames(self, n: int) -> list[Frame]:
+        """Returns copies of up to n of the newest frames, oldest first."""
+
+        with self._condition:
+            valid = sorted((frame_id, slot) for slot, frame_id in enumerate(self._ids) if frame_id >= 0)
+
+        frames = []
+        for _, slot in valid[-n:]:
+            frame = self._read(slot)
+
+            if frame is not None:
+                frames.append(frame)
+
+        return frames
+
+    def _read(self, slot: int) -> Frame | None:
+
+        with self._condition:
+            frame_id = self._ids[slot]
+            hw_frame_id = self._hw_ids[slot]
+            timestamp = self._timestamps[slot]
+            buffer = self._buffers[slot]
+
+        if frame_id < 0:
+            return None
+
+        image = buffer.copy()
+
+        # Making sure the writer did not lap us while copying
+        with self._condition:
+            if self._ids[slot] != frame_id:
+                return None
+
+        return Frame(frame_id, hw_frame_id, timestamp, image)
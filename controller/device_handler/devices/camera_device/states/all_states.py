@@ -9,6 +9,9 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from controller.device_handler.devices.arduino_device.arduino import Arduino
 from controller.device_handler.devices.camera_device.states.abc_state_baseclass import State
 from controller.device_handler.devices.mfc_device.mfc import MFC
+from model.utils.frames.frame_pipeline import FramePipeline
+from model.utils.frames.image_writer import ImageWriter
+from model.utils.frames import roi as roi_utils
 
 class MTEmptyCalibrationState(State):
     
@@ -69,11 +72,26 @@ class MTImagecaptureState(State):
     
     def run_logic(self):
         
+        self.scheduler = None
+        self.writer = None
+        
         try:
             # Scheduler setup
             self.scheduler = BackgroundScheduler()
             
+            # Frames are written in the background, the capture loop only queues them
+            self.writer = ImageWriter(self.data.get_data(self.data.Keys.CAMERA_IMAGE_FORMAT, self.data.Namespaces.CAMERA))
+            
             self.overall_count = 0
+            self.last_frame_id = -1
+            
+            # Frames are stored whole, the mixing time analysis only works on the region of interest
+            self.roi = self.device.get_roi()
+            self.data.add_data(self.data.Keys.CAMERA_FRAME_ROI, self.roi, self.data.Namespaces.CAMERA)
+            
+            # With a channel the streaming mixing time analyzes every frame right away
+            self.pipeline = FramePipeline()
+            self.channel = self.data.get_data(self.data.Keys.CURRENT_MIXINGTIME_CHANNEL, self.data.Namespaces.MIXING_TIME)
             
             self.device.mt_await_capture_start_event.wait()
             self.start_img_cap(10, 1)
@@ -86,11 +104,18 @@ class MTImagecaptureState(State):
             self.logger.warning(f"Error in capturing image: {e}.")
         finally:
             self.terminate_img_cap()
+            
+            if self.writer:
+                self.writer.close()
+                self.data.add_data(self.data.Keys.CAMERA_WRITER_STATS, self.writer.get_stats(), self.data.Namespaces.CAMERA)
         
     def start_img_cap(self, img_per_int: int, interval: int):
 
         path = self.data.get_data(self.data.Keys.CURRENT_MIXINGTIME_FOLDER_IMAGES, namespace=self.data.Namespaces.MIXING_TIME)
         
+        # The images are written whole, the folder based mixing time reads the region back from here
+        roi_utils.save(path, self.roi)
+        
         self.scheduler.add_job(self.single_img_capture, 'interval', args=[img_per_int, path], seconds=interval)
         self.scheduler.start()
 
@@ -105,12 +130,21 @@ class MTImagecaptureState(State):
             
             start_time = time.time()
             
-            numpy_image = self.device.get_latest_image
+            # Every image is a new frame, never the same one twice
+            frame = self.device.wait_for_next_frame(self.last_frame_id, timeout=1)
             
-            filename = f"MT_Image_{self.overall_count}.bmp"
-            filepath = os.path.join(path, filename)
+            if frame is None:
+                self.logger.warning("No new frame from the camera.")
+                img_per_int -= 1
+                continue
             
-            cv2.imwrite(filepath, numpy_image)
+            self.last_frame_id = frame.frame_id
+            
+            name = f"MT_Image_{self.overall_count}"
+            filepath = self.writer.submit(frame.image, os.path.join(path, name))
+            
+            if self.channel:
+                self.pipeline.put_frame(self.channel, frame.image, name, filepath, self.roi)
 
             self.overall_count += 1
             img_per_int -= 1
@@ -135,6 +169,9 @@ class ImageCaptureState(State):
     
     def run_logic(self):
         
+        self.scheduler = None
+        self.disk_writer = None
+        
         try:                
             # Setup            
             settings = self.data.get_data(self.data.Keys.CAMERA_SETTINGS, namespace=self.data.Namespaces.CAMERA)
@@ -143,6 +180,17 @@ class ImageCaptureState(State):
                 
             self.resourcespace = self.data.get_data(self.data.Keys.CURRENT_RESOURCE_SPACE, namespace=self.data.Namespaces.MEASUREMENT)
             
+            # New frames are streamed to the analyzers through the resource space channel
+            self.pipeline = FramePipeline()
+            self.last_frame_id = -1
+            
+            self.persist_images = self.data.get_data(self.data.Keys.CAMERA_PERSIST_IMAGES, self.data.Namespaces.MEASUREMENT)
+            if self.persist_images is None:
+                self.persist_images = True
+            
+            if self.persist_images:
+                self.disk_writer = ImageWriter(self.data.get_data(self.data.Keys.CAMERA_IMAGE_FORMAT, self.data.Namespaces.CAMERA))
+            
             # Safety check for the interval light siwtching -> only possible when more than 5 seconds intervals
             self.lightmode = False
             self.mfc_interrupt = False
@@ -170,6 +218,14 @@ class ImageCaptureState(State):
             self.logger.warning(f"Error in capturing image: {e}.")
         finally:    
             self.terminate_img_cap()
+            
+            if self.disk_writer:
+                self.disk_writer.close()
+                self.data.add_data(self.data.Keys.CAMERA_WRITER_STATS, self.disk_writer.get_stats(), self.data.Namespaces.CAMERA)
+
+    def register_image(self, filepath: str) -> None:
+        """Registers a written image, called by the image writer."""
+        self.res_man.register_resource(os.path.basename(filepath), filepath, space=self.resourcespace)
 
     def start_img_cap(self, img_per_int, interval):
 
@@ -187,7 +243,7 @@ class ImageCaptureState(State):
         
         data.Keys.CAMERA_LIGHTSWITCHING -> For swapping light back on and off
         data.Keys.CAMERA_MASSFLOW_INTERRUPT -> Turn off massflow while image capture
-        data.Keys.IMAGE_CAPTURE_AREA -> Enumerator for image cap area
+        data.Keys.AREA_OF_INTERST -> Enumerator for the region of interest, travels with every frame to the analyzers
         
         Args:
             img_per_int (int): How manz images in a series per capture interval
@@ -211,26 +267,38 @@ class ImageCaptureState(State):
             img_count = 0
             formatted_time = datetime.datetime.now().strftime("%d_%m_%Y_%H_%M_%S")
 
-            # Grabbing the area of iterest
-            area_enum = self.data.get_data(self.data.Keys.AREA_OF_INTERST, self.data.Namespaces.CAMERA)
+            # Grabbing the area of iterest, the frame stays whole and the region travels with it
+            roi = self.device.get_roi()
+            self.data.add_data(self.data.Keys.CAMERA_FRAME_ROI, roi, self.data.Namespaces.CAMERA)
             
-            if not area_enum == self.device.AreaOfInterest.ALL:
-                x1, x2, y1, y2 = self.device.area_of_interests.get(area_enum, None)
+            # The persisted images are whole too, the file based analyses read the region from the image folder
+            if self.persist_images:
+                roi_utils.save(self.path, roi)
 
             while img_per_int > 0:
                 
                 start_time = time.time()
-                numpy_image = self.device.get_latest_image
                 
-                if not area_enum == self.device.AreaOfInterest.ALL:
-                    numpy_image = numpy_image[x1:x2, y1:y2]
+                # Every image is a new frame, never the same one twice
+                frame = self.device.wait_for_next_frame(self.last_frame_id, timeout=1)
+                
+                if frame is None:
+                    self.logger.warning("No new frame from the camera.")
+                    img_per_int -= 1
+                    continue
                 
-                filename = f"Image_{formatted_time}_{img_count}.bmp"
-                filepath = os.path.join(self.path, filename)
+                self.last_frame_id = frame.frame_id
+                numpy_image = frame.image
                 
-                cv2.imwrite(filepath, numpy_image)
+                basepath = os.path.join(self.path, f"Image_{formatted_time}_{img_count}")
+                filepath = None
                 
-                self.res_man.register_resource(f"Image_{formatted_time}_{img_count}.bmp", filepath, space=self.resourcespace)
+                # Writing to disk is an optional side job outside of the timed loop
+                if self.persist_images:
+                    filepath = self.disk_writer.submit(numpy_image, basepath, self.register_image)
+                
+                # The analyzers get the frame through shared memory
+                self.pipeline.put_frame(self.resourcespace, numpy_image, os.path.basename(filepath or basepath), filepath, roi)
 
                 img_count += 1
                 img_per_int -= 1
@@ -249,6 +317,11 @@ class ImageCaptureState(State):
                 # this automatically resets the latest airflow
                 self.mfc.add_task(self.mfc.States.OPEN_VALVE, 0)
             
+            if self.disk_writer:
+                stats = self.disk_writer.get_stats()
+                self.data.add_data(self.data.Keys.CAMERA_WRITER_STATS, stats, self.data.Namespaces.CAMERA)
+                self.logger.info(f"Image writer: {stats}.")
+            
         except Exception as e:
             self.logger.warning(f"Image capturing not working properly: {e}.")
                 
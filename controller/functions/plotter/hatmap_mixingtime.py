@@ -1,64 +1,97 @@
+import argparse
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.widgets import Button, Slider
 
+from model.measurements.mixing_time_datastruct import DataMixingTime, LocalMixingTimes
+
 # Function to plot heatmap for the given data
-def plot_heatmap(data, title, ax):
-    heatmap_data = np.mean(data, axis=2)
-    cax = ax.imshow(heatmap_data, cmap='coolwarm', interpolation='nearest')
+def plot_heatmap(heatmap_data: np.ndarray, title: str, ax, **imshow_kwargs):
+    """Draws one (rows, columns) map, NaN tiles stay blank."""
+    cax = ax.imshow(heatmap_data, cmap=imshow_kwargs.pop("cmap", "coolwarm"), interpolation='nearest', **imshow_kwargs)
     ax.set_title(title)
     return cax
 
-# Function to update the heatmap for each frame in the animation
-def update_heatmap(frame, data, ax):
-    ax.clear()
-    cax = plot_heatmap(data[frame], f'Time Point {frame}', ax)
+def plot_mixing_time_map(local: LocalMixingTimes, ax):
+    """The spatial heatmap of the local mixing times in frames since the start of the mixing."""
+    cax = plot_heatmap(local.mixing_frames, f"Local mixing time t{round(100 * (1 - local.tolerance))} [frames]", ax, cmap='viridis')
+    ax.set_xlabel("Tile column")
+    ax.set_ylabel("Tile row")
     return cax
 
-# Example data generation
-num_time_points = 10
-num_blocks_y = 10
-num_blocks_x = 10
-data = np.random.rand(num_time_points, num_blocks_y, num_blocks_x, 3)
-
-# Create a figure and axis for plotting
-fig, ax = plt.subplots()
-plt.subplots_adjust(bottom=0.2)  # Adjust the layout to fit buttons and slider
-
-# Plot the first frame to initialize the heatmap and colorbar
-cax = plot_heatmap(data[0], 'Time Point 0', ax)
-colorbar = plt.colorbar(cax)
-
-# Animation setup
-ani = animation.FuncAnimation(fig, update_heatmap, frames=num_time_points, fargs=(data, ax), interval=500, repeat=True)
-
-# Play/Pause Button Functions
-is_paused = False
-
-def play_pause(event):
-    global is_paused
-    if is_paused:
-        ani.event_source.start()
-    else:
-        ani.event_source.stop()
-    is_paused = not is_paused
-
-# Slider Update Function
-def update_frame(val):
-    frame = int(slider.val)
-    update_heatmap(frame, data, ax)
-    fig.canvas.draw_idle()
-
-# Adding Play/Pause Button
-ax_play_pause = plt.axes([0.8, 0.05, 0.1, 0.075])  # x, y, width, height
-btn_play_pause = Button(ax_play_pause, 'Play')
-btn_play_pause.on_clicked(play_pause)
-
-# Adding a Slider
-ax_slider = plt.axes([0.2, 0.05, 0.5, 0.03], facecolor='lightgoldenrodyellow')
-slider = Slider(ax_slider, 'Frame', 0, num_time_points-1, valinit=0, valstep=1)
-slider.on_changed(update_frame)
-
-# Display the plot
-plt.show()
+def animate_deviation(local: LocalMixingTimes, interval: int = 50):
+    """Deviation of every tile from its final state over the frames, with play/pause and a frame slider.
+
+    Returns:
+        (figure, animation): the animation and its widgets have to stay referenced while the figure is open
+    """
+    deviation = local.deviation
+    num_time_points = len(deviation)
+
+    # Create a figure and axis for plotting
+    fig, ax = plt.subplots()
+    plt.subplots_adjust(bottom=0.2)  # Adjust the layout to fit buttons and slider
+
+    # One image that only gets new data, the colour scale is fixed to the relative deviation
+    image = plot_heatmap(deviation[0], f"Frame {local.start_index}", ax, vmin=0, vmax=1)
+    fig.colorbar(image, ax=ax, label="Deviation from final state [-]")
+
+    def show_frame(frame):
+        image.set_data(deviation[frame])
+        ax.set_title(f"Frame {local.start_index + frame}")
+        return image,
+
+    # Animation setup
+    ani = animation.FuncAnimation(fig, show_frame, frames=num_time_points, interval=interval, repeat=True)
+
+    # Adding Play/Pause Button
+    ax_play_pause = fig.add_axes([0.8, 0.05, 0.1, 0.075])  # x, y, width, height
+    btn_play_pause = Button(ax_play_pause, 'Play')
+    is_paused = [False]
+
+    def play_pause(event):
+        if is_paused[0]:
+            ani.event_source.start()
+        else:
+            ani.event_source.stop()
+        is_paused[0] = not is_paused[0]
+
+    btn_play_pause.on_clicked(play_pause)
+
+    # Adding a Slider
+    ax_slider = fig.add_axes([0.2, 0.05, 0.5, 0.03], facecolor='lightgoldenrodyellow')
+    slider = Slider(ax_slider, 'Frame', 0, num_time_points - 1, valinit=0, valstep=1)
+
+    def update_frame(val):
+        show_frame(int(slider.val))
+        fig.canvas.draw_idle()
+
+    slider.on_changed(update_frame)
+
+    # Keeping the widgets alive together with the figure
+    fig._mixing_time_widgets = (btn_play_pause, slider)
+
+    return fig, ani
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Local mixing time heatmap of a saved mixing time measurement.")
+    parser.add_argument("folder", help="Data folder of the measurement")
+    parser.add_argument("--metric", default="variance", choices=["variance", "entropy"])
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    args = parser.parse_args()
+
+    local = DataMixingTime.load(args.folder).local_mixing_times(args.metric, args.tolerance)
+
+    if local is None:
+        raise SystemExit("The measurement has no local mixing time data.")
+
+    fig, ax = plt.subplots()
+    fig.colorbar(plot_mixing_time_map(local, ax), ax=ax)
+
+    _, ani = animate_deviation(local)
+
+    # Display the plot
+    plt.show()
@@ -7,6 +7,9 @@ from matplotlib.backends.backend_qt5agg import (
 
 from matplotlib.figure import Figure
 
+from model.measurements.mixing_time_datastruct import LocalMixingTimes
+from controller.functions.plotter.hatmap_mixingtime import plot_mixing_time_map
+
 class Plotter:
 
     def __init__(self) -> None:
@@ -88,9 +91,26 @@ class Plotter:
         
         return widget
     
-    def plot_mixingtime_heatmap(self):
+    def plot_mixingtime_heatmap(self, local: LocalMixingTimes) -> QWidget:
+        """The spatial heatmap of the local mixing times, see DataMixingTime.local_mixing_times."""
+        
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        self.toolbar = NavigationToolBar(self.canvas, None)
+        self.ax = self.figure.add_subplot(111)
+        
+        cax = plot_mixing_time_map(local, self.ax)
+        self.figure.colorbar(cax, ax=self.ax)
+        
+        self.canvas.draw()
 
-        pass
+        widget = QWidget()
+        layout = QVBoxLayout()
+        layout.addWidget(self.toolbar)
+        layout.addWidget(self.canvas)
+        widget.setLayout(layout)
+        
+        return widget
     
 if __name__ == "__main__":
     import sys
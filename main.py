@@ -5,6 +5,7 @@ from view.start_gui import GUInterface
 from operator_mod.operator_mod import OperatorModerator
 
 from operator_mod.eventbus.event_handler import EventManager
+from model.utils.SQL.sql_manager import SQLManager
 
 from controller.device_handler.devices.camera_device.camera import Camera
 from controller.device_handler.devices.arduino_device.arduino import Arduino
@@ -63,6 +64,9 @@ class ApplicationCoordinator:
         pump = Pump.get_instance()
         pump.shutdown()
         
+        # Close all pooled database connections
+        SQLManager().shutdown()
+        
         # Last end the GUI cycle
         self.gui.shutdown()
 
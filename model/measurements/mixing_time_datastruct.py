@@ -1,59 +1,301 @@
 
+import copy
+import json
+import os
+import warnings
 from dataclasses import dataclass
 
+import numpy as np
+
+@dataclass
+class LocalMixingTimes:
+    """Per tile mixing times of a measurement, computed by DataMixingTime.local_mixing_times. All maps are (rows, columns), NaN for
+    tiles without data or that did not settle."""
+
+    # Frame from which on the tile stays within the tolerance band around its final value (t95 for a tolerance of 0.05)
+    mixing_index: np.ndarray
+    # Frames from the start of the mixing to mixing_index, the heatmap
+    mixing_frames: np.ndarray
+    # Final value of the tile, the mean over the last frames
+    final: np.ndarray
+    # (frames, rows, columns) distance to the final value from start_index on, relative to the tiles largest one. The tile is mixed below tolerance
+    deviation: np.ndarray
+
+    start_index: int
+    tolerance: float
+
 @dataclass
 class DataMixingTime:
-    
+    """The mixing time results of one measurement in preallocated arrays indexed by frame.
+
+    The global series are (frames,) arrays, the local ones a (frames, rows, columns, 2) [variance, entropy] cube. Frames may arrive out of order,
+    missing frames stay NaN. The arrays grow by doubling, so adding a frame is O(1) amortized.
+
+    Integration:
+        data = DataMixingTime(capacity)
+        data.add_global_results(index, entropy, variance)
+        data.add_tile(index, tile_data)                 -> (rows, columns, 2)
+        data.entropy, data.variance, data.tiles         -> views on the filled frames
+        data.save(folder) / DataMixingTime.load(folder) -> .npz for the series, copy on write memory mapped .npy for the tiles
+        data.local_mixing_times()                       -> LocalMixingTimes, per tile t95 map
+        data.snapshot()                                 -> independent copy for another thread
+    """
+
     tile_size: int = None
     rows: int = None
     columns: int = None
-    
-    def __init__(self):
 
-        self.global_mixing_data = {}
-        self.local_mixing_time_data = {}
-    
+    # Found online by the streaming mixing time, frame indices
+    mixing_start_index: int = None
+    mixing_time_index: int = None
+
+    # File names inside the measurements Data folder
+    GLOBAL_FILE = "mixing_time.npz"
+    TILES_FILE = "mixing_time_tiles.npy"
+
+    INITIAL_CAPACITY = 256
+
+    def __init__(self, capacity: int = None):
+        """
+        Args:
+            capacity (int, optional): expected number of frames, more are possible. Defaults to INITIAL_CAPACITY.
+        """
+        capacity = max(1, capacity or self.INITIAL_CAPACITY)
+
+        self._entropy = np.full(capacity, np.nan)
+        self._variance = np.full(capacity, np.nan)
+
+        # Allocated with the first tile data, the grid is known only then
+        self._tiles = None
+
+        # Frames covered so far, the highest index + 1
+        self.frames = 0
+
+    @property
+    def entropy(self) -> np.ndarray:
+        return self._entropy[:self.frames]
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self._variance[:self.frames]
+
+    @property
+    def tiles(self) -> np.ndarray | None:
+        """(frames, rows, columns, 2) [variance, entropy] per tile or None without local mixing time."""
+        return self._tiles[:self.frames] if self._tiles is not None else None
+
+    @property
+    def frame_indices(self) -> np.ndarray:
+        """Indices of the frames that have results."""
+        return np.flatnonzero(~np.isnan(self.variance))
+
+    def _reserve(self, image_index: int) -> None:
+        """Grows the arrays by doubling until image_index fits."""
+        capacity = len(self._variance)
+
+        if image_index >= capacity:
+            capacity = max(image_index + 1, 2 * capacity)
+            self._entropy = self._grown(self._entropy, capacity)
+            self._variance = self._grown(self._variance, capacity)
+
+            if self._tiles is not None:
+                self._tiles = self._grown(self._tiles, capacity)
+
+        self.frames = max(self.frames, image_index + 1)
+
+    @staticmethod
+    def _grown(array: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.full((capacity, *array.shape[1:]), np.nan)
+        grown[:len(array)] = array
+        return grown
+
+    def snapshot(self) -> "DataMixingTime":
+        """A copy of the results so far that frames added later do not touch, for handing them to another thread."""
+        data = copy.copy(self)
+
+        data._entropy = self.entropy.copy()
+        data._variance = self.variance.copy()
+        data._tiles = np.array(self.tiles) if self._tiles is not None else None
+
+        return data
+
     def add_global_results(self, image_index: int, entropy: float, variance: float) -> None:
-        
-        if "entropy" not in self.global_mixing_data:
-            self.global_mixing_data["entropy"] = {}
-            
-        if "variance" not in self.global_mixing_data:
-            self.global_mixing_data["variance"] = {}
-        
-        self.global_mixing_data["entropy"][image_index] = entropy
-        self.global_mixing_data["variance"][image_index] = variance
-    
+
+        self._reserve(image_index)
+
+        self._entropy[image_index] = entropy
+        self._variance[image_index] = variance
+
     # For the local mixing time
-    def add_tile(self, image_index: int, value: any):
+    def add_tile(self, image_index: int, value: np.ndarray):
         """
-        Stores a tile data at the specified position
-        
+        Stores the tile data of a frame
+
         Arguments:
             image_index (int): the image number
-            value (dict): contains a tile index (i,j) = [entropy, variance]
+            value (np.ndarray): (rows, columns, 2) [variance, entropy] per tile
         """
-        if image_index not in self.local_mixing_time_data:
-            self.local_mixing_time_data[image_index] = {}
-            
-        self.local_mixing_time_data[image_index] = value
-        
+        if self._tiles is None:
+            self._tiles = np.full((len(self._variance), *value.shape), np.nan)
+
+        self._reserve(image_index)
+
+        self._tiles[image_index] = value
+
     def get_tile(self, image_index: int, row: int, col: int):
         """
         Retrieves a tiles data from the specified position
-        
+
         Arguments:
             image_index (int): the xth image in the series
             row, col (int, int): the position of the tile in the grid dimensions n,m
-            
+
         Returns:
-            data :)
+            np.ndarray: [variance, entropy] of the tile or None
         """
-        return self.local_mixing_time_data.get(image_index, {}).get((row, col), None)
+        tiles = self.tiles
+
+        if tiles is None or not (0 <= image_index < len(tiles) and 0 <= row < tiles.shape[1] and 0 <= col < tiles.shape[2]):
+            return None
+
+        tile = tiles[image_index, row, col]
+        return None if np.isnan(tile).all() else tile
 
     def add_local_metadata(self, tile_size: int, rows: int, columns: int):
 
         self.tile_size = tile_size
         self.rows = rows
         self.columns = columns
-   
\ No newline at end of file
+
+    def set_mixing_time(self, start_index: int, mixing_index: int) -> None:
+        """Stores the detected mixing time.
+
+        Args:
+            start_index (int): frame where the mixing started
+            mixing_index (int): frame from which on the reactor counts as mixed
+        """
+        self.mixing_start_index = start_index
+        self.mixing_time_index = mixing_index
+
+    def local_mixing_times(self, metric: str = "variance", tolerance: float = 0.05, final_frames: int = 20, start_index: int = None) -> LocalMixingTimes | None:
+        """The mixing time of every tile, vectorized over the whole tile cube.
+
+        Same criterion as the global ConvergenceDetector: the final value is the mean over the last final_frames frames, the band is tolerance times
+        the largest deviation from it since the start. A reverse scan finds the last frame outside of the band, the frame after it is the mixing time.
+        Tiles that are still outside within the last final_frames frames did not settle and stay NaN.
+
+        Args:
+            metric (str, optional): "variance" or "entropy". Defaults to "variance".
+            tolerance (float, optional): relative band around the final value. Defaults to 0.05 (t95).
+            final_frames (int, optional): frames averaged for the final value. Defaults to 20.
+            start_index (int, optional): frame where the mixing started. Defaults to the detected start or the first frame.
+
+        Returns:
+            LocalMixingTimes | None: None without local mixing time data
+        """
+        if self.tiles is None:
+            return None
+
+        if start_index is None:
+            start_index = self.mixing_start_index or 0
+
+        # (frames, rows, columns) of the metric since the start, float32 halves the memory traffic of a large cube
+        cube = np.asarray(self.tiles[start_index:, ..., ("variance", "entropy").index(metric)], dtype=np.float32)
+        frames = len(cube)
+
+        if frames == 0:
+            return None
+
+        final_frames = max(1, min(final_frames, frames))
+
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            # Tiles without any data are all NaN, their maps just stay NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+
+            final = np.nanmean(cube[-final_frames:], axis=0)
+
+            deviation = np.abs(cube - final, out=cube)
+            largest = np.nanmax(deviation, axis=0)
+            deviation /= largest
+
+        # Missing frames (NaN) compare as inside, a constant tile (0 / 0) has no excursion at all
+        outside = deviation > tolerance
+
+        # Reverse scan: argmax on the reversed time axis is the last frame outside of the band
+        last_outside = frames - 1 - np.argmax(outside[::-1], axis=0)
+        first_inside = np.where(outside.any(axis=0), last_outside + 1, 0).astype(np.float64)
+
+        first_inside[(first_inside > frames - final_frames) | np.isnan(final)] = np.nan
+
+        return LocalMixingTimes(
+            mixing_index=first_inside + start_index,
+            mixing_frames=first_inside,
+            final=final,
+            deviation=deviation,
+            start_index=start_index,
+            tolerance=tolerance
+        )
+
+    def save(self, dirpath: str) -> str:
+        """Writes the results into a folder: the series and the metadata as .npz, the tile cube as .npy that load maps instead of reading.
+
+        Args:
+            dirpath (str): the measurements Data folder
+
+        Returns:
+            str: path of the .npz file
+        """
+        os.makedirs(dirpath, exist_ok=True)
+
+        metadata = {
+            "tile_size": self.tile_size,
+            "rows": self.rows,
+            "columns": self.columns,
+            "mixing_start_index": self.mixing_start_index,
+            "mixing_time_index": self.mixing_time_index
+        }
+
+        path = os.path.join(dirpath, self.GLOBAL_FILE)
+        np.savez(path, entropy=self.entropy, variance=self.variance, metadata=np.array(json.dumps(metadata, default=int)))
+
+        tiles_path = os.path.join(dirpath, self.TILES_FILE)
+        if self._tiles is not None:
+            # The cube may be mapped from this very file, it is replaced instead of being truncated underneath the map
+            with open(tiles_path + ".tmp", "wb") as file:
+                np.save(file, self.tiles)
+            os.replace(tiles_path + ".tmp", tiles_path)
+        elif os.path.exists(tiles_path):
+            os.remove(tiles_path)
+
+        return path
+
+    @classmethod
+    def load(cls, dirpath: str, mmap: bool = True) -> "DataMixingTime":
+        """Loads the results written by save.
+
+        Args:
+            dirpath (str): the measurements Data folder
+            mmap (bool, optional): maps the tile cube copy on write instead of reading it, writes only touch the mapped pages in memory and never the file. Defaults to True.
+
+        Raises:
+            FileNotFoundError: If there are no saved results in the folder.
+        """
+        with np.load(os.path.join(dirpath, cls.GLOBAL_FILE)) as stored:
+            entropy = stored["entropy"]
+            variance = stored["variance"]
+            metadata = json.loads(str(stored["metadata"]))
+
+        data = cls(len(variance))
+        data._entropy[:len(entropy)] = entropy
+        data._variance[:len(variance)] = variance
+        data.frames = len(variance)
+
+        tiles_path = os.path.join(dirpath, cls.TILES_FILE)
+        if os.path.exists(tiles_path):
+            # Copy on write, so the loaded results stay writable like fresh ones. The cube is copied into memory when it has to grow
+            data._tiles = np.load(tiles_path, mmap_mode="c" if mmap else None)
+
+        for key, value in metadata.items():
+            setattr(data, key, value)
+
+        return data
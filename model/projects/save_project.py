@@ -8,6 +8,7 @@ from operator_mod.logger.global_logger import Logger
 from operator_mod.in_mem_storage.in_memory_data import InMemoryData
 
 from model.utils.resource_manager import ResourceManager
+from model.utils.SQL.sql_manager import SQLManager
 
 class SaveProject:
 
@@ -73,7 +74,8 @@ class SaveProject:
             new_registry_path = os.path.join(userdata, registry_basename)
             self.data.add_data(self.data.Keys.MEASUREMENT_REGISTRY_SQL, new_registry_path, self.data.Namespaces.PROJECT_MANAGEMENT)
 
-            # Move the project directory
+            # Move the project directory, open database connections would keep the files locked
+            SQLManager().close()
             shutil.move(pj_path, dir_path)
             self.res_man.register_resource(os.path.basename(dir_path), dir_path, "SaveLocations")
 
@@ -36,15 +36,12 @@ class JSONManager:
         
         # Write the JSON data to the file
         try:
-            with self._lock:
-                self.fam.get_access(file_path)
+            with self._lock, self.fam.write_access(file_path):
                 with open(file_path, 'w') as file:
                     json.dump([data], file, indent=4)
                 self.logger.info(f"Successfully wrote to {file_path}")
         except Exception as e:
             self.logger.error(f"Error writing to {file_path}: {e}")
-        finally:
-            self.fam.release_access(file_path)
             
     def load_json(self, path: str) -> dict:
         """Loads available data from a given path."""
@@ -53,8 +50,7 @@ class JSONManager:
             return None
         
         try:
-            with self._lock:
-                self.fam.get_access(path)
+            with self._lock, self.fam.read_access(path):
                 with open(path, 'r') as file:
                     data = json.load(file)
                 self.logger.info(f"Successfully loaded data from {path}.")
@@ -63,9 +59,6 @@ class JSONManager:
         except Exception as e:
             self.logger.error(f"Error loading from file {path}: {e}")
             return None
-        
-        finally:
-            self.fam.release_access(path)
     
     def add_to_json(self, data: dict, file_path: str) -> None:
         """Adds data to an existing json file gracefully."""
@@ -75,8 +68,7 @@ class JSONManager:
             return
         
         try:
-            with self._lock:
-                self.fam.get_access(file_path)
+            with self._lock, self.fam.write_access(file_path):
                 
                 # Open the file and load the existing data
                 with open(file_path, 'r+') as file:
@@ -99,8 +91,6 @@ class JSONManager:
                 self.logger.info(f"Successfully updated {file_path}")
         except Exception as e:
             self.logger.error(f"Error updating {file_path}: {e}")
-        finally:
-            self.fam.release_access(file_path)
             
     def delete_from_json(self, target_key: str, path: str) -> None:
         """Tries to delete the specified target_key from a JSON file gracefully."""
@@ -110,8 +100,7 @@ class JSONManager:
             return
         
         try:
-            with self._lock:
-                self.fam.get_access(path)
+            with self._lock, self.fam.write_access(path):
                 
                 # Open the file and load the existing data
                 with open(path, 'r+') as file:
@@ -135,5 +124,3 @@ class JSONManager:
                 self.logger.info(f"Successfully deleted key {target_key} from {path}")
         except Exception as e:
             self.logger.error(f"Error deleting key {target_key} from {path}: {e}")
-        finally:
-            self.fam.release_access(path)
@@ -1,5 +1,6 @@
 import asyncio
 import os
+import threading
 import aiosqlite
 
 from operator_mod.logger.global_logger import Logger
@@ -16,17 +17,23 @@ class SQLManager:
 
     When u want to read data from a sql.db file:
         result = sql.read_or_write(path, query, "read")
+
+    When u want to write many rows of the same table at once:
+        sql.bulk_write(path, table_name, columns, rows)
+
+    Connections stay open per database (WAL mode) until sql.close(path) / sql.close() is called.
     Returns:
         None
     """
 
     _instance = None
-    _lock = asyncio.Lock()
+    _lock = threading.Lock()
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(SQLManager, cls).__new__(cls)
-        return cls._instance
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(SQLManager, cls).__new__(cls)
+            return cls._instance
 
     def __init__(self):
 
@@ -34,46 +41,90 @@ class SQLManager:
             self._initialized = True
             self.sqllogger = Logger("SQLManager").logger
             self.file_manager = FileAccessManager()
-            self._connection = None
 
-    async def _connect(self, path: str):
-        async with self._lock:
-            try:
-                self._connection = await aiosqlite.connect(path)
-            except Exception as e:
-                self.sqllogger.error(f"Error connecting: {e}")
+            # All database work runs on one dedicated thread with its own event loop
+            self._loop = None
+            self._thread = None
+
+            # Open connections and their locks per database path, only touched from the db thread
+            self._connections = {}
+            self._path_locks = {}
+
+    ### DB thread
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Starts the db thread on first use (or again after a shutdown)."""
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="SQLManager", daemon=True)
+                self._thread.start()
+            return self._loop
 
-    async def _write(self, query: str) -> bool:
-        async with self._lock:
+    def _run(self, coro):
+        """Runs the coroutine on the db thread and blocks until its result is there."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    def _path_lock(self, path: str) -> asyncio.Lock:
+        # Created inside the db loop, so the lock always belongs to the loop it is awaited on
+        if path not in self._path_locks:
+            self._path_locks[path] = asyncio.Lock()
+        return self._path_locks[path]
+
+    async def _get_connection(self, path: str) -> aiosqlite.Connection:
+        """Returns the open connection for the path. New connections are switched to WAL so readers never block the writer."""
+        connection = self._connections.get(path)
+        if connection is None:
+            connection = await aiosqlite.connect(path)
+            await connection.execute("PRAGMA journal_mode=WAL;")
+            await connection.execute("PRAGMA synchronous=NORMAL;")
+            self._connections[path] = connection
+            self.sqllogger.debug(f"Opened connection for {path}.")
+        return connection
+
+    async def _write(self, path: str, query: str, insert: str = None, rows: list = None) -> bool:
+        """Executes the query and, if given, the parameterized insert for all rows in the same transaction."""
+        async with self._path_lock(path):
+            connection = await self._get_connection(path)
             try:
-                async with self._connection.cursor() as cursor:  # noqa: F841
-                    await cursor.execute(query)
-                    await self._connection.commit()
+                await connection.execute(query)
+                if insert is not None:
+                    await connection.executemany(insert, rows)
+                await connection.commit()
                 return True
             except Exception as e:
+                await connection.rollback()
                 self.sqllogger.error(f"Writing Error: {e}")
                 return False
 
-    async def _read(self, query: str) -> list:
-        async with self._lock:
+    async def _read(self, path: str, query: str) -> list:
+        async with self._path_lock(path):
+            connection = await self._get_connection(path)
             try:
-                async with self._connection.cursor() as cursor:
-                    await cursor.execute(query)
-                    result = await cursor.fetchall()
-                return result
+                async with connection.execute(query) as cursor:
+                    return await cursor.fetchall()
             except Exception as e:
                 self.sqllogger.error(f"Reading Error: {e}")
                 return []
 
-    async def _disconnect(self):
-        async with self._lock:
-            try:
-                if self._connection:
-                    await self._connection.close()
-                    self._connection = None
-            except Exception as e:
-                self.sqllogger.error(f"Error disconnecting: {e}")
+    async def _close(self, path: str = None):
+        paths = [path] if path is not None else list(self._connections.keys())
+        for p in paths:
+            async with self._path_lock(p):
+                connection = self._connections.pop(p, None)
+                try:
+                    if connection is not None:
+                        await connection.close()
+                        self.sqllogger.debug(f"Closed connection for {p}.")
+                except Exception as e:
+                    self.sqllogger.error(f"Error disconnecting: {e}")
 
+    async def _snapshot(self, path: str, target: str):
+        async with self._path_lock(path):
+            connection = await self._get_connection(path)
+            async with aiosqlite.connect(target) as copy:
+                await connection.backup(copy)
+
+    ### Interface
     def read_or_write(self, path, query, task):
         """This is the main interactable that does reading/writing with automatic file access generation. Nothing to be done just call this.
 
@@ -88,34 +139,93 @@ class SQLManager:
         try:
             if task == "write":
                 if os.path.exists(path):
-                    self.file_manager.get_access(path)
-                    asyncio.run(self._sql_handler(path, query, task))
-                    self.file_manager.release_access(path)
+                    with self.file_manager.write_access(path):
+                        self._run(self._write(path, query))
                 else:
-                    asyncio.run(self._sql_handler(path, query, task))
+                    self._run(self._write(path, query))
             elif task == "read":
-                self.file_manager.get_access(path)
-                result = asyncio.run(self._sql_handler(path, query, task))
-                self.file_manager.release_access(path)
-                return result
+                # Reads share the file, WAL keeps them consistent with running writes
+                with self.file_manager.read_access(path):
+                    return self._run(self._read(path, query))
         except Exception as e:   
             self.sqllogger.error(f"Error in writing: {e}.")
 
+    def bulk_write(self, path: str, table_name: str, columns: list, rows, types: dict = None) -> bool:
+        """Writes many rows into one table with a single transaction on the pooled connection. The table is created
+        from the first row if it does not exist yet. Values are bound as parameters, nothing is interpolated into the query.
 
-    async def _sql_handler(self, path, query, action):
-        """This is the actual async funtions thats executed."""
+        Args:
+            path (str): path to the .db file
+            table_name (str): any name
+            columns (list): the column names, one per value in a row
+            rows (list | np.ndarray): a list of rows or a 2D array with one row per entry
+            types (dict, optional): column name -> sql type, overrides the inferred types. Defaults to None.
 
-        await self._connect(path)
+        Returns:
+            bool: True if all rows were written
+        """
+        rows = self._to_rows(rows)
+        if not rows:
+            return True
 
-        if action == "write":
-            await self._write(query)
+        try:
+            table = self.generate_table_statement(table_name, dict(zip(columns, rows[0])), types)
+            insert = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))});"
 
-        elif action == "read":
-            result = await self._read(query)
-            await self._disconnect()
-            return result
+            if os.path.exists(path):
+                with self.file_manager.write_access(path):
+                    return self._run(self._write(path, table, insert, rows))
+            return self._run(self._write(path, table, insert, rows))
+        except Exception as e:
+            self.sqllogger.error(f"Error in bulk writing: {e}.")
+            return False
 
-        await self._disconnect()
+    def snapshot(self, path: str, target: str) -> None:
+        """Copies a (possibly live) database into target through the sqlite backup api. Other than a file copy
+        this includes everything that is still in the write ahead log.
+
+        Args:
+            path (str): path to the .db file
+            target (str): path of the copy
+        """
+        with self.file_manager.read_access(path):
+            self._run(self._snapshot(path, target))
+
+    def close(self, path: str = None) -> None:
+        """Closes the pooled connection of one database or of all of them. Closing checkpoints the write ahead log
+        into the .db file. Connections are opened again on the next access.
+
+        Args:
+            path (str, optional): path to the .db file, None closes all
+        """
+        if self._loop is None:
+            return
+        try:
+            self._run(self._close(path))
+        except Exception as e:
+            self.sqllogger.error(f"Error closing connections: {e}.")
+
+    def shutdown(self) -> None:
+        """Closes all connections and ends the db thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result()
+        except Exception as e:
+            self.sqllogger.error(f"Error closing connections: {e}.")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        # The path locks belonged to the stopped loop
+        self._path_locks.clear()
+
+    def _to_rows(self, rows) -> list:
+        """Turns an array or a list of rows into a list of tuples of plain python values sqlite can bind."""
+        if hasattr(rows, "tolist"):
+            rows = rows.tolist()
+        return [tuple(v.item() if hasattr(v, "item") else v for v in row) for row in rows]
 
     def _infer_sql_type(self, value):
 
@@ -147,15 +257,28 @@ class SQLManager:
         keys = data.keys()
         
         # Generate CREATE TABLE statement
-        columns_definitions = []
-        for key in keys:
-            sql_type = self._infer_sql_type(data[key])
-            columns_definitions.append(f"{key} {sql_type}")
-        create_table_statement = f"CREATE TABLE IF NOT EXISTS {table_name} (\n    " + ",\n    ".join(columns_definitions) + "\n);"
+        create_table_statement = self.generate_table_statement(table_name, data)
         
         # Generate INSERT INTO statement
         columns = ", ".join(keys)
         values = ", ".join([f"'{v}'" if isinstance(v, str) else ("NULL" if v is None else str(v)) for v in data.values()])
         insert_statement = f"INSERT INTO {table_name} ({columns}) VALUES ({values});"
         
-        return create_table_statement, insert_statement
\ No newline at end of file
+        return create_table_statement, insert_statement
+
+    def generate_table_statement(self, table_name: str, data: dict, types: dict = None) -> str:
+        """Generates the table creation statement with the column types inferred from the given data.
+
+        Args:
+            table_name (str): any name
+            data (hashmap): column name -> example value
+            types (dict, optional): column name -> sql type, overrides the inferred types. Defaults to None.
+
+        Returns:
+            str: CREATE TABLE IF NOT EXISTS statement
+        """
+        columns_definitions = []
+        for key in data.keys():
+            sql_type = types[key] if types and key in types else self._infer_sql_type(data[key])
+            columns_definitions.append(f"{key} {sql_type}")
+        return f"CREATE TABLE IF NOT EXISTS {table_name} (\n    " + ",\n    ".join(columns_definitions) + "\n);"
@@ -1,54 +1,248 @@
 import threading
-import queue
+import time
+from collections import deque
+from contextlib import contextmanager
 
 from operator_mod.logger.global_logger import Logger
 
+class _Request:
+    """A waiting acquire, queued in arrival order."""
+    __slots__ = ("write",)
+
+    def __init__(self, write: bool):
+        self.write = write
+
+class _PathLock:
+    """Fair reader/writer lock of one path. Requests are granted in arrival order, consecutive readers share the access.
+    Reentrant per thread for the mode it already holds."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.waiting = deque()
+
+        # Thread ident -> [depth, acquire time]
+        self.readers = {}
+        self.writer = None
+        self.writer_depth = 0
+        self.writer_since = 0.0
+
+        # Contention metrics
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+
+    def _grantable(self, request: _Request) -> bool:
+        if self.writer is not None:
+            return False
+        if request.write:
+            return not self.readers and self.waiting[0] is request
+        # A reader may pass other readers but never a writer that came first
+        for ahead in self.waiting:
+            if ahead is request:
+                return True
+            if ahead.write:
+                return False
+        return True
+
+    def acquire(self, write: bool, timeout: float = None) -> tuple:
+        """Returns (acquired, waited seconds)."""
+        me = threading.get_ident()
+
+        with self.condition:
+            if self.writer == me:
+                self.writer_depth += 1
+                return True, 0.0
+            if me in self.readers:
+                if write:
+                    raise RuntimeError("Cannot upgrade a shared access to an exclusive one.")
+                self.readers[me][0] += 1
+                return True, 0.0
+
+            request = _Request(write)
+            self.waiting.append(request)
+            start = time.monotonic()
+            deadline = None if timeout is None else start + timeout
+
+            try:
+                while not self._grantable(request):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self.timeouts += 1
+                        return False, time.monotonic() - start
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting.remove(request)
+                # The next ones in line may be grantable now
+                self.condition.notify_all()
+
+            now = time.monotonic()
+            if write:
+                self.writer = me
+                self.writer_depth = 1
+                self.writer_since = now
+            else:
+                self.readers[me] = [1, now]
+
+            waited = now - start
+            self.acquisitions += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            return True, waited
+
+    def release(self) -> float:
+        """Releases the access of the calling thread. Returns the hold time once fully released, None if it
+        is still held (reentrant) and raises RuntimeError if the thread holds nothing."""
+        me = threading.get_ident()
+
+        with self.condition:
+            if self.writer == me:
+                self.writer_depth -= 1
+                if self.writer_depth:
+                    return None
+                held = time.monotonic() - self.writer_since
+                self.writer = None
+            elif me in self.readers:
+                entry = self.readers[me]
+                entry[0] -= 1
+                if entry[0]:
+                    return None
+                held = time.monotonic() - entry[1]
+                del self.readers[me]
+            else:
+                raise RuntimeError("Released an access that is not held by this thread.")
+
+            self.hold_total += held
+            self.hold_max = max(self.hold_max, held)
+            self.condition.notify_all()
+            return held
+
+    def stats(self) -> dict:
+        with self.condition:
+            return {
+                "acquisitions": self.acquisitions,
+                "timeouts": self.timeouts,
+                "waiting": len(self.waiting),
+                "readers": len(self.readers),
+                "writer": self.writer is not None,
+                "wait_total": self.wait_total,
+                "wait_max": self.wait_max,
+                "wait_mean": self.wait_total / self.acquisitions if self.acquisitions else 0.0,
+                "hold_total": self.hold_total,
+                "hold_max": self.hold_max,
+            }
+
 class FileAccessManager:
-    
+    """
+    The global file access coordinator. One fair reader/writer lock per path: any number of readers share a file,
+    writers get it alone, everyone is served in arrival order. Waiting threads sleep on a condition.
+
+    Integration:
+        fam = FileAccessManager()
+
+        with fam.write_access(path):           # exclusive
+            ...
+        with fam.read_access(path, timeout=5): # shared, raises TimeoutError
+            ...
+
+        # Or the explicit form
+        if fam.get_access(path, timeout=5, shared=True):
+            try:
+                ...
+            finally:
+                fam.release_access(path)
+
+        fam.get_stats(path) -> wait/hold time metrics per path
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(FileAccessManager, cls).__new__(cls)
+            return cls._instance
+
     def __init__(self):
-        self.locks = {}
-        self.queues = {}
-        self.global_lock = threading.Lock()
-        self.logger = Logger("FileAccessManager").logger
-        self.logger.info("FileAccessManager initialized.")
-
-    def get_access(self, path):
-        self.logger.info(f"Requesting access for {path} by {threading.current_thread().name}")
+
+        if not hasattr(self, '_initialized'):
+            self._initialized = True
+            self.locks = {}
+            self.global_lock = threading.Lock()
+            self.logger = Logger("FileAccessManager").logger
+            self.logger.info("FileAccessManager initialized.")
+
+    def _path_lock(self, path: str) -> _PathLock:
         with self.global_lock:
             if path not in self.locks:
-                self.locks[path] = threading.Lock()
-                self.queues[path] = queue.Queue()
-                self.logger.info(f"Created new lock and queue for {path}")
-
-        file_lock = self.locks[path]
-        file_queue = self.queues[path]
-        
-        file_queue.put(threading.current_thread())
-        self.logger.info(f"{threading.current_thread().name} added to queue for {path}")
-
-        while file_queue.queue[0] is not threading.current_thread():
-            pass
-        
-        file_lock.acquire()
-        self.logger.info(f"{threading.current_thread().name} acquired lock for {path}")
-
-    def release_access(self, path):
-        self.logger.info(f"Releasing access for {path} by {threading.current_thread().name}")
+                self.locks[path] = _PathLock()
+            return self.locks[path]
+
+    def get_access(self, path: str, timeout: float = None, shared: bool = False) -> bool:
+        """Blocks until the calling thread has access to the path.
+
+        Args:
+            path (str): the file
+            timeout (float, optional): seconds to wait at most, None waits forever
+            shared (bool, optional): shared read access instead of exclusive access
+
+        Returns:
+            bool: False if the timeout ran out
+        """
+        acquired, waited = self._path_lock(path).acquire(not shared, timeout)
+
+        if acquired:
+            self.logger.debug(f"{threading.current_thread().name} acquired {'shared' if shared else 'exclusive'} access for {path} after {waited:.4f}s")
+        else:
+            self.logger.warning(f"{threading.current_thread().name} timed out after {waited:.2f}s waiting for {path}")
+        return acquired
+
+    def release_access(self, path: str) -> None:
+        """Releases the access of the calling thread. Releasing an access that is not held is logged and ignored."""
+        with self.global_lock:
+            path_lock = self.locks.get(path)
+
+        if path_lock is None:
+            self.logger.warning(f"Release for {path} without any access.")
+            return
+
+        try:
+            held = path_lock.release()
+        except RuntimeError as e:
+            self.logger.warning(f"{threading.current_thread().name} - {path}: {e}")
+            return
+
+        if held is not None:
+            self.logger.debug(f"{threading.current_thread().name} released {path} after {held:.4f}s")
+
+    @contextmanager
+    def read_access(self, path: str, timeout: float = None):
+        """Shared access for the with block. Raises TimeoutError if it could not be acquired in time."""
+        if not self.get_access(path, timeout, shared=True):
+            raise TimeoutError(f"No read access for {path} within {timeout}s.")
+        try:
+            yield
+        finally:
+            self.release_access(path)
+
+    @contextmanager
+    def write_access(self, path: str, timeout: float = None):
+        """Exclusive access for the with block. Raises TimeoutError if it could not be acquired in time."""
+        if not self.get_access(path, timeout):
+            raise TimeoutError(f"No write access for {path} within {timeout}s.")
+        try:
+            yield
+        finally:
+            self.release_access(path)
+
+    def get_stats(self, path: str = None) -> dict:
+        """Contention metrics (counts, wait and hold times in seconds) of one path or of all known paths."""
         with self.global_lock:
-            if path in self.locks:
-                file_lock = self.locks[path]
-                file_queue = self.queues[path]
-                
-                if file_lock.locked():
-                    file_lock.release()
-                    self.logger.info(f"{threading.current_thread().name} released lock for {path}")
-                    file_queue.get()
-                    self.logger.info(f"{threading.current_thread().name} removed from queue for {path}")
-
-    def __del__(self):
-        self.logger.info("FileAccessManager is being destroyed. Releasing all locks.")
-        # Ensure all locks are released when the manager is destroyed
-        for path, lock in self.locks.items():
-            if lock.locked():
-                lock.release()
-                print(f"Released lock for {path}")
\ No newline at end of file
+            locks = dict(self.locks)
+
+        if path is not None:
+            return locks[path].stats() if path in locks else {}
+        return {p: lock.stats() for p, lock in locks.items()}
@@ -0,0 +1,277 @@
+import collections
+import threading
+import time
+from enum import Enum
+
+from model.utils.frames.frame_ring import SharedFrameRing
+from operator_mod.logger.global_logger import Logger
+
+class FramePipeline:
+    """
+    The global hand off of new frames from the camera to the analyzers. Thread and singleton safe.
+
+    Every channel is a bounded queue, normally one per resource space. The camera pushes each new frame right after capturing it and the analyzer consumes it immediately.
+    When the analyzer falls behind the channel applies its policy, so memory and cost per frame stay flat over long runs.
+    
+    Frames pushed with put_frame are copied into a shared memory ring owned by the channel, the queue only holds FrameHandles that worker processes read from directly.
+
+    Integration:
+        pipeline.open_channel(space, maxsize, policy)
+        pipeline.put(space, item)               -> producer, returns False if dropped or no channel is open
+        pipeline.put_frame(space, frame, name)  -> producer, queues a FrameHandle to the frame in shared memory
+        item = pipeline.get(space, timeout)     -> consumer, returns None on timeout or when closed and drained
+        pipeline.close_channel(space)
+    """
+
+    class Policy(Enum):
+        BLOCK = 0           # Backpressure: the producer waits for room (at most block_timeout seconds)
+        DROP_NEWEST = 1     # The incoming frame is dropped
+        DROP_OLDEST = 2     # The oldest waiting frame is dropped in favour of the incoming one
+
+    MAXSIZE : int = 20
+    POLICY : Policy = Policy.BLOCK
+    BLOCK_TIMEOUT : float = 1.0
+    # Extra ring slots for frames that left the queue but are still analyzed, must exceed the analyzers in-flight frames
+    RING_RESERVE : int = 12
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(FramePipeline, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+
+        if hasattr(self, '_initialized') and self._initialized:
+            return
+
+        self.channels = {}
+        self.logger = Logger("FramePipeline").logger
+
+        self._initialized = True
+
+    def open_channel(self, name: str, maxsize: int = None, policy: Policy = None, block_timeout: float = None) -> None:
+        """Opens (or reconfigures) a channel. Already queued items are kept."""
+
+        with self._lock:
+            channel = self.channels.get(name)
+
+            if channel is None:
+                channel = _Channel()
+                self.channels[name] = channel
+
+        with channel.condition:
+            channel.maxsize = max(1, maxsize if maxsize else self.MAXSIZE)
+            channel.policy = policy if policy is not None else self.POLICY
+            channel.block_timeout = block_timeout if block_timeout is not None else self.BLOCK_TIMEOUT
+            channel.closed = False
+
+        self.logger.info(f"Opened frame channel {name} with size {channel.maxsize} and policy {channel.policy.name}.")
+
+    def close_channel(self, name: str) -> None:
+        """Closes and removes a channel. Waiting producers and consumers return immediately."""
+
+        with self._lock:
+            channel = self.channels.pop(name, None)
+
+        if channel is None:
+            return
+
+        with channel.condition:
+            channel.closed = True
+            dropped = len(channel.items)
+            channel.items.clear()
+            channel.condition.notify_all()
+
+            if channel.ring is not None:
+                channel.ring.close()
+                channel.ring = None
+
+        self.logger.info(f"Closed frame channel {name}: {channel.stats()} ({dropped} unconsumed).")
+
+    def put(self, name: str, item) -> bool:
+        """Pushes an item into a channel according to the channel policy.
+
+        Returns:
+            bool: True if the item was queued
+        """
+        channel = self._get_channel(name)
+
+        if channel is None:
+            return False
+
+        with channel.condition:
+            if not self._admit(channel):
+                return False
+
+            channel.items.append(item)
+            channel.pushed += 1
+            channel.condition.notify_all()
+
+        return True
+
+    def put_frame(self, name: str, frame, image_name: str, path: str = None, roi: tuple = None) -> bool:
+        """Copies a frame into the shared memory ring of a channel and queues its FrameHandle according to the channel policy.
+
+        Args:
+            name (str): channel name
+            frame (np.ndarray): the frame
+            image_name (str): name reported with the results
+            path (str, optional): where the frame gets persisted to, used as fallback by the readers. Defaults to None.
+            roi (tuple, optional): region of interest (x1, x2, y1, y2) of the full frame the analyzers work on. Defaults to None.
+
+        Returns:
+            bool: True if the frame was queued
+        """
+        channel = self._get_channel(name)
+
+        if channel is None:
+            return False
+
+        with channel.condition:
+            if not self._admit(channel):
+                return False
+
+            if channel.ring is None or not channel.ring.fits(frame):
+                if channel.ring is not None:
+                    channel.ring.close()
+
+                channel.ring = SharedFrameRing(frame.shape, frame.dtype, channel.maxsize + self.RING_RESERVE)
+
+            channel.items.append(channel.ring.write(frame, image_name, path, roi))
+            channel.pushed += 1
+            channel.condition.notify_all()
+
+        return True
+
+    def _admit(self, channel) -> bool:
+        """Makes room for one new item according to the channel policy. Must be called with the channel condition held.
+
+        Returns:
+            bool: False if the new item has to be dropped
+        """
+        if channel.closed:
+            return False
+
+        if len(channel.items) < channel.maxsize:
+            return True
+
+        if channel.policy == self.Policy.BLOCK:
+            deadline = time.monotonic() + channel.block_timeout
+
+            while len(channel.items) >= channel.maxsize and not channel.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                channel.condition.wait(remaining)
+
+            if channel.closed:
+                return False
+
+            if len(channel.items) >= channel.maxsize:
+                channel.dropped += 1
+                return False
+
+        elif channel.policy == self.Policy.DROP_NEWEST:
+            channel.dropped += 1
+            return False
+
+        elif channel.policy == self.Policy.DROP_OLDEST:
+            channel.items.popleft()
+            channel.dropped += 1
+
+        return True
+
+    def get(self, name: str, timeout: float = None):
+        """Takes the oldest item of a channel.
+
+        Args:
+            name (str): channel name
+            timeout (float, optional): seconds to wait, 0 does not wait and None waits until an item arrives or the channel closes
+
+        Returns:
+            item or None
+        """
+        channel = self._get_channel(name)
+
+        if channel is None:
+            return None
+
+        with channel.condition:
+            if timeout is None:
+                while not channel.items and not channel.closed:
+                    channel.condition.wait()
+            elif timeout > 0:
+                deadline = time.monotonic() + timeout
+                while not channel.items and not channel.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    channel.condition.wait(remaining)
+
+            if not channel.items:
+                return None
+
+            item = channel.items.popleft()
+            channel.consumed += 1
+            channel.condition.notify_all()
+
+        return item
+
+    def has_channel(self, name: str) -> bool:
+        with self._lock:
+            return name in self.channels
+
+    def depth(self, name: str) -> int:
+        """The number of waiting items in a channel."""
+
+        channel = self._get_channel(name)
+
+        if channel is None:
+            return 0
+
+        with channel.condition:
+            return len(channel.items)
+
+    def get_stats(self, name: str) -> dict:
+        """Returns the counters of a channel: pushed, consumed, dropped and depth."""
+
+        channel = self._get_channel(name)
+
+        if channel is None:
+            return {}
+
+        with channel.condition:
+            return channel.stats()
+
+    def _get_channel(self, name: str):
+        with self._lock:
+            return self.channels.get(name)
+
+    @classmethod
+    def get_instance(cls):
+        return cls._instance
+
+class _Channel:
+
+    def __init__(self):
+
+        self.items = collections.deque()
+        self.condition = threading.Condition()
+
+        self.maxsize = FramePipeline.MAXSIZE
+        self.policy = FramePipeline.POLICY
+        self.block_timeout = FramePipeline.BLOCK_TIMEOUT
+        self.closed = False
+        self.ring = None
+
+        # Counters
+        self.pushed = 0
+        self.consumed = 0
+        self.dropped = 0
+
+    def stats(self) -> dict:
+        return {"pushed": self.pushed, "consumed": self.consumed, "dropped": self.dropped, "depth": len(self.items)}
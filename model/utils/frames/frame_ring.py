@@ -0,0 +1,251 @@
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from operator_mod.logger.global_logger import Logger
+
+# Frame ids live in a small header in front of the frame slots
+_HEADER_ALIGN = 64
+
+@dataclass(frozen=True)
+class FrameHandle:
+    """A cheap to pickle reference to a frame inside a SharedFrameRing. Only the handle crosses the process boundary, the pixels stay in shared memory.
+
+    Attributes:
+        name (str): image name used for the results
+        ring (str): name of the shared memory block
+        slot (int): slot index in the ring
+        frame_id (int): running frame number, used to detect overwritten slots
+        slots (int): number of slots in the ring
+        shape (tuple): frame shape
+        dtype (str): frame dtype
+        path (str): where the frame gets persisted to, None if it is not written to disk
+        roi (tuple): region of interest (x1, x2, y1, y2) the analyzers work on, None for the full frame
+    """
+    name: str
+    ring: str
+    slot: int
+    frame_id: int
+    slots: int
+    shape: tuple
+    dtype: str
+    path: str = None
+    roi: tuple = None
+
+    def load(self) -> np.ndarray:
+        """Returns a read only view on the frame in shared memory or None if the ring is gone or the slot was overwritten."""
+        try:
+            ring = _attach(self.ring, self.slots, self.shape, self.dtype)
+        except FileNotFoundError:
+            return None
+
+        ids, frames = ring.ids, ring.frames
+
+        if ids is None or ids[self.slot] != self.frame_id:
+            return None
+
+        return frames[self.slot]
+
+    def is_valid(self) -> bool:
+        """True as long as the slot still holds this frame. Check it after reading to make sure the frame was not overwritten meanwhile."""
+        try:
+            ring = _attach(self.ring, self.slots, self.shape, self.dtype)
+        except FileNotFoundError:
+            return False
+
+        ids = ring.ids
+
+        return ids is not None and ids[self.slot] == self.frame_id
+
+class SharedFrameRing:
+    """A fixed size ring of preallocated frame slots in shared memory. Written by the capturing process, read zero-copy by the analysis workers.
+
+    Integration:
+        ring = SharedFrameRing(shape, dtype, slots)
+        handle = ring.write(frame, name, path)  -> hand the handle to a worker
+        frame = handle.load()                   -> in the worker
+        ring.close()
+    """
+
+    def __init__(self, shape: tuple, dtype, slots: int):
+
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+
+        header, size = _layout(self.slots, self.shape, self.dtype)
+
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        
+        # The one memoryview of the ring all frame views are built on, released explicitly on close
+        self.buf = memoryview(self.shm.buf)
+        self.ids, self.frames = _views(self.buf, self.slots, self.shape, self.dtype, header)
+
+        self.ids[:] = -1
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        # Readers in the owning process use the ring directly
+        with _attached_lock:
+            _owned[self.shm.name] = self
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def fits(self, frame: np.ndarray) -> bool:
+        return frame.shape == self.shape and frame.dtype == self.dtype
+
+    def write(self, frame: np.ndarray, name: str, path: str = None, roi: tuple = None) -> FrameHandle:
+        """Copies a frame into the next slot and returns its handle."""
+
+        with self._lock:
+            frame_id = self._next_id
+            self._next_id += 1
+            slot = frame_id % self.slots
+
+            # Invalidating the slot first lets readers notice a partially written frame
+            self.ids[slot] = -1
+            np.copyto(self.frames[slot], frame)
+            self.ids[slot] = frame_id
+
+        return FrameHandle(name, self.name, slot, frame_id, self.slots, self.shape, self.dtype.str, path, roi)
+
+    def close(self) -> None:
+        """Releases and unlinks the shared memory. Workers that are attached keep their mapping until they detach, frames still held
+        in this process keep it until they are dropped."""
+
+        with self._lock:
+            if self.shm is None:
+                return
+
+            with _attached_lock:
+                _owned.pop(self.shm.name, None)
+
+            self.ids = None
+            self.frames = None
+
+            if not _close(self.shm, self.buf):
+                Logger("FramePipeline").logger.warning(f"Shared frame ring {self.shm.name} closed while frames of it were still in use.")
+            
+            # The name goes away in any case, the memory itself once the last view is dropped
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+            self.shm = None
+            self.buf = None
+
+### Worker process side ###
+# Rings are attached once per process, the oldest attachment is released when a process holds too many
+_MAX_ATTACHED = 4
+
+_owned = {}
+_attached = {}
+_attached_lock = threading.Lock()
+
+# Blocks whose mapping could not be closed yet because frames of them were still held, closing is retried with every later close
+_lingering = []
+
+class _AttachedRing:
+
+    def __init__(self, name: str, slots: int, shape: tuple, dtype: str):
+
+        header, _ = _layout(slots, shape, np.dtype(dtype))
+
+        self.shm = _attach_untracked(name)
+
+        self.buf = memoryview(self.shm.buf)
+        self.ids, self.frames = _views(self.buf, slots, shape, np.dtype(dtype), header)
+        self.frames.flags.writeable = False
+
+    def detach(self) -> None:
+
+        self.ids = None
+        self.frames = None
+
+        # A caller still holding a frame keeps the mapping until it drops it
+        _close(self.shm, self.buf)
+        self.buf = None
+
+def _attach(name: str, slots: int, shape: tuple, dtype: str):
+
+    with _attached_lock:
+        ring = _owned.get(name) or _attached.get(name)
+
+        if ring is None:
+            if len(_attached) >= _MAX_ATTACHED:
+                oldest = next(iter(_attached))
+                _attached.pop(oldest).detach()
+
+            ring = _AttachedRing(name, slots, shape, dtype)
+            _attached[name] = ring
+
+        return ring
+
+def _layout(slots: int, shape: tuple, dtype: np.dtype) -> tuple:
+
+    header = -(-slots * 8 // _HEADER_ALIGN) * _HEADER_ALIGN
+    size = header + slots * int(np.prod(shape)) * dtype.itemsize
+
+    return header, size
+
+def _views(buf: memoryview, slots: int, shape: tuple, dtype: np.dtype, header: int) -> tuple:
+    """The frame id header and the frame slots on the memoryview of a shared memory block. Other than np.ndarray(buffer=...) the views of
+    np.frombuffer hold an export of the mapping, so it cannot be unmapped while a frame is still in use."""
+
+    ids = np.frombuffer(buf, dtype=np.int64, count=slots)
+    frames = np.frombuffer(buf, dtype=dtype, count=slots * int(np.prod(shape)), offset=header).reshape(slots, *shape)
+
+    return ids, frames
+
+def _close(shm: shared_memory.SharedMemory, buf: memoryview) -> bool:
+    """Releases the memoryview of a ring and closes its shared memory block.
+
+    Both only work once no frame view exports the mapping anymore, before that memoryview.release and SharedMemory.close raise a
+    BufferError and leave the mapping open. Such blocks are kept in _lingering and closed by a later call once their frames are dropped.
+
+    Returns:
+        bool: False if frames were still alive, the mapping then stays until the last one is dropped
+    """
+    with _attached_lock:
+        blocks = _lingering[:] + [(shm, buf)]
+        _lingering.clear()
+
+    still_open = [block for block in blocks if not _try_close(*block)]
+
+    with _attached_lock:
+        _lingering.extend(still_open)
+
+    return not any(block is shm for block, _ in still_open)
+
+def _try_close(shm: shared_memory.SharedMemory, buf: memoryview) -> bool:
+    try:
+        # Releasing a released memoryview is a no-op, a retry only has to get past the close
+        buf.release()
+        shm.close()
+        return True
+    except BufferError:
+        return False
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """Attaches to an existing block. Attaching processes must not unlink the block on exit, only the owner does.
+
+    Up to Python 3.12 every SharedMemory registers with the POSIX resource tracker, which unlinks the block when the attaching process exits.
+    Python 3.13 added track=False for this, older versions unregister by hand under the name the tracker got ("/" + name on POSIX).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+
+    if os.name == "posix":
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister("/" + shm.name, "shared_memory")
+
+    return shm
@@ -0,0 +1,202 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+
+import cv2
+import numpy as np
+
+from operator_mod.logger.global_logger import Logger
+
+class ImageWriter:
+    """
+    Asynchronous image writer for the capture states. Frames are queued and written by a small thread pool, so the capture loop never waits on the disk.
+
+    The queue is bounded by the bytes of the waiting frames, not their number, so the memory it holds is the same for small and 4K frames.
+    When the disk cannot keep up the queue fills and new frames are dropped (and counted) instead of slowing down the capture. A dropped frame
+    leaves a gap in the numbering of the written files, the file based analyses have to take the frame number from the file name.
+
+    Integration:
+        writer = ImageWriter(ImageWriter.Format.PNG, png_compression=1)
+        filepath = writer.submit(frame, os.path.join(folder, "Image_0"), callback)  -> extension is added, None if dropped
+        writer.get_stats()  -> submitted, written, dropped, failed, queue depth and bytes
+        writer.close()
+    """
+
+    class Format(Enum):
+        BMP = ".bmp"        # Uncompressed
+        PNG = ".png"        # Lossless, compression level 0-9
+        TIFF = ".tiff"      # Lossless (LZW)
+        NPY = ".npy"        # Raw numpy array, fastest to write and read
+
+    FORMAT : Format = Format.PNG
+    # Level 1 is fast and still roughly halves the size of the raw frames
+    PNG_COMPRESSION : int = 1
+    # Bytes of frames waiting for the disk, roughly 20 4K color frames or 130 full HD gray frames
+    MAX_BYTES : int = 512 * 1024 ** 2
+    WORKERS : int = 2
+    # Frames a worker takes from the queue at once
+    BATCH_SIZE : int = 8
+
+    def __init__(self, image_format: Format = None, png_compression: int = None, max_bytes: int = None, workers: int = None):
+
+        self.logger = Logger("ImageWriter").logger
+
+        self.format = image_format if image_format is not None else self.FORMAT
+        self.png_compression = png_compression if png_compression is not None else self.PNG_COMPRESSION
+        self.workers = workers if workers else self.WORKERS
+
+        # The queue itself is unbounded, submit keeps the queued bytes under max_bytes
+        self.queue = queue.Queue()
+        self.max_bytes = max_bytes if max_bytes else self.MAX_BYTES
+
+        # Metrics
+        self._lock = threading.Lock()
+        self.queued_bytes = 0
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+
+        self._closed = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        for _ in range(self.workers):
+            self._executor.submit(self._worker)
+
+    @property
+    def extension(self) -> str:
+        return self.format.value
+
+    def submit(self, frame: np.ndarray, basepath: str, callback=None) -> str | None:
+        """Queues a frame for writing without blocking.
+
+        Args:
+            frame (np.ndarray): the frame, must not be modified afterwards
+            basepath (str): target path without extension
+            callback (callable, optional): called as callback(filepath) in the writer thread after the frame is written. Defaults to None.
+
+        Returns:
+            str | None: the final file path, None if the frame was dropped
+        """
+        filepath = basepath + self.extension
+
+        if self._closed.is_set():
+            return None
+
+        with self._lock:
+            # A frame larger than the whole budget is still taken when nothing else waits
+            full = self.queued_bytes > 0 and self.queued_bytes + frame.nbytes > self.max_bytes
+
+            if full:
+                self.dropped += 1
+            else:
+                self.queued_bytes += frame.nbytes
+                self.submitted += 1
+
+        if full:
+            self.logger.warning(f"Writer queue full ({self.queued_bytes / 1024 ** 2:.0f} MB), dropped {os.path.basename(filepath)}.")
+            return None
+
+        self.queue.put_nowait((frame, filepath, callback))
+
+        with self._lock:
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+
+        return filepath
+
+    def _worker(self) -> None:
+
+        while not (self._closed.is_set() and self.queue.empty()):
+            try:
+                batch = [self.queue.get(timeout=0.25)]
+            except queue.Empty:
+                continue
+
+            # Draining what is already waiting keeps the worker busy in bursts
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for frame, filepath, callback in batch:
+                self._write(frame, filepath, callback)
+
+                # The frame is released with the write, no matter if it succeeded
+                with self._lock:
+                    self.queued_bytes -= frame.nbytes
+
+    def _write(self, frame: np.ndarray, filepath: str, callback) -> None:
+
+        try:
+            if not write_image(filepath, frame, self.png_compression):
+                raise IOError("encoder returned False")
+
+            with self._lock:
+                self.written += 1
+
+            if callback is not None:
+                callback(filepath)
+
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            self.logger.warning(f"Could not write image {filepath}: {e}.")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "depth": self.queue.qsize(),
+                "max_depth": self.max_depth,
+                "queued_bytes": self.queued_bytes
+            }
+
+    def close(self, wait: bool = True) -> None:
+        """Stops accepting frames. With wait the queued frames are written first."""
+
+        self._closed.set()
+
+        if not wait:
+            while True:
+                try:
+                    frame, _, _ = self.queue.get_nowait()
+                    with self._lock:
+                        self.dropped += 1
+                        self.queued_bytes -= frame.nbytes
+                except queue.Empty:
+                    break
+
+        self._executor.shutdown(wait=wait)
+        self.logger.info(f"Image writer closed: {self.get_stats()}.")
+
+def write_image(filepath: str, frame: np.ndarray, png_compression: int = ImageWriter.PNG_COMPRESSION) -> bool:
+    """Writes a frame in the format given by the file extension."""
+
+    extension = os.path.splitext(filepath)[1].lower()
+
+    if extension == ".npy":
+        np.save(filepath, frame)
+        return True
+
+    elif extension == ".png":
+        return cv2.imwrite(filepath, frame, [cv2.IMWRITE_PNG_COMPRESSION, png_compression])
+
+    elif extension in (".tif", ".tiff"):
+        # 5 is LZW, lossless
+        return cv2.imwrite(filepath, frame, [cv2.IMWRITE_TIFF_COMPRESSION, 5])
+
+    return cv2.imwrite(filepath, frame)
+
+def read_image(filepath: str, flags: int = cv2.IMREAD_ANYCOLOR | cv2.IMREAD_ANYDEPTH) -> np.ndarray:
+    """Reads a frame written by the ImageWriter, including raw .npy frames."""
+
+    if os.path.splitext(filepath)[1].lower() == ".npy":
+        return np.load(filepath)
+
+    return cv2.imread(filepath, flags)
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+import numpy as np
+
+# Annotated result images are handed from the worker processes to the gui as .npy files in here instead of being pickled
+OVERLAY_DIR = os.path.join(tempfile.gettempdir(), "analysis_overlays")
+
+def write_overlay(image: np.ndarray) -> str:
+    """Writes an overlay image into a temporary memmap file. Called in the worker process.
+
+    Args:
+        image (np.ndarray): annotated result image
+
+    Returns:
+        str: path of the .npy file, the only thing that crosses the process boundary
+    """
+    os.makedirs(OVERLAY_DIR, exist_ok=True)
+
+    fd, path = tempfile.mkstemp(suffix=".npy", prefix="overlay_", dir=OVERLAY_DIR)
+    os.close(fd)
+
+    mapped = np.lib.format.open_memmap(path, mode="w+", dtype=image.dtype, shape=image.shape)
+    mapped[...] = image
+    mapped.flush()
+    del mapped
+
+    return path
+
+def read_overlay(image: str | np.ndarray) -> np.ndarray:
+    """Maps an overlay file read only, the pixels are paged in from the file when they are displayed.
+
+    Args:
+        image (str | np.ndarray): path from write_overlay, arrays are passed through
+
+    Returns:
+        np.ndarray: the overlay or None if the file is gone
+    """
+    if not isinstance(image, str):
+        return image
+
+    try:
+        return np.load(image, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+def discard_overlay(path: str) -> bool:
+    """Deletes an overlay file. On Windows a file that is still mapped stays, the caller keeps it for discard_overlays.
+
+    Returns:
+        bool: True if the file is gone
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except (OSError, TypeError):
+        return path is None
+
+    return True
+
+def discard_overlays(paths) -> set:
+    """Deletes the given overlay files, only the ones of the caller. The directory is shared with other analyses and windows that may still read theirs.
+
+    Args:
+        paths (Iterable[str]): overlay files the caller could not discard before
+
+    Returns:
+        set: the files that are still mapped and could not be deleted yet
+    """
+    return {path for path in paths if not discard_overlay(path)}
@@ -0,0 +1,59 @@
+import json
+import os
+
+import numpy as np
+
+# A region of interest is (x1, x2, y1, y2) in full frame pixels like Camera.area_of_interests: x are rows, y are columns.
+# None stands for the full frame.
+
+# Frames are persisted whole, the region of interest of a capture is stored next to its images in this file
+ROI_FILE = "roi.json"
+
+def crop(frame: np.ndarray, roi: tuple = None) -> np.ndarray:
+    """Returns the region of interest of a frame as a view, no pixels are copied.
+
+    Args:
+        frame (np.ndarray): full frame
+        roi (tuple, optional): (x1, x2, y1, y2) rows x, columns y. Defaults to None -> full frame.
+    """
+    if roi is None:
+        return frame
+
+    x1, x2, y1, y2 = roi
+    return frame[x1:x2, y1:y2]
+
+def offset(roi: tuple = None) -> tuple:
+    """The (column, row) position of the region of interest in the full frame, what has to be added to image
+    coordinates (cv2 point order) found inside the crop to get full frame coordinates."""
+    if roi is None:
+        return 0, 0
+
+    x1, _, y1, _ = roi
+    return y1, x1
+
+def save(folder: str, roi: tuple = None) -> None:
+    """Stores the region of interest of the images in folder, the file based analyses read it back with load.
+
+    Args:
+        folder (str): image folder of the capture
+        roi (tuple, optional): (x1, x2, y1, y2). Defaults to None -> full frame.
+    """
+    tmp = os.path.join(folder, ROI_FILE + ".tmp")
+
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump({"roi": None if roi is None else [int(v) for v in roi]}, file)
+
+    # Readers never see a half written file
+    os.replace(tmp, os.path.join(folder, ROI_FILE))
+
+def load(folder: str) -> tuple | None:
+    """The region of interest stored for the images in folder, None if there is none (full frame)."""
+    path = os.path.join(folder, ROI_FILE)
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path, encoding="utf-8") as file:
+        roi = json.load(file).get("roi")
+
+    return tuple(roi) if roi is not None else None
@@ -81,6 +81,9 @@ class InMemoryData:
         
         # CAMERA
         AREA_OF_INTERST = "AreaOfInterest"
+        CAMERA_IMAGE_FORMAT = "CameraImageFormat"
+        CAMERA_WRITER_STATS = "CameraWriterStats"
+        CAMERA_FRAME_ROI = "CameraFrameRoi"
         
         # PUMP
         PUMP_UNLOAD_VOLUME = "PumpUnloadVolume"
@@ -108,12 +111,18 @@ class InMemoryData:
         CURRENT_SLOT_FOLDER_IMAGES = "CurrentSlotFolderImages"
         CURRENT_SLOT_RESULT_DB = "CurrentResultDB"
         
+        ANALYSIS_THROUGHPUT = "AnalysisThroughput"
+        FRAME_PIPELINE_POLICY = "FramePipelinePolicy"
+        FRAME_PIPELINE_SIZE = "FramePipelineSize"
+        BUBBLE_SIZER_DENOISE_MODE = "BubbleSizerDenoiseMode"
+        
         CALIBRATION_IMAGE_PATH = "CalibrationImagePath"
         LIVE_TEMPERATURE = "LiveTemperature"
         
         LIGHTMODE = "ArduinoLightmode"
         CAMERA_LIGHTSWITCHING = "CameraLightmode"
         CAMERA_MASSFLOW_INTERRUPT = "CameraMassflowInterrupt"
+        CAMERA_PERSIST_IMAGES = "CameraPersistImages"
         
         # MIXING TIME
         CURRENT_MIXINGTIME_WIDGET = "CurrentMixingTimeWidget"
@@ -130,6 +139,8 @@ class InMemoryData:
         MIXING_TIME_RESULT_STRUCT = "MixingTimeResultStruct"
         
         LOCAL_MIXING_TIME_CALC = "LocalMixingTimeCalc"
+        # Frame channel the mixing time capture streams into, None when the images are only written to disk
+        CURRENT_MIXINGTIME_CHANNEL = "CurrentMixingTimeChannel"
         
         # Project Management
         PROJECT_FOLDER_CONFIG = "ProjectFolderConfig"
@@ -165,6 +176,9 @@ class InMemoryData:
         PELLET_SIZER_IMAGES = "PelletSizerImages"
         PELLET_SIZER_IMAGE_SETTINGS = "PelletSizerImageSettings"
         PELLET_SIZER_RESULT = "PelletSizerResult"
+        PELLET_SIZER_TILED = "PelletSizerTiled"
+        PELLET_SIZER_MAX_PELLET_SIZE = "PelletSizerMaxPelletSize"
+        PELLET_SIZER_VISUALIZATION = "PelletSizerVisualization"
         
         PELLET_SIZER_WIDGET_REFERENCE = "PelletSizerWidgetReference"
         BUBBLE_SIZER_WIDGET_REFERENCE = "BubbleSizeWidgetReference"
@@ -17,6 +17,8 @@ from operator_mod.logger.progress_logger import ProgressLogger
 from operator_mod.eventbus.event_handler import EventManager
 
 from model.utils.resource_manager import ResourceManager
+from model.utils.frames.frame_pipeline import FramePipeline
+from model.utils.SQL.sql_manager import SQLManager
 
 class MeasurementRunner(threading.Thread):
     
@@ -25,6 +27,9 @@ class MeasurementRunner(threading.Thread):
     
     _instance = None
     
+    # Seconds the analysis may take after the last slot to work off the frames that are still queued
+    ANALYSIS_DRAIN_TIMEOUT : int = 120
+    
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super(MeasurementRunner, cls).__new__(cls)
@@ -49,6 +54,7 @@ class MeasurementRunner(threading.Thread):
         self.events = EventManager.get_instance()
 
         self.resman = ResourceManager.get_instance()       
+        self.pipeline = FramePipeline()
         
         # Data
         self.routine = routine
@@ -149,6 +155,16 @@ class MeasurementRunner(threading.Thread):
             self.logger.info("Switiching to next slot.")
 
         self.reset_flags_and_devices()
+        
+        # The analysis states still work off the queued frames, the workers and the result databases have to outlive them
+        if not self.algman.worker_pool.wait_released(self.ANALYSIS_DRAIN_TIMEOUT):
+            self.logger.warning("Analysis did not finish the queued frames in time, the remaining ones are dropped.")
+        
+        # The analysis workers live for the whole measurement
+        self.algman.worker_pool.shutdown()
+        
+        # Result DB connections are kept open for the measurement, closing checkpoints them into the .db files
+        SQLManager().close()
 
         # Purgin the Scorespace
         self.progress_logger.del_scorespace(self.slotname, True)
@@ -303,6 +319,13 @@ class MeasurementRunner(threading.Thread):
         
         # Checking the different algorithms
         if algorithm == RoutineData.AlgorithmType.BUBBLE_SIZE:
+            # The camera streams new frames through the resource space channel straight into the analyzer
+            resourcespace = self.data.get_data(self.data.Keys.CURRENT_RESOURCE_SPACE, self.data.Namespaces.MEASUREMENT)
+            maxsize = self.data.get_data(self.data.Keys.FRAME_PIPELINE_SIZE, self.data.Namespaces.MEASUREMENT)
+            policy = self.data.get_data(self.data.Keys.FRAME_PIPELINE_POLICY, self.data.Namespaces.MEASUREMENT)
+            
+            self.pipeline.open_channel(resourcespace, maxsize, policy)
+            
             self.algman.add_task(self.algman.States.BUBBLE_SIZER_STATE, self.runtime_seconds)
             
         elif algorithm == RoutineData.AlgorithmType.PELLET_SIZE:
@@ -5,6 +5,7 @@ import time
 from operator_mod.in_mem_storage.in_memory_data import InMemoryData
 from operator_mod.logger.global_logger import Logger
 from operator_mod.logger.progress_logger import ProgressLogger
+from model.utils.frames.frame_pipeline import FramePipeline
 
 from controller.algorithms.algorithm_manager_class.algorithm_manager import AlgorithmManager
 from controller.device_handler.devices.camera_device.camera import Camera
@@ -17,6 +18,14 @@ class MixingTimeRunner(threading.Thread):
     _instance = None
     runtime : int = 15
     
+    # Analyze the frames while capturing instead of reading the folder afterwards
+    streaming : bool = True
+    STREAM_CHANNEL : str = "MixingTime"
+    # Seconds the stream analysis may take after the capture ended to drain the channel
+    STREAM_DRAIN : int = 10
+    # Seconds the runner waits for the stream analysis to release the worker pool before shutting it down
+    ANALYSIS_DRAIN_TIMEOUT : int = 60
+    
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super(MixingTimeRunner, cls).__new__(cls)
@@ -68,12 +77,36 @@ class MixingTimeRunner(threading.Thread):
         
         self.cleanup()
         
-        self.algman.add_task(self.algman.States.MIXING_TIMER_STATE, 0)
+        # The stream analysis was queued in prepare and finishes on its own
+        if not self.streaming:
+            self.algman.add_task(self.algman.States.MIXING_TIMER_STATE, 0)
+        else:
+            self.shutdown_analysis()
+    
+    def shutdown_analysis(self):
+        """Shuts the analysis workers down once the stream analysis drained the channel.
+        A pool that is still in use by other states after ANALYSIS_DRAIN_TIMEOUT stays up, its users release it and the measurement runner shuts it down."""
+        
+        if not self.algman.worker_pool.wait_released(self.ANALYSIS_DRAIN_TIMEOUT):
+            self.logger.warning("Analysis worker pool is still in use, it is left running.")
+            return
+        
+        self.algman.worker_pool.shutdown()
         
     def prepare(self):
         """
         Brings the camera, mfc and pump into the correct state for the measurement. Alles devices have a threading.Event() to wait for their start.
         """
+        # Streaming analysis, it has to know the channel and the region of interest before the first frame
+        if self.streaming:
+            FramePipeline().open_channel(self.STREAM_CHANNEL)
+            self.data.add_data(self.data.Keys.CURRENT_MIXINGTIME_CHANNEL, self.STREAM_CHANNEL, self.data.Namespaces.MIXING_TIME)
+            self.data.add_data(self.data.Keys.CAMERA_FRAME_ROI, self.camera.get_roi(), self.data.Namespaces.CAMERA)
+            
+            self.algman.add_task(self.algman.States.MIXING_TIMER_STREAM_STATE, self.runtime + self.STREAM_DRAIN)
+        else:
+            self.data.add_data(self.data.Keys.CURRENT_MIXINGTIME_CHANNEL, None, self.data.Namespaces.MIXING_TIME)
+        
         # Camera
         self.camera.add_task(self.camera.States.MT_IMAGE_CAPTURE_STATE, self.runtime)
         
@@ -1,12 +1,10 @@
 import tempfile
 import os
-import shutil
 
 from PySide6.QtWidgets import QWidget, QTableView, QVBoxLayout, QPushButton, QComboBox
 from PySide6.QtSql import QSqlDatabase, QSqlTableModel
 
 from model.utils.SQL.sql_manager import SQLManager
-from model.utils.file_access.file_access_manager import FileAccessManager
 
 from operator_mod.logger.global_logger import Logger
 from operator_mod.in_mem_storage.in_memory_data import InMemoryData
@@ -18,7 +16,6 @@ class DataBaseForm(QWidget):
         super().__init__()
 
         self.sql = SQLManager()
-        self.file_access = FileAccessManager()
         self.data = InMemoryData()
         self.logger = Logger("Application").logger
 
@@ -60,8 +57,8 @@ class DataBaseForm(QWidget):
             # Create a new temp file path and copy database
             fd, self.new_temp_path = tempfile.mkstemp(suffix=".sqlite")
             os.close(fd)  # Close the file descriptor since we only need the path
-            self.file_access.get_access(self.path)
-            shutil.copyfile(self.path, self.new_temp_path)
+            # The backup includes rows still in the write ahead log of a live database
+            self.sql.snapshot(self.path, self.new_temp_path)
             
             if self.db is None:
                 conn_name = f'unique_connection_{self.uid}'
@@ -82,8 +79,6 @@ class DataBaseForm(QWidget):
             
         except Exception as e:
             self.logger.error(f"Error copying database: {e}")
-        finally:
-            self.file_access.release_access(self.path)
 
     def load_data(self):
 
@@ -45,6 +45,10 @@ class UIMixingTime(QWidget):
         self.data.add_data(self.data.Keys.CURRENT_MIXINGTIME_WIDGET, self, self.data.Namespaces.MIXING_TIME)
         
         self.timer = None
+        
+        # Frames already in each results database, the streaming mixing time publishes the same measurement again with its final frames
+        self.written_frames = {}
+        
         # State switches
         self.calibration_done = False
         
@@ -225,13 +229,12 @@ class UIMixingTime(QWidget):
             self.logger.warning("Data Mixing Time Struct is None!")
             return
         
-        x_time_values =[i for i in range(len(data.global_mixing_data["entropy"].keys()))] 
-        entropy_value_list = []
-        variance_value_list = []
+        # Frames that failed stay NaN in the arrays and are left out
+        frame_indices = data.frame_indices
         
-        for img in data.global_mixing_data["entropy"].keys():
-            entropy_value_list.append(data.global_mixing_data["entropy"][img])
-            variance_value_list.append(data.global_mixing_data["variance"][img])
+        x_time_values = frame_indices.tolist()
+        entropy_value_list = data.entropy[frame_indices].tolist()
+        variance_value_list = data.variance[frame_indices].tolist()
         
         # Using this later
         # entropy_normed = [float(i)/sum(entropy_value_list) for i in entropy_value_list]
@@ -254,13 +257,17 @@ class UIMixingTime(QWidget):
             title="Variance over frames"
         )
     
-        if self.result_plots_widget.count() > 0:
-            for i in range(self.result_plots_widget.count() -1):
-                self.result_plots_widget.removeTab(i)
+        # A later publish of the same measurement replaces all result tabs
+        self.result_plots_widget.clear()
     
         self.result_plots_widget.addTab(plotted_entropy_widget, "Entropy")
         self.result_plots_widget.addTab(plotted_variance_widget, "Variance")
         
+        # Only with the local mixing time there is a tile cube
+        local = data.local_mixing_times()
+        if local is not None:
+            self.result_plots_widget.addTab(plotter.plot_mixingtime_heatmap(local), "Local Mixing Time")
+        
         self.stacked_layout.setCurrentIndex(4)
         
         databse_path = self._write_results(x_time_values, entropy_value_list, variance_value_list)
@@ -288,15 +295,21 @@ class UIMixingTime(QWidget):
         dirpath = self.data.get_data(self.data.Keys.CURRENT_MIXINGTIME_FOLDER_DATA, self.data.Namespaces.MIXING_TIME)
         filepath = os.path.join(dirpath, 'results.db')
         
+        written = self.written_frames.setdefault(filepath, set())
+        new_frames = [i for i in range(len(frames)) if frames[i] not in written]
+        
+        if not new_frames:
+            return filepath
+        
         table, _ = self.sql.generate_sql_statements('GlobalMixingTimeRawData', {
-                'Frame' : frames[0],
-                'Entropy' : entropy[0],
-                'Variance' : variance[0]
+                'Frame' : frames[new_frames[0]],
+                'Entropy' : entropy[new_frames[0]],
+                'Variance' : variance[new_frames[0]]
             })
         
         self.sql.read_or_write(filepath, table, "write")
         
-        for i in range(len(frames)):
+        for i in new_frames:
             
             table, query = self.sql.generate_sql_statements('GlobalMixingTimeRawData', {
                 'Frame' : frames[i],
@@ -304,6 +317,7 @@ class UIMixingTime(QWidget):
                 'Variance' : variance[i]
             })
             self.sql.read_or_write(filepath, query, "write")
+            written.add(frames[i])
         
         return filepath
     
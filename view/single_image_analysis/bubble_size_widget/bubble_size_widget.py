@@ -11,6 +11,8 @@ from view.single_image_analysis.graphics_view_widget import ImageDisplay
 
 from controller.algorithms.algorithm_manager_class.algorithm_manager import AlgorithmManager
 from model.utils.SQL.sql_manager import SQLManager
+from model.utils.frames.overlay import read_overlay, discard_overlay, discard_overlays
+from controller.algorithms.bubble_sizer.steps.postprocessor import COLUMNS, COLUMN_TYPES, result_rows
 from operator_mod.in_mem_storage.in_memory_data import InMemoryData
 from operator_mod.eventbus.event_handler import EventManager
 from operator_mod.logger.global_logger import Logger
@@ -35,6 +37,9 @@ class BubbleSizeWidget(QTabWidget):
         
         self.logger = Logger("Application").logger        
         
+        # Overlay files of this form that could not be deleted while they were mapped
+        self.overlay_paths = set()
+        
     def setupForm(self):
         
         setupwidget = QWidget()
@@ -154,6 +159,9 @@ class BubbleSizeWidget(QTabWidget):
             
             while self.count() > 1:
                 self.removeTab(self.count() - 1)
+            
+            # Overlays of this form that were still mapped when their results were shown
+            self.overlay_paths = discard_overlays(self.overlay_paths)
                 
         # The paths are already in the datastore anyways (see calib dialog button)
         
@@ -166,10 +174,15 @@ class BubbleSizeWidget(QTabWidget):
         
         # fetch the results
         results = self.data.get_data(self.data.Keys.SI_RESULT, self.data.Namespaces.DEFAULT)
-        data, image = results
+        data, overlay_path = results
+        
+        # The overlay comes from the worker as a memmap file, the mapping outlives the file
+        image = read_overlay(overlay_path)
+        if not discard_overlay(overlay_path):
+            self.overlay_paths.add(overlay_path)
 
         # Now we put the results onto the img and show it
-        if data is None or data['Data'] == []:
+        if data is None or len(data['Data'][COLUMNS[0]]) == 0:
             
             from view.main.mainframe import MainWindow
             
@@ -203,7 +216,7 @@ class BubbleSizeWidget(QTabWidget):
         
         try:
  
-            ellipse_list = data["Data"]
+            ellipse_list = result_rows(data["Data"])
 
             widget = self._setup_visual_result_tab(image)
             tablewidget = self._setup_result_table(ellipse_list)
@@ -276,7 +289,7 @@ class BubbleSizeWidget(QTabWidget):
             save_button.pressed.connect(lambda: self._save_result_table_button_action(results))
             
             model = QStandardItemModel()
-            model.setHorizontalHeaderLabels(["CenterX", "CenterY", "EquivalentDiameter", "Area", "SurfaceArea", "Volume", "SpecificSurfaceVolume", "SauterDiameter", "Circularity"])
+            model.setHorizontalHeaderLabels(COLUMNS)
 
             for item in results:
                 row = []
@@ -310,22 +323,7 @@ class BubbleSizeWidget(QTabWidget):
                 resultname = f"result_data_{today}.db"
                 filepath = os.path.join(directorypath, resultname)
                 
-                keys = ["CenterX", "CenterY", "EquivalentDiameter", "Area", "SurfaceArea", "Volume", "SpecificSurfaceVolume", "SauterDiameter", "Circularity"]
-                data_dict = {}
-                
-                for ellipse in results:
-                    
-                    if not ellipse:
-                        for i, key in enumerate(keys):
-                            data_dict[key] = "Faulty Data"
-                    else:
-                        for i, key in enumerate(keys):
-                            data_dict[key] = ellipse[i]
-                
-                    table, insert = self.sqlmanager.generate_sql_statements("Results", data_dict)
-                    
-                    self.sqlmanager.read_or_write(filepath, table, "write")
-                    self.sqlmanager.read_or_write(filepath, insert, "write")                                
+                self.sqlmanager.bulk_write(filepath, "Results", COLUMNS, results, COLUMN_TYPES)                                
                 
             except Exception as e:
                 self.logger.warning(f"Could not save results: {e}.")
\ No newline at end of file
@@ -1,8 +1,9 @@
 
 import csv
 import os
+import threading
 from tkinter import Image
-from PySide6.QtWidgets import QTabWidget, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QProgressBar, QTableView, QFileDialog, QMessageBox
+from PySide6.QtWidgets import QTabWidget, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox, QLabel, QPushButton, QProgressBar, QTableView, QFileDialog, QMessageBox, QCheckBox, QSpinBox
 from PySide6.QtCore import QThread, Signal, QElapsedTimer
 from PySide6.QtGui import QStandardItemModel, QStandardItem
 
@@ -13,6 +14,9 @@ import numpy as np
 from view.single_image_analysis.graphics_view_widget import ImageDisplaySettings, ImageDisplay
 
 from controller.algorithms.algorithm_manager_class.algorithm_manager import AlgorithmManager
+from controller.algorithms.pellet_sizer.steps.postprocessing import COLUMNS
+from controller.algorithms.pellet_sizer.steps.tiling import TiledProcessor
+from model.utils.frames.overlay import read_overlay, discard_overlay, discard_overlays
 from operator_mod.in_mem_storage.in_memory_data import InMemoryData
 from operator_mod.eventbus.event_handler import EventManager
 from operator_mod.logger.global_logger import Logger
@@ -20,6 +24,9 @@ from operator_mod.logger.global_logger import Logger
 class PelletSizeWidghet(QTabWidget):
 
     pellet_sizing_done = Signal()
+    
+    # (image index, result or None) for every finished image while the analysis runs
+    pellet_result_ready = Signal(int, object)
 
     def __init__(self):
         
@@ -33,6 +40,14 @@ class PelletSizeWidghet(QTabWidget):
         self.logger = Logger("Application").logger   
         
         self.pellet_sizing_done.connect(self.display_results)
+        self.pellet_result_ready.connect(self._pellet_result_ready)
+        
+        # Set to stop the images that did not start yet, see PelletSizerSingleState
+        self.cancel_event = threading.Event()
+        
+        # Overlay files of this form that could not be deleted while they were mapped
+        self.overlay_paths = set()
+        self.finished_images = 0
         
         # Adding a reference to self into the datastore
         self.data.add_data(self.data.Keys.PELLET_SIZER_WIDGET_REFERENCE, self, self.data.Namespaces.DEFAULT)
@@ -72,8 +87,37 @@ class PelletSizeWidghet(QTabWidget):
         imagelayout.addWidget(delete_image_button)
         
         ### Adding a few custom settings
+        settings_groupbox = QGroupBox("Settings")
+        settings_layout = QGridLayout()
+        
+        # Large images are cut into overlapping strips that are processed in parallel
+        self.tiled_checkbox = QCheckBox("Tiled processing (large images)")
+        self.tiled_checkbox.stateChanged.connect(lambda: self.max_pellet_size.setEnabled(self.tiled_checkbox.isChecked()))
+        
+        # The strips overlap by the largest pellet, taller pellets get lost at the cuts
+        max_pellet_size_label = QLabel("Max. pellet size: ")
+        self.max_pellet_size = QSpinBox()
+        self.max_pellet_size.setRange(16, 4096)
+        self.max_pellet_size.setSingleStep(16)
+        self.max_pellet_size.setValue(TiledProcessor.OVERLAP)
+        self.max_pellet_size.setEnabled(False)
+        max_pellet_size_unit = QLabel("px")
+        
+        # Without the result images the workers skip rendering the overlays
+        self.overlay_checkbox = QCheckBox("Show result images")
+        self.overlay_checkbox.setChecked(True)
+        
+        settings_layout.addWidget(self.tiled_checkbox, 0, 0, 1, 3)
+        settings_layout.addWidget(max_pellet_size_label, 1, 0)
+        settings_layout.addWidget(self.max_pellet_size, 1, 1)
+        settings_layout.addWidget(max_pellet_size_unit, 1, 2)
+        settings_layout.addWidget(self.overlay_checkbox, 2, 0, 1, 3)
+        settings_layout.setRowStretch(3, 1)
+        
+        settings_groupbox.setLayout(settings_layout)
         
         imagedisplay_layout.addLayout(imagelayout)
+        imagedisplay_layout.addWidget(settings_groupbox)
         
         # Analyze button and progressbar
         analyze_layout = QVBoxLayout()
@@ -83,8 +127,11 @@ class PelletSizeWidghet(QTabWidget):
         
         self.progressbar = QProgressBar()
 
+        self.status = QLabel("")
+
         analyze_layout.addWidget(startbutton)
         analyze_layout.addWidget(self.progressbar)
+        analyze_layout.addWidget(self.status)
         
         ### back to welcome page
         back_to_welcome_page_button = QPushButton("Back")
@@ -117,6 +164,9 @@ class PelletSizeWidghet(QTabWidget):
             
             while self.count() > 1:
                 self.removeTab(self.count() - 1)
+            
+            # Overlays of this form that were still mapped when their results were shown
+            self.overlay_paths = discard_overlays(self.overlay_paths)
         
         filepaths = []
         filesettings = []
@@ -134,36 +184,72 @@ class PelletSizeWidghet(QTabWidget):
                 # If there are no settings, its just an empty list
                 filesettings.append(widget.settings)
         
+        self.cancel_event.clear()
+        self.finished_images = 0
+        self._progressbar_update(0)
+        
         self.data.add_data(self.data.Keys.PELLET_SIZER_IMAGES, filepaths, self.data.Namespaces.DEFAULT)
         self.data.add_data(self.data.Keys.PELLET_SIZER_IMAGE_SETTINGS, filesettings, self.data.Namespaces.DEFAULT)
+        self.data.add_data(self.data.Keys.PELLET_SIZER_VISUALIZATION, self.overlay_checkbox.isChecked(), self.data.Namespaces.DEFAULT)
+        self.data.add_data(self.data.Keys.PELLET_SIZER_TILED, self.tiled_checkbox.isChecked(), self.data.Namespaces.DEFAULT)
+        self.data.add_data(self.data.Keys.PELLET_SIZER_MAX_PELLET_SIZE, self.max_pellet_size.value(), self.data.Namespaces.DEFAULT)
         self.algman.add_task(self.algman.States.PELLET_SIZER_SINGLE_STATE, 0)
     
-    ### Result logic
-    def display_results(self) -> None:
-        """Displays results after analyzing. Called from the WaiterThread by a signal.
+    def cancel_analysis(self) -> None:
+        """Stops a running analysis, images already in work still finish. Called when the form closes."""
+        self.cancel_event.set()
+    
+    def _pellet_result_ready(self, index: int, result: dict | None) -> None:
+        """Shows every finished image while the analysis runs, its overlay and table get their tabs right away. Called from the PelletSizerSingleState by a signal.
+
+        Args:
+            index (int): position of the image in the selection
+            result (dict | None): the result of the image or None if it failed
         """
-        self._progressbar_update(1)
-        self._progressbar_update(0)
+        filepaths = self.data.get_data(self.data.Keys.PELLET_SIZER_IMAGES, self.data.Namespaces.DEFAULT)
         
-        # Fetching results
-        results = self.data.get_data(self.data.Keys.PELLET_SIZER_RESULT, self.data.Namespaces.DEFAULT)
+        self.finished_images += 1
+        self._progressbar_update(self.finished_images / len(filepaths))
         
-        images = []
-        data = []
+        name = os.path.basename(filepaths[index])
+        if result is None:
+            self.status.setText(f"{name}: failed ({self.finished_images}/{len(filepaths)})")
+            return
         
-        for result in results:
-            images.append(result["Image"])
-            data.append(result["Data"])
+        self.status.setText(f"{name}: {len(result['Data'])} pellets ({self.finished_images}/{len(filepaths)})")
         
-        # The images come back in the order of the filepaths given
-        filepaths = self.data.get_data(self.data.Keys.PELLET_SIZER_IMAGES, self.data.Namespaces.DEFAULT)
+        # The result tabs are set up with the first image that finished
+        if self.count() == 1:
+            
+            # The tabs follow the order in which the images finish, the exports look the paths up by tab index
+            self.result_filepaths = []
+            
+            # Results without overlays only get the tables
+            if "Image" in result:
+                self.addTab(self._result_image_widget([], self.result_filepaths), "Result Images")
+            self.addTab(self._result_table([], self.result_filepaths), "Result Values")
+        
+        self.result_filepaths.append(filepaths[index])
+        
+        if "Image" in result:
+            # The overlays come from the workers as memmap files, the mapping outlives the file
+            image = read_overlay(result["Image"])
+            if not discard_overlay(result["Image"]):
+                self.overlay_paths.add(result["Image"])
+            
+            self._add_result_image(image, filepaths[index])
         
-        # Creating two widget to fit into QTabWidget
-        resultimage_widget = self._result_image_widget(images, filepaths)
-        result_table = self._result_table(data, filepaths)
+        self._add_result_table(result["Data"], filepaths[index])
+    
+    ### Result logic
+    def display_results(self) -> None:
+        """Finishes an analysis after all images were shown by _pellet_result_ready. Called from the PelletSizerSingleState by a signal.
+        """
+        self._progressbar_update(1)
+        self._progressbar_update(0)
         
-        self.addTab(resultimage_widget, "Result Images")
-        self.addTab(result_table, "Result Values")
+        if self.count() == 1:
+            self.status.setText("No image could be analyzed.")
         
         ### Deleting the references to the images of the result to clean up the internal data
         self.data.delete_data(self.data.Keys.PELLET_SIZER_RESULT, self.data.Namespaces.DEFAULT)
@@ -173,7 +259,7 @@ class PelletSizeWidghet(QTabWidget):
 
         Args:
             images (list): numpy arrays in a list
-            filepaths (list): str paths in a list in the same order as images
+            filepaths (list): str paths in a list in the same order as images, later images are added with _add_result_image
 
         Returns:
             QWidget: return a parent Widget with layout child
@@ -195,10 +281,7 @@ class PelletSizeWidghet(QTabWidget):
 
             # Adding the images
             for i, image in enumerate(images):
-                imgwidget = ImageDisplay(image)
-                imgwidget.setupForm()
-                
-                self.img_stacked_tab.addTab(imgwidget, str(os.path.basename(filepaths[i])))
+                self._add_result_image(image, filepaths[i])
                 
             layout.addWidget(self.img_stacked_tab)
             layout.addWidget(save_button)
@@ -210,6 +293,22 @@ class PelletSizeWidghet(QTabWidget):
         except Exception as e:
             self.logger.error(f"Error in setting up image displays for results: {e}.") 
     
+    def _add_result_image(self, image: np.ndarray, filepath: str) -> None:
+        """Adds the overlay of one image as a tab to the result images.
+
+        Args:
+            image (np.ndarray): overlay of the image
+            filepath (str): path of the analyzed image
+        """
+        try:
+            imgwidget = ImageDisplay(image)
+            imgwidget.setupForm()
+            
+            self.img_stacked_tab.addTab(imgwidget, str(os.path.basename(filepath)))
+        
+        except Exception as e:
+            self.logger.error(f"Error in setting up the result image of {filepath}: {e}.")
+    
     def _result_image_export_button(self, filepaths: list) -> None:
         """Exports the resulting images (all/current) as .bmp format.
 
@@ -285,7 +384,7 @@ class PelletSizeWidghet(QTabWidget):
 
         Args:
             data (list): data from algorithm PELLETSIZER
-            filepaths (list): filepaths for used images
+            filepaths (list): filepaths for used images, later images are added with _add_result_table
 
         Returns:
             QWidget: parent widget w/ child TabWidget where results are displayed
@@ -301,21 +400,7 @@ class PelletSizeWidghet(QTabWidget):
             self.table_models = []
 
             for idx, image in enumerate(data):
-                table = QTableView()
-                model = QStandardItemModel()
-                model.setHorizontalHeaderLabels(["Area", "Diameter", "Perimeter"])
-
-                for result in image:
-                    row = []
-                    for value in result:
-                        row.append(QStandardItem(str(value)))
-
-                    model.appendRow(row)
-
-                table.setModel(model)
-                self.table_models.append(model)
-
-                self.stacked_result_tab.addTab(table, str(str(os.path.basename(filepaths[idx]))))
+                self._add_result_table(image, filepaths[idx])
 
             mainlayout.addWidget(self.stacked_result_tab)
 
@@ -330,6 +415,33 @@ class PelletSizeWidghet(QTabWidget):
         except Exception as e:
             self.logger.error(f"Error setting up result tables: {e}.")
             
+    def _add_result_table(self, data, filepath: str) -> None:
+        """Adds the result rows of one image as a table tab to the result values.
+
+        Args:
+            data: (N, 3) result rows of the image as in COLUMNS
+            filepath (str): path of the analyzed image
+        """
+        try:
+            table = QTableView()
+            model = QStandardItemModel()
+            model.setHorizontalHeaderLabels(COLUMNS)
+
+            for result in data:
+                row = []
+                for value in result:
+                    row.append(QStandardItem(str(value)))
+
+                model.appendRow(row)
+
+            table.setModel(model)
+            self.table_models.append(model)
+
+            self.stacked_result_tab.addTab(table, str(os.path.basename(filepath)))
+        
+        except Exception as e:
+            self.logger.error(f"Error setting up the result table of {filepath}: {e}.")
+            
     def _save_result_tables(self, filepaths: list) -> None:
         """Exports result tables (all/current) from the TabWidget View on Results.
 
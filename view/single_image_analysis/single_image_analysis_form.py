@@ -80,10 +80,10 @@ class SingleImageAnylsisForm(QStackedWidget):
         self.addWidget(bubblesizer)
         
         ### This is for Pellet Size - Zeiss Microscope
-        pelletwidget = PelletSizeWidghet()
-        pelletwidget.setupForm()
+        self.pelletwidget = PelletSizeWidghet()
+        self.pelletwidget.setupForm()
         
-        self.addWidget(pelletwidget)
+        self.addWidget(self.pelletwidget)
         
         return self
 
@@ -104,6 +104,9 @@ class SingleImageAnylsisForm(QStackedWidget):
         try:
             from view.main.mainframe import MainWindow
             
+            # Pending pellet images are not needed anymore
+            self.pelletwidget.cancel_analysis()
+            
             inst = MainWindow.get_instance()
             
             subwindows = inst.middle_layout.mdi_area.subWindowList()